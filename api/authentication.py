@@ -1,11 +1,18 @@
 # Standard Library
+import copy
+import hashlib
 import logging
+import threading
+import time
+from collections import namedtuple, OrderedDict
 
 # Third-Party Imports
 from decouple import config
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
+from django_q.tasks import async_task
 from firebase_admin import auth, credentials, initialize_app
 from rest_framework import exceptions
 from rest_framework.authentication import TokenAuthentication
@@ -28,34 +35,215 @@ payload = {
 cred = credentials.Certificate(payload)
 initialize_app(cred)
 
+# verified tokens are kept until they expire, users for a short while since
+# a save in another process cannot invalidate this process' copy
+TOKEN_CACHE_SIZE = int(config("TOKEN_CACHE_SIZE", 1024))
+USER_CACHE_SIZE = int(config("USER_CACHE_SIZE", 1024))
+USER_CACHE_TTL = int(config("USER_CACHE_TTL", 60))
+# "stub" keeps custom claims in memory instead of calling firebase
+FIREBASE_BACKEND = config("FIREBASE_BACKEND", "firebase")
+
+
+class ExpiringLRUCache(object):
+    """A thread-safe, size-bounded LRU mapping whose entries expire at a given
+    unix timestamp"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = ExpiringLRUCache(TOKEN_CACHE_SIZE)
+user_cache = ExpiringLRUCache(USER_CACHE_SIZE)
+
 
 class FirebaseTokenAuthentication(TokenAuthentication):
     def authenticate_credentials(self, key):
+        token = self.verify_token(key)
+        email = token.get("email")
+        user = self.get_user(email)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        return (user, token)
+
+    @staticmethod
+    def verify_token(key):
+        """Verify a firebase id token, reusing the claims of tokens verified
+        before that have not expired"""
+        cache_key = hashlib.sha256(key.encode()).hexdigest()
+        token = token_cache.get(cache_key)
+        if token is not None:
+            return token
         try:
             token = auth.verify_id_token(key)
         except Exception:
             raise exceptions.AuthenticationFailed("Unable to authenticate.")
-        else:
-            email = token.get("email")
+        if token.get("exp"):
+            token_cache.set(cache_key, token, token["exp"])
+        return token
+
+    @staticmethod
+    def get_user(email):
+        user = user_cache.get(email)
+        if user is None:
+            try:
+                user = User.objects.select_related("location").get(email=email)
+            except Exception as e:
+                logger.error(str(e))
+                raise exceptions.AuthenticationFailed("User not found")
+            # a user read inside a transaction may be rolled back with it
+            if not connection.in_atomic_block:
+                user_cache.set(email, user, time.time() + USER_CACHE_TTL)
+        # requests get their own copy so changes to one never leak into another
+        return copy.copy(user)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.delete(instance.email)
+
+
+StubUserRecord = namedtuple("StubUserRecord", ["uid", "email"])
+
+
+class StubFirebaseBackend(object):
+    """In-memory stand-in for the firebase_admin.auth calls made by the claims
+    sync. Every call is recorded in `calls` so it can be counted."""
+
+    def __init__(self):
+        self.uids = {}
+        self.claims = {}
+        self.calls = []
+
+    def get_user_by_email(self, email):
+        self.calls.append(("get_user_by_email", email))
+        if email not in self.uids:
+            raise LookupError("No user record found for {}".format(email))
+        return StubUserRecord(self.uids[email], email)
+
+    def create_user(self, email):
+        self.calls.append(("create_user", email))
+        self.uids[email] = "stub-{}".format(len(self.uids) + 1)
+        return StubUserRecord(self.uids[email], email)
+
+    def set_custom_user_claims(self, uid, custom_claims):
+        self.calls.append(("set_custom_user_claims", uid))
+        self.claims[uid] = custom_claims
+
+
+stub_firebase = StubFirebaseBackend()
+
+
+def get_firebase_backend():
+    return stub_firebase if FIREBASE_BACKEND == "stub" else auth
+
+
+def get_claims(user):
+    """Read the flags firebase claims are built from without loading deferred
+    fields"""
+    return (user.__dict__.get("is_staff"), user.__dict__.get("is_superuser"))
+
+
+class ClaimsSyncQueue(threading.local):
+    """Emails of the users whose claims changed in this thread. They are sent
+    to the django_q cluster as one task when the transaction commits."""
+
+    def __init__(self):
+        self.emails = set()
+
+    def add(self, email):
+        self.emails.add(email)
+        # every change registers a flush but only the first one finds emails
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        if not self.emails:
+            return
+        emails, self.emails = sorted(self.emails), set()
+        async_task("api.authentication.sync_firebase_claims", emails)
+
+    def clear(self):
+        self.emails.clear()
+
+
+claims_sync_queue = ClaimsSyncQueue()
+
+
+def sync_firebase_claims(emails):
+    """Set the admin and superuser claims of firebase users to their current
+    ART flags, creating the firebase users that do not exist yet
+
+    Runs on the django_q cluster.
+    :params: emails -> list of user emails
+    """
+    backend = get_firebase_backend()
+    users = User.objects.filter(email__in=emails).values_list(
+        "email", "is_staff", "is_superuser"
+    )
+    for email, is_staff, is_superuser in users:
+        try:
+            record = backend.get_user_by_email(email)
+        except Exception:
+            logger.warning("No user record found for {}. Creating one".format(email))
+            try:
+                record = backend.create_user(email=email)
+            except Exception as e:
+                logger.error("Unable to create firebase user {}: {}".format(email, e))
+                continue
+        attrs = {ADMIN_USER: is_staff, SUPERUSER: is_superuser}
         try:
-            user = User.objects.get(email=email)
+            backend.set_custom_user_claims(record.uid, attrs)
         except Exception as e:
-            logger.error(str(e))
-            raise exceptions.AuthenticationFailed("User not found")
+            logger.error("Unable to set claims of {}: {}".format(email, e))
 
-        if not user.is_active:
-            raise exceptions.AuthenticationFailed("User inactive or deleted.")
-        return (user, token)
+
+@receiver(post_init, sender=User)
+def remember_firebase_claims(sender, instance, **kwargs):
+    instance._firebase_claims = get_claims(instance)
 
 
 @receiver(post_save, sender=User)
 def set_firebase_custom_claims(sender, instance, created, **kwargs):
-    try:
-        user = auth.get_user_by_email(instance.email)
-    except Exception:
-        logger.warning("No user record found for the provided email. Creating one")
-        user = auth.create_user(email=instance.email)
+    """Queue a claims sync when is_staff or is_superuser changed
+
+    New users without either flag need no claims, firebase creates their
+    record when they first sign in.
+    """
+    claims = get_claims(instance)
+    if created:
+        changed = any(claims)
     else:
-        if user.uid:
-            attrs = {ADMIN_USER: instance.is_staff, SUPERUSER: instance.is_superuser}
-            auth.set_custom_user_claims(user.uid, attrs)
+        changed = claims != instance._firebase_claims
+    instance._firebase_claims = claims
+    if changed:
+        claims_sync_queue.add(instance.email)
@@ -4,11 +4,11 @@ import logging
 import operator
 
 # Third-Party Imports
-from django.db.models import Q
+from django.db.models import Count, Q
 from django_filters import rest_framework as filters
 
 # App Imports
-from core.models import AllocationHistory, Asset, AssetLog, User
+from core.models import AllocationHistory, Asset, AssetLog, History, User
 
 logger = logging.getLogger(__name__)
 
@@ -155,12 +155,10 @@ class UserFilter(BaseFilter):
     is_active = filters.CharFilter(field_name="is_active", lookup_expr="iexact")
 
     def filter_by_allocated_asset_count(self, queryset, name, value):
-        users = [
-            user.id
-            for user in queryset
-            if str(user.assetassignee.asset_set.count()) in value.split(",")
-        ]
-        return queryset.filter(id__in=users)
+        counts = {int(count) for count in value.split(",") if count.strip().isdigit()}
+        return queryset.annotate(**{name: Count("assetassignee__asset")}).filter(
+            **{"{}__in".format(name): counts}
+        )
 
     class Meta:
         model = User
@@ -195,3 +193,25 @@ class AllocationsHistoryFilter(BaseFilter):
             "asset_serial_number",
             "asset_code",
         ]
+
+
+class HistoryFilter(filters.FilterSet):
+    """Filters the history with exact lookups, which its indexes can serve"""
+
+    created_after = filters.IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="gte"
+    )
+    created_before = filters.IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="lt"
+    )
+
+    class Meta:
+        model = History
+        fields = [
+            "table_name",
+            "item_id",
+            "user",
+            "action",
+            "created_after",
+            "created_before",
+        ]
@@ -0,0 +1,120 @@
+# Standard Library
+import functools
+import json
+import os
+
+# Third-Party Imports
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+
+# App Imports
+from core import constants
+from core.models import History
+
+
+class HistoryEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, FieldFile):
+            return o.name
+        return super().default(o)
+
+
+def get_history_tables():
+    """Return the tables whose changes are recorded in the History"""
+    return _parse_history_tables(os.getenv("HISTORY_TABLES"))
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_history_tables(tables):
+    if tables:
+        return frozenset(table.strip() for table in tables.split(","))
+    return frozenset(constants.HISTORY_TABLES)
+
+
+def is_recorded(instance):
+    return instance._meta.db_table in get_history_tables()
+
+
+def history_values(instance):
+    """Return the loaded values of the concrete fields of a model instance,
+    leaving out the timestamps every save moves"""
+    return {
+        field.attname: instance.__dict__[field.attname]
+        for field in instance._meta.concrete_fields
+        if field.attname in instance.__dict__ and not getattr(field, "auto_now", False)
+    }
+
+
+def remember_history_values(instance):
+    """Keep the values an instance was loaded with, to record what a save
+    changes"""
+    instance._history_values = history_values(instance)
+
+
+def get_changes(instance, created=False, deleted=False):
+    """Return {field: [old value, new value]} of the fields a save or delete
+    changed"""
+    values = history_values(instance)
+    if deleted:
+        return {name: [value, None] for name, value in values.items()}
+    before = {} if created else getattr(instance, "_history_values", {})
+    instance._history_values = values
+    return {
+        name: [before.get(name), value]
+        for name, value in values.items()
+        if name not in before or before[name] != value
+    }
+
+
+def record_history(request, instance, created=False, deleted=False):
+    """Keep a History row of the fields a save or delete made while handling
+    a request changed
+
+    The rows are only written by flush_history, once the response is ready.
+    Saves that change nothing or are rolled back are not recorded.
+    """
+    user = getattr(request, "user", None)
+    if not (user and user.is_authenticated):
+        return
+    row = history_row(user, request.method, instance, created, deleted)
+    if row is None:
+        return
+    if not hasattr(request, "history"):
+        request.history = []
+    # kept once the change commits, so a rolled back save is not recorded
+    transaction.on_commit(lambda: request.history.append(row))
+
+
+def record_bulk_history(user, action, instances, created=False):
+    """Write the History rows of instances saved outside of a request, such
+    as by a django_q task, with one insert once the change commits"""
+    rows = [history_row(user, action, instance, created) for instance in instances]
+    rows = [row for row in rows if row is not None]
+    if rows:
+        transaction.on_commit(lambda: History.objects.bulk_create(rows))
+
+
+def history_row(user, action, instance, created=False, deleted=False):
+    """Return the unsaved History row of the fields a save or delete changed,
+    or None when there is nothing to record"""
+    if not is_recorded(instance) or getattr(instance, "id", None) is None:
+        return None
+    changes = get_changes(instance, created=created, deleted=deleted)
+    if not changes:
+        return None
+    return History(
+        table_name=str(instance._meta.db_table),
+        user=user,
+        item_id=instance.id,
+        action=action,
+        body=json.dumps(changes, cls=HistoryEncoder),
+    )
+
+
+def flush_history(request):
+    """Write the History rows kept while handling a request with one insert"""
+    history = getattr(request, "history", None)
+    if history:
+        request.history = []
+        History.objects.bulk_create(history)
@@ -1,5 +1,5 @@
 # Third-Party Imports
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 def _positive_int(integer_string, strict=False, cutoff=None):
@@ -34,3 +34,22 @@ class PageNumberPagination(PageNumberPagination):
                 pass
 
         return self.page_size
+
+
+class HistoryCursorPagination(CursorPagination):
+    """Pages through the history by the position of the last row of a page,
+    so any page costs an index range scan however deep it is"""
+
+    ordering = "created_at"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class NotificationCursorPagination(CursorPagination):
+    """Pages through the notifications of a user, newest first"""
+
+    ordering = "-id"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -1,22 +1,82 @@
 # Standard Library
 import threading
 
+# App Imports
+from api.history import flush_history
+from core.models import AssetAssignee
+
+
+class RequestContext(threading.local):
+    """The request being handled and the values cached for it
+
+    contextvars is not available on the Python 3.6 we run, but a
+    threading.local is private to the greenlet once gevent monkey patches
+    threading, as the gevent workers do, so each request gets its own
+    context under threads and greenlets alike.
+    """
+
+    def __init__(self):
+        self.request = None
+        self.cache = {}
+
+    def start(self, request):
+        self.request = request
+        self.cache = {}
+
+    def end(self):
+        self.request = None
+        self.cache = {}
+
+    def cached(self, key, load):
+        """Return the value of key for the current request, calling load()
+        only the first time it is asked for"""
+        if self.request is None:
+            return load()
+        if key not in self.cache:
+            self.cache[key] = load()
+        return self.cache[key]
+
+
+request_context = RequestContext()
+
+
+def get_current_user():
+    """Return the authenticated user of the current request, or None"""
+    user = getattr(request_context.request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user
+    return None
+
+
+def get_current_assignee():
+    """Return the AssetAssignee of the user of the current request, read
+    once per request"""
+    user = get_current_user()
+    if user is None:
+        return None
+    return request_context.cached(
+        ("assignee", user.id), lambda: AssetAssignee.objects.filter(user=user).first()
+    )
+
 
 class RequestMiddleware(object):
     """Class for getting the current request"""
 
-    _requestdata = {}
-
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        self._requestdata[threading.current_thread()] = request
-        response = self.get_response(request)
-        self._requestdata.pop(threading.current_thread(), None)
+        request_context.start(request)
+        try:
+            response = self.get_response(request)
+            flush_history(request)
+        finally:
+            request_context.end()
         return response
 
     @classmethod
     def get_request(cls, default=None):
         """returns the current request or none if there is no request"""
-        return cls._requestdata.get(threading.current_thread(), default)
+        if request_context.request is None:
+            return default
+        return request_context.request
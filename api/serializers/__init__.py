@@ -17,6 +17,7 @@ from .assets import (  # noqa: F401  # isort:skip
     AssetCategorySerializer,
     AssetConditionSerializer,
     AssetHealthSerializer,
+    AssetImportJobSerializer,
     AssetIncidentReportSerializer,
     AssetLogSerializer,
     AssetMakeSerializer,
@@ -26,10 +27,17 @@ from .assets import (  # noqa: F401  # isort:skip
     AssetStatusSerializer,
     AssetSubCategorySerializer,
     AssetTypeSerializer,
+    BulkAllocationSerializer,
+    BulkAssetLogSerializer,
     StateTransitionSerializer,
 )
 from .history import HistorySerializer  # noqa: F401
 
+from .notifications import (  # noqa: F401  # isort:skip
+    MarkNotificationsReadSerializer,
+    NotificationSerializer,
+)
+
 from .users import (  # noqa: F401  # isort:skip
     UserFeedbackSerializer,
     UserGroupSerializer,
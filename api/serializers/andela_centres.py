@@ -117,6 +117,9 @@ class DepartmentSerializer(serializers.ModelSerializer):
         fields = ("name", "id", "number_of_assets")
 
     def get_number_of_assets(self, obj):
+        asset_count = self.context.get("asset_count")
+        if asset_count is not None:
+            return asset_count
         department_assignee = models.AssetAssignee.objects.filter(
             department_id=obj.id
         ).first()
@@ -1,10 +1,12 @@
 # Third-Party Imports
 from django.core.exceptions import ValidationError
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
 # App Imports
-from core import models
-from core.constants import CHECKIN, CHECKOUT
+from core import constants, models
+from core.constants import ASSET_LOG_CHOICES, CHECKIN, CHECKOUT, JOB_FAILED
 
 
 class AssetSerializer(serializers.ModelSerializer):
@@ -83,27 +85,63 @@ class AssetSerializer(serializers.ModelSerializer):
             "asset_make",
         )
 
-    def get_checkin_status(self, obj):
-        try:
-            asset_log = (
-                models.AssetLog.objects.filter(asset=obj)
-                .order_by("-created_at")
-                .first()
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Join and prefetch everything the serializer reads.
+
+        Assets from the returned queryset are serialized without any further
+        per row queries, so the cost of a page does not depend on its size.
+        """
+        assignee_relations = ("department", "workspace", "user", "team")
+        assignee_assets = (
+            models.Asset.objects.filter(assigned_to=OuterRef("assigned_to"))
+            .order_by()
+            .values("assigned_to")
+            .annotate(count=Count("id"))
+        )
+        allocations = models.AllocationHistory.objects.select_related(
+            "assigner",
+            *[f"current_assignee__{field}" for field in assignee_relations],
+            *[f"previous_assignee__{field}" for field in assignee_relations],
+        )
+        return (
+            queryset.select_related(
+                "asset_location",
+                "department",
+                "model_number__asset_make__asset_type__asset_sub_category__asset_category",
+                "specs",
+                "team_name",
+                "assigned_to__department",
+                "assigned_to__team",
+                "assigned_to__user__department",
+                "assigned_to__workspace__section__floor__block",
             )
-            if asset_log.log_type == CHECKIN:
-                return "checked_in"
-            elif asset_log.log_type == CHECKOUT:
-                return "checked_out"
-        except AttributeError:
-            return None
+            .prefetch_related(Prefetch("allocationhistory_set", queryset=allocations))
+            .annotate(
+                assignee_asset_count=Subquery(
+                    assignee_assets.values("count"), output_field=IntegerField()
+                )
+            )
+        )
+
+    def get_checkin_status(self, obj):
+        if obj.last_log_type == CHECKIN:
+            return "checked_in"
+        elif obj.last_log_type == CHECKOUT:
+            return "checked_out"
+        return None
 
     def get_assigned_to(self, obj):
         if not obj.assigned_to:
             return None
+        # number of assets held by the assignee, annotated by setup_eager_loading
+        context = {"asset_count": getattr(obj, "assignee_asset_count", None)}
         if obj.assigned_to.department:
             from api.serializers import DepartmentSerializer
 
-            serialized_data = DepartmentSerializer(obj.assigned_to.department)
+            serialized_data = DepartmentSerializer(
+                obj.assigned_to.department, context=context
+            )
         elif obj.assigned_to.workspace:
             from api.serializers import OfficeWorkspaceSerializer
 
@@ -111,7 +149,7 @@ class AssetSerializer(serializers.ModelSerializer):
         elif obj.assigned_to.user:
             from api.serializers import UserSerializer
 
-            serialized_data = UserSerializer(obj.assigned_to.user)
+            serialized_data = UserSerializer(obj.assigned_to.user, context=context)
         elif obj.assigned_to.team:
             from api.serializers import TeamSerializer
 
@@ -121,7 +159,7 @@ class AssetSerializer(serializers.ModelSerializer):
         return serialized_data.data
 
     def get_allocation_history(self, obj):
-        allocations = models.AllocationHistory.objects.filter(asset=obj.id)
+        allocations = obj.allocationhistory_set.all()
         return [
             {
                 "id": allocation.id,
@@ -236,7 +274,7 @@ class AssetLogSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         instance_data = super().to_representation(instance)
-        asset = models.Asset.objects.get(id=instance.asset.id)
+        asset = instance.asset
         serial_no = asset.serial_number
         asset_code = asset.asset_code
         instance_data["checked_by"] = instance.checked_by.email
@@ -244,15 +282,26 @@ class AssetLogSerializer(serializers.ModelSerializer):
         return instance_data
 
     def validate(self, fields):
-        existing_log = models.AssetLog.objects.filter(asset=fields["asset"])
-        existing_log = existing_log.first()
-        if existing_log and existing_log.log_type == fields["log_type"]:
+        if fields["asset"].last_log_type == fields["log_type"]:
             raise serializers.ValidationError(
-                f"The asset log type is already {existing_log.log_type}"
+                f"The asset log type is already {fields['log_type']}"
             )
         return fields
 
 
+class BulkAssetLogItemSerializer(serializers.Serializer):
+    code = serializers.CharField(help_text="Asset code or serial number")
+    log_type = serializers.ChoiceField(choices=ASSET_LOG_CHOICES)
+
+
+class BulkAssetLogSerializer(serializers.Serializer):
+    logs = serializers.ListField(
+        child=BulkAssetLogItemSerializer(),
+        allow_empty=False,
+        max_length=constants.BULK_MAX_ITEMS,
+    )
+
+
 class AssetStatusSerializer(AssetSerializer):
     status_history = serializers.SerializerMethodField()
 
@@ -310,6 +359,22 @@ class AllocationsSerializer(serializers.ModelSerializer):
         return instance_data
 
 
+class BulkAllocationItemSerializer(serializers.Serializer):
+    asset = serializers.IntegerField()
+    current_assignee = serializers.IntegerField(required=False, allow_null=True)
+
+
+class BulkAllocationSerializer(serializers.Serializer):
+    """(asset, assignee) pairs to change at once, an empty current_assignee
+    de-allocates the asset"""
+
+    allocations = serializers.ListField(
+        child=BulkAllocationItemSerializer(),
+        allow_empty=False,
+        max_length=constants.BULK_MAX_ITEMS,
+    )
+
+
 class AssetCategorySerializer(serializers.ModelSerializer):
     category_name = serializers.ReadOnlyField(source="name")
 
@@ -394,6 +459,7 @@ class AssetModelNumberSerializer(serializers.ModelSerializer):
             "last_modified",
             "model_number",
             "make_label",
+            "low_stock_threshold",
         )
 
     def to_representation(self, instance):
@@ -577,3 +643,40 @@ class StateTransitionSerializer(serializers.ModelSerializer):
             "incident_report_state",
             "asset_state_from_report",
         )
+
+
+class AssetImportJobSerializer(serializers.ModelSerializer):
+    status = serializers.SerializerMethodField()
+    error = serializers.SerializerMethodField()
+    remaining_rows = serializers.ReadOnlyField()
+    skipped_file = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.AssetImportJob
+        fields = (
+            "id",
+            "status",
+            "total_rows",
+            "processed_rows",
+            "skipped_rows",
+            "remaining_rows",
+            "skipped_file",
+            "error",
+            "created_at",
+            "last_modified",
+        )
+
+    def get_status(self, obj):
+        # a stale job is failed by the fail_stale_jobs command later on
+        return JOB_FAILED if obj.is_stale else obj.status
+
+    def get_error(self, obj):
+        return obj.STALE_ERROR if obj.is_stale else obj.error
+
+    def get_skipped_file(self, obj):
+        if obj.skipped_rows:
+            return reverse(
+                "asset-imports-skipped",
+                args=[obj.id],
+                request=self.context.get("request"),
+            )
@@ -1,3 +1,6 @@
+# Standard Library
+import json
+
 # Third-Party Imports
 from rest_framework import serializers
 
@@ -6,6 +9,15 @@ from core import models
 
 
 class HistorySerializer(serializers.ModelSerializer):
+    body = serializers.SerializerMethodField()
+
     class Meta:
         model = models.History
         fields = ("id", "table_name", "item_id", "action", "user", "body", "created_at")
+
+    def get_body(self, obj):
+        try:
+            return json.loads(obj.body)
+        except ValueError:
+            # rows recorded before the changes were stored as JSON
+            return obj.body
@@ -0,0 +1,30 @@
+# Third-Party Imports
+from rest_framework import serializers
+
+# App Imports
+from core import models
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    origin = serializers.ReadOnlyField(source="origin.email")
+
+    class Meta:
+        model = models.Notifications
+        fields = (
+            "id",
+            "title",
+            "body",
+            "level",
+            "origin",
+            "icon_url",
+            "created_at",
+            "read",
+            "read_at",
+        )
+
+
+class MarkNotificationsReadSerializer(serializers.Serializer):
+    """The notifications to mark as read, every unread one when ids is
+    left out"""
+
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
@@ -54,6 +54,9 @@ class UserSerializer(serializers.ModelSerializer):
         an instance of the AssetAssignee when /api/v1/manage-assets is loaded
 
         """
+        asset_count = self.context.get("asset_count")
+        if asset_count is not None:
+            return asset_count
         try:
             return obj.assetassignee.asset_set.count()
         except AttributeError:
@@ -78,7 +81,9 @@ class UserSerializerWithAssets(UserSerializer):
     def get_allocated_assets(self, obj):
         from .assets import AssetSerializer
 
-        assets = models.Asset.objects.filter(assigned_to__user=obj)
+        assets = AssetSerializer.setup_eager_loading(
+            models.Asset.objects.filter(assigned_to__user=obj)
+        )
         serialized_assets = AssetSerializer(assets, many=True)
         return serialized_assets.data
 
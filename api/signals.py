@@ -3,18 +3,25 @@ A module containing signals used to listen to specific events in the models
 isort:skip_file
 """
 # Third-Party Imports
+from django.apps import apps
 from django.db import transaction
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
+from django_q.tasks import async_task
 from rest_framework.reverse import reverse
 
 # App Imports
+from api.history import (
+    get_history_tables,
+    record_bulk_history,
+    record_history,
+    remember_history_values,
+)
 from api.requestMiddleware import RequestMiddleware
 from core import constants
-from core.constants import TABLES
+from core.signals import bulk_saved
 from core.models import (  # isort:skip
     AssetIncidentReport,
-    History,
     Notifications,
     StateTransition,
     User,
@@ -25,55 +32,80 @@ from core.models import (  # isort:skip
 @receiver(post_delete)
 def track_application_actions(sender, instance, **kwargs):
     current_request = RequestMiddleware.get_request()
-    if (
-        sender._meta.db_table not in TABLES
-        and hasattr(current_request, "user")
-        and hasattr(instance, "id")
-    ):
-        data = instance.__dict__.copy()
-        data.__delitem__("_state")
-        try:
-            history = History(
-                table_name=str(instance._meta.db_table),
-                user=current_request.user,
-                item_id=instance.id,
-                action=current_request.method,
-                body=data,
-            )
-            history.save()
-        except ValueError:
-            pass
+    if current_request is not None:
+        record_history(
+            current_request,
+            instance,
+            created=kwargs.get("created", False),
+            deleted=kwargs["signal"] is post_delete,
+        )
+
+
+@receiver(bulk_saved)
+def track_bulk_actions(sender, instances, created, user=None, **kwargs):
+    current_request = RequestMiddleware.get_request()
+    if current_request is not None:
+        for instance in instances:
+            record_history(current_request, instance, created=created)
+    elif user is not None:
+        # writes of the django_q tasks are recorded for the user they run for
+        record_bulk_history(user, "POST", instances, created=created)
+
+
+def remember_tracked_values(sender, instance, **kwargs):
+    if RequestMiddleware.get_request() is not None:
+        remember_history_values(instance)
+
+
+# only the models whose changes are recorded pay for the snapshot of the
+# values they are loaded with
+for model in apps.get_models():
+    if model._meta.db_table in get_history_tables():
+        post_init.connect(remember_tracked_values, sender=model)
 
 
 @receiver(post_save, sender=AssetIncidentReport)
 def create_notification_on_incident_report_submission(**kwargs):
     """
-    Create a notification to admin users when a user creates an incident report
+    Notify the admin users of a new incident report from the django_q
+    cluster, once the report is committed
     :param kwargs:
     :return:
     """
     instance = kwargs["instance"]
     # if a new notification has been  created
     if kwargs.get("created", False) is True:
-        notification_targets = User.objects.filter(is_superuser=True)
-        incident_url = f'{reverse("incidence-reports-list")}/{instance.id}'
+        transaction.on_commit(
+            lambda: async_task(
+                "api.signals.notify_admins_of_incident_report", instance.id
+            )
+        )
 
-        # create notifications to te different admins
-        # carry out as a transaction to eliminate the computational cost of individual operations
-        # and  also to  benefit from having transaction roll-backs if any of the items fail.
-        with transaction.atomic():
-            for target in notification_targets:
-                notification = Notifications(
-                    title=constants.INCIDENT_REPORT_CREATED_NOTIFICATION_TITLE,
-                    body=constants.INCIDENT_REPORT_CREATED_NOTIFICATION_BODY.substitute(
-                        email=target.email, link=incident_url
-                    ),
-                    level=constants.INFO_NOTIFICATION,
-                    origin=instance.submitted_by,
-                    target=target,
-                )
-                notification.save()
-                # send email to user
+
+def notify_admins_of_incident_report(report_id):
+    """
+    Create the notifications of a new incident report to every admin user
+    with one insert
+    :param report_id: id of the AssetIncidentReport
+    :return:
+    """
+    report = AssetIncidentReport.objects.get(id=report_id)
+    incident_url = f'{reverse("incidence-reports-list")}/{report.id}'
+    notification_targets = User.objects.filter(is_superuser=True).only("email")
+    Notifications.objects.bulk_create(
+        [
+            Notifications(
+                title=constants.INCIDENT_REPORT_CREATED_NOTIFICATION_TITLE,
+                body=constants.INCIDENT_REPORT_CREATED_NOTIFICATION_BODY.substitute(
+                    email=target.email, link=incident_url
+                ),
+                level=constants.INFO_NOTIFICATION,
+                origin_id=report.submitted_by_id,
+                target=target,
+            )
+            for target in notification_targets
+        ]
+    )
 
 
 @receiver(post_save, sender=StateTransition)
@@ -1,4 +1,5 @@
 # Standard Library
+import json
 from unittest.mock import patch
 
 # Third-Party Imports
@@ -8,7 +9,10 @@ from rest_framework.test import APIClient
 
 # App Imports
 from api.tests import APIBaseTestCase
+from core.constants import BULK_MAX_ITEMS
 from core.models import AllocationHistory, AssetAssignee, Department, OfficeWorkspace
+from core.models.history import History
+from core.models.slack import SlackMessage
 
 User = get_user_model()
 client = APIClient()
@@ -250,3 +254,104 @@ class AllocationTestCase(APIBaseTestCase):
             response.data["results"][0]["asset"],
             f"{self.asset.serial_number} - {self.asset.asset_code}",
         )
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_bulk_allocation_notifies_each_recipient_once(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.other_user.email}
+        SlackMessage.objects.all().delete()
+        data = {
+            "allocations": [
+                {"asset": self.asset_2.id, "current_assignee": self.asset_assignee.id},
+                {"asset": self.asset_3.id, "current_assignee": self.asset_assignee.id},
+            ]
+        }
+        response = client.post(
+            reverse("allocations-bulk"),
+            data,
+            format="json",
+            HTTP_AUTHORIZATION="Token {}".format(self.token_other_user),
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[0]["assigner"], self.other_user.email)
+        for asset in [self.asset_2, self.asset_3]:
+            asset.refresh_from_db()
+            self.assertEqual(asset.current_status, "Allocated")
+            self.assertEqual(asset.assigned_to, self.asset_assignee)
+        message = SlackMessage.objects.get()
+        self.assertEqual(message.user, self.user)
+        self.assertEqual(message.text.count("has been allocated to you"), 2)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_bulk_allocation_makes_no_change_when_a_pair_is_invalid(
+        self, mock_verify_id_token
+    ):
+        mock_verify_id_token.return_value = {"email": self.other_user.email}
+        count = AllocationHistory.objects.count()
+        data = {
+            "allocations": [
+                {"asset": self.asset_2.id, "current_assignee": self.asset_assignee.id},
+                {"asset": self.asset_3.id, "current_assignee": None},
+            ]
+        }
+        response = client.post(
+            reverse("allocations-bulk"),
+            data,
+            format="json",
+            HTTP_AUTHORIZATION="Token {}".format(self.token_other_user),
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["allocations"],
+            {1: ["You can only de-allocate allocated assets"]},
+        )
+        self.assertEqual(AllocationHistory.objects.count(), count)
+        self.asset_2.refresh_from_db()
+        self.assertIsNone(self.asset_2.assigned_to)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_bulk_allocation_is_limited_in_size(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.other_user.email}
+        count = AllocationHistory.objects.count()
+        data = {
+            "allocations": [
+                {"asset": self.asset_2.id, "current_assignee": self.asset_assignee.id}
+            ]
+            * (BULK_MAX_ITEMS + 1)
+        }
+        response = client.post(
+            reverse("allocations-bulk"),
+            data,
+            format="json",
+            HTTP_AUTHORIZATION="Token {}".format(self.token_other_user),
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("allocations", response.data)
+        self.assertEqual(AllocationHistory.objects.count(), count)
+
+    @patch("api.history.transaction.on_commit", lambda func: func())
+    @patch("api.authentication.auth.verify_id_token")
+    def test_bulk_allocation_records_the_changed_assets(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.other_user.email}
+        data = {
+            "allocations": [
+                {"asset": self.asset_2.id, "current_assignee": self.asset_assignee.id}
+            ]
+        }
+        response = client.post(
+            reverse("allocations-bulk"),
+            data,
+            format="json",
+            HTTP_AUTHORIZATION="Token {}".format(self.token_other_user),
+        )
+
+        self.assertEqual(response.status_code, 201)
+        row = History.objects.get(table_name="core_asset", item_id=str(self.asset_2.id))
+        self.assertEqual(row.user, self.other_user)
+        self.assertEqual(row.action, "POST")
+        changes = json.loads(row.body)
+        self.assertEqual(changes["current_status"][1], "Allocated")
+        self.assertEqual(changes["assigned_to_id"], [None, self.asset_assignee.id])
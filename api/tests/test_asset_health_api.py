@@ -86,3 +86,40 @@ class AssetHealthTestCase(APIBaseTestCase):
         self.assertIn("asset_type", response.data[0])
         self.assertEqual(response.data[0]["asset_type"], self.asset_type.name)
         self.assertEqual(response.status_code, 200)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_asset_health_counts_each_model_number_once(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        response = client.get(
+            self.asset_health_urls,
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        model_numbers = [health["model_number"] for health in response.data]
+        self.assertEqual(len(model_numbers), len(set(model_numbers)))
+        self.assertEqual(
+            sum(sum(health["count_by_status"].values()) for health in response.data),
+            Asset.objects.filter(asset_location=self.admin_user.location).count(),
+        )
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_asset_health_can_be_grouped_by_make_and_department(
+        self, mock_verify_id_token
+    ):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        response = client.get(
+            "{}?group_by=make,department".format(self.asset_health_urls),
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["asset_make"], self.asset_make.name)
+        self.assertEqual(response.data[0]["department"], self.department.name)
+        self.assertIn("count_by_status", response.data[0])
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_asset_health_rejects_unsupported_grouping(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        response = client.get(
+            "{}?group_by=colour".format(self.asset_health_urls),
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        self.assertEqual(response.status_code, 400)
@@ -1,16 +1,18 @@
 # Standard Library
+import json
 from datetime import datetime
 from unittest.mock import patch
 
 # Third-Party Imports
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
 # App Imports
 from api.tests import APIBaseTestCase
-from core.constants import CHECKIN, CHECKOUT
-from core.models import Asset, AssetLog, AssetMake, AssetModelNumber
+from core.constants import BULK_MAX_ITEMS, CHECKIN, CHECKOUT
+from core.models import Asset, AssetLog, AssetMake, AssetModelNumber, History
 
 User = get_user_model()
 client = APIClient()
@@ -843,3 +845,87 @@ class AssetLogModelTest(APIBaseTestCase):
         self.assertEqual(response.data["id"], asset_log.id)
         self.assertEqual(response.data["log_type"], asset_log.log_type)
         self.assertEqual(response.data["checked_by"], asset_log.checked_by.email)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_security_user_logs_a_batch_of_scans(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.security_user.email}
+        initial_log_count = AssetLog.objects.count()
+        data = {
+            "logs": [
+                {"code": self.test_other_asset.asset_code.lower(), "log_type": CHECKIN},
+                {"code": self.test_other_asset.serial_number, "log_type": CHECKIN},
+                {"code": self.test_other_asset.serial_number, "log_type": CHECKOUT},
+                {"code": "UNKNOWN", "log_type": CHECKIN},
+            ]
+        }
+        response = client.post(
+            reverse("asset-logs-bulk"),
+            data,
+            format="json",
+            HTTP_AUTHORIZATION="Token {}".format(self.token_checked_by),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["created"] for result in response.data], [True, False, True, False]
+        )
+        self.assertEqual(
+            response.data[1]["error"], f"The asset log type is already {CHECKIN}"
+        )
+        self.assertNotIn("asset", response.data[3])
+        self.assertEqual(AssetLog.objects.count(), initial_log_count + 2)
+        self.assertEqual(
+            AssetLog.objects.filter(asset=self.test_other_asset).first().log_type,
+            CHECKOUT,
+        )
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_a_batch_of_scans_is_limited_in_size(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.security_user.email}
+        initial_log_count = AssetLog.objects.count()
+        data = {
+            "logs": [{"code": self.test_other_asset.asset_code, "log_type": CHECKIN}]
+            * (BULK_MAX_ITEMS + 1)
+        }
+        response = client.post(
+            reverse("asset-logs-bulk"),
+            data,
+            format="json",
+            HTTP_AUTHORIZATION="Token {}".format(self.token_checked_by),
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("logs", response.data)
+        self.assertEqual(AssetLog.objects.count(), initial_log_count)
+
+    def test_logs_move_the_last_log_of_the_asset(self):
+        stale_copy = Asset.objects.get(id=self.test_other_asset.id)
+        log = AssetLog.objects.create(
+            checked_by=self.security_user, asset=self.test_other_asset, log_type=CHECKIN
+        )
+        stale_copy.save()
+
+        asset = Asset.objects.get(id=self.test_other_asset.id)
+        self.assertEqual(asset.last_log_type, CHECKIN)
+        self.assertEqual(asset.last_log_at, log.created_at)
+
+    @patch("api.history.transaction.on_commit", lambda func: func())
+    @patch("api.authentication.auth.verify_id_token")
+    def test_a_batch_of_scans_records_the_logged_assets(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.security_user.email}
+        data = {
+            "logs": [{"code": self.test_other_asset.asset_code, "log_type": CHECKIN}]
+        }
+        response = client.post(
+            reverse("asset-logs-bulk"),
+            data,
+            format="json",
+            HTTP_AUTHORIZATION="Token {}".format(self.token_checked_by),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        row = History.objects.get(
+            table_name="core_asset", item_id=str(self.test_other_asset.id)
+        )
+        self.assertEqual(row.user, self.security_user)
+        self.assertEqual(json.loads(row.body)["last_log_type"][1], CHECKIN)
@@ -0,0 +1,130 @@
+# Standard Library
+import time
+from unittest.mock import patch
+
+# Third-Party Imports
+from django_q.conf import Conf
+
+# App Imports
+from api import authentication
+from api.authentication import ExpiringLRUCache, FirebaseTokenAuthentication
+from api.tests import APIBaseTestCase
+from core.models import User
+
+
+class ExpiringLRUCacheTestCase(APIBaseTestCase):
+    def test_cache_evicts_least_recently_used_entries(self):
+        cache = ExpiringLRUCache(max_size=2)
+        expires_at = time.time() + 60
+        cache.set("a", 1, expires_at)
+        cache.set("b", 2, expires_at)
+        cache.get("a")
+        cache.set("c", 3, expires_at)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_cache_drops_expired_entries(self):
+        cache = ExpiringLRUCache(max_size=2)
+        cache.set("a", 1, time.time() - 1)
+
+        self.assertIsNone(cache.get("a"))
+
+
+class FirebaseTokenAuthenticationTestCase(APIBaseTestCase):
+    def tearDown(self):
+        authentication.token_cache.clear()
+        authentication.user_cache.clear()
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_verified_token_is_reused_until_it_expires(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {
+            "email": self.admin_user.email,
+            "exp": time.time() + 60,
+        }
+
+        for _ in range(2):
+            user, _ = FirebaseTokenAuthentication().authenticate_credentials(
+                "cachedtoken"
+            )
+
+        self.assertEqual(user, self.admin_user)
+        mock_verify_id_token.assert_called_once_with("cachedtoken")
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_expired_token_is_verified_again(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {
+            "email": self.admin_user.email,
+            "exp": time.time() - 1,
+        }
+
+        for _ in range(2):
+            FirebaseTokenAuthentication().authenticate_credentials("expiredtoken")
+
+        self.assertEqual(mock_verify_id_token.call_count, 2)
+
+    def test_saving_a_user_drops_its_cached_copy(self):
+        authentication.user_cache.set(
+            self.admin_user.email, self.admin_user, time.time() + 60
+        )
+
+        self.admin_user.save()
+
+        self.assertIsNone(authentication.user_cache.get(self.admin_user.email))
+
+
+@patch.object(Conf, "SYNC", True)
+@patch("api.authentication.transaction.on_commit", lambda func: func())
+class FirebaseClaimsSyncTestCase(APIBaseTestCase):
+    def setUp(self):
+        authentication.claims_sync_queue.clear()
+        self.backend = authentication.StubFirebaseBackend()
+        patch_backend = patch(
+            "api.authentication.get_firebase_backend", return_value=self.backend
+        )
+        patch_backend.start()
+        self.addCleanup(patch_backend.stop)
+
+    def test_saves_that_do_not_change_the_flags_make_no_firebase_calls(self):
+        user = User.objects.create(email="claims.none@andela.com", cohort=1)
+        user.cohort = 2
+        user.save()
+        User.objects.get(id=user.id).save()
+
+        self.assertEqual(self.backend.calls, [])
+
+    def test_changed_flags_are_synced_to_firebase(self):
+        user = User.objects.get(id=self.user.id)
+        user.is_staff = True
+        user.save()
+
+        uid = self.backend.uids[self.user.email]
+        self.assertEqual(
+            self.backend.calls,
+            [
+                ("get_user_by_email", self.user.email),
+                ("create_user", self.user.email),
+                ("set_custom_user_claims", uid),
+            ],
+        )
+        self.assertEqual(self.backend.claims[uid], {"admin": True, "superuser": False})
+
+    def test_changes_in_a_transaction_are_synced_in_one_batch(self):
+        users = [
+            User.objects.create(email="claims.{}@andela.com".format(i))
+            for i in range(3)
+        ]
+        on_commit = []
+        with patch("api.authentication.async_task") as mock_async_task:
+            with patch("api.authentication.transaction.on_commit", on_commit.append):
+                for user in users + users:
+                    user.is_superuser = not user.is_superuser
+                    user.save()
+            for func in on_commit:
+                func()
+
+        mock_async_task.assert_called_once_with(
+            "api.authentication.sync_firebase_claims",
+            sorted(user.email for user in users),
+        )
@@ -7,7 +7,8 @@ from rest_framework.test import APIClient
 
 # App Imports
 from api.tests import APIBaseTestCase
-from core.models import AllocationHistory
+from core import constants
+from core.models import AllocationHistory, Asset
 
 client = APIClient()
 User = get_user_model()
@@ -45,3 +46,37 @@ class FilterValuesApiTest(APIBaseTestCase):
         self.assertEqual(cohorts, response.data.get("cohorts"))
         self.assertEqual(asset_count, response.data.get("asset_count"))
         self.assertEqual(response.status_code, 200)
+
+    @patch("core.filter_values.transaction.on_commit", lambda func: func())
+    @patch("api.authentication.auth.verify_id_token")
+    def test_filter_values_are_cached_until_an_allocation(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        response = client.get(
+            self.filter_values_urls,
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        counts = [count["id"] for count in response.data["asset_count"]]
+
+        # the second request reads the user and the cache only
+        with self.assertNumQueries(2):
+            cached = client.get(
+                self.filter_values_urls,
+                HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+            )
+        self.assertEqual(cached.data, response.data)
+
+        user = User.objects.create(
+            email="busy@andela.com", cohort=40, location=self.admin_user.location
+        )
+        for asset in Asset.objects.filter(current_status=constants.AVAILABLE)[:3]:
+            AllocationHistory.objects.create(
+                asset=asset, current_assignee=user.assetassignee
+            )
+        response = client.get(
+            self.filter_values_urls,
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        self.assertIn({"id": 3, "option": 3}, response.data["asset_count"])
+        self.assertNotIn(3, counts)
+        self.assertNotIn({"id": 40, "option": 40}, cached.data["cohorts"])
+        self.assertIn({"id": 40, "option": 40}, response.data["cohorts"])
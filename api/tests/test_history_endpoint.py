@@ -3,16 +3,23 @@ from unittest.mock import patch
 
 # Third-Party Imports
 from django.apps import apps
+from django.db import connection, transaction
+from django.db.models.signals import post_init
+from django.test import RequestFactory, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
 # App Imports
+from api.history import flush_history, record_history
 from api.tests import APIBaseTestCase
+from core.models import Country, History
 from core.models.user import User
 
 client = APIClient()
 
 
+@patch("api.history.transaction.on_commit", lambda func: func())
 class HistoryAPITest(APIBaseTestCase):
     """ Tests for the Department endpoint"""
 
@@ -115,3 +122,104 @@ class HistoryAPITest(APIBaseTestCase):
         self.assertEqual(response.data["user"], self.history1.user.id)
         self.assertEqual(response.data["body"], self.history1.body)
         self.assertEqual(response.status_code, 200)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_history_of_a_request_is_written_with_one_insert(self, mock_verify_token):
+        mock_verify_token.return_value = {"email": self.admin_user.email}
+        data = {"asset": self.asset_2.id, "current_assignee": self.asset_assignee.id}
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                self.allocations_urls,
+                data,
+                HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+            )
+
+        self.assertEqual(response.status_code, 201)
+        history_inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "core_history"')
+        ]
+        self.assertEqual(len(history_inserts), 1)
+        self.assertEqual(
+            set(
+                History.objects.filter(user=self.admin_user).values_list(
+                    "table_name", flat=True
+                )
+            ),
+            {"core_allocationhistory", "core_assetstatus"},
+        )
+
+    @patch.dict("os.environ", {"HISTORY_TABLES": "core_country"})
+    @patch("api.authentication.auth.verify_id_token")
+    def test_only_changes_to_allowed_tables_are_recorded(self, mock_verify_token):
+        mock_verify_token.return_value = {"email": self.admin_user.email}
+        count = History.objects.count()
+
+        response = client.post(
+            self.centre_url,
+            data={"name": "Epic Tower", "country": self.country.id},
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(History.objects.count(), count)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_history_of_an_item_holds_the_changed_fields(self, mock_verify_token):
+        mock_verify_token.return_value = {"email": self.admin_user.email}
+        response_post = client.post(
+            self.centre_url,
+            data={"name": "Epic Tower", "country": self.country.id},
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        centre_id = response_post.data["id"]
+        client.put(
+            reverse("andela-centres-detail", args={centre_id}),
+            data={"name": "Gorilla", "country": self.country.id},
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+
+        response = client.get(
+            self.history_url,
+            {"table_name": "core_andelacentre", "item_id": centre_id, "page_size": 1},
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
+        created = response.data["results"][0]
+        self.assertEqual(created["action"], "POST")
+        self.assertEqual(created["body"]["name"], [None, "Epic Tower"])
+
+        response = client.get(
+            response.data["next"],
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        updated = response.data["results"][0]
+        self.assertEqual(updated["action"], "PUT")
+        self.assertEqual(updated["body"], {"name": ["Epic Tower", "Gorilla"]})
+        self.assertIsNone(response.data["next"])
+
+    def test_only_recorded_models_snapshot_their_loaded_values(self):
+        self.assertTrue(post_init.has_listeners(Country))
+        self.assertFalse(post_init.has_listeners(History))
+
+
+class HistoryRollbackTest(TransactionTestCase):
+    def test_changes_rolled_back_are_not_recorded(self):
+        request = RequestFactory().post("/")
+        request.user = User.objects.create(email="rollback@andela.com", cohort=20)
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                country = Country.objects.create(name="Rwanda")
+                record_history(request, country, created=True)
+                raise ValueError("rolled back")
+        country = Country.objects.create(name="Ghana")
+        record_history(request, country, created=True)
+
+        flush_history(request)
+
+        self.assertEqual(
+            list(History.objects.values_list("item_id", flat=True)), [str(country.id)]
+        )
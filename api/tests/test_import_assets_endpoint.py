@@ -1,14 +1,20 @@
 # Standard Library
 import os
+from datetime import timedelta
 from unittest.mock import patch
 
 # Third-Party Imports
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from django_q.conf import Conf
+from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
 # App Imports
 from api.tests import APIBaseTestCase
-from core.models import Asset, AssetModelNumber
+from core.models import Asset, AssetImportJob, AssetModelNumber
 
 User = get_user_model()
 client = APIClient()
@@ -21,6 +27,7 @@ class AssetsUploadTestCase(APIBaseTestCase):
             response.data, {"detail": "Authentication credentials were not provided."}
         )
 
+    @patch.object(Conf, "SYNC", True)
     @patch("api.authentication.auth.verify_id_token")
     def test_authenticated_user_can_upload_csv_file_to_save_assets(
         self, mock_verify_id_token
@@ -37,14 +44,19 @@ class AssetsUploadTestCase(APIBaseTestCase):
                 data=data,
                 HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
             )
-        skipped_filename = f"{response.data['filename']}.csv"
         self.assertGreater(Asset.objects.count(), count)
-        self.assertEqual(200, response.status_code)
+        self.assertEqual(202, response.status_code)
 
-        filename = "{}.csv".format(self.admin_user.email.split("@")[0])
-
-        self.assertEqual(skipped_filename, filename)
+        job = AssetImportJob.objects.get(id=response.data["job"]["id"])
+        self.assertEqual(job.status, "completed")
+        self.assertEqual(job.created_by, self.admin_user)
+        self.assertEqual(job.total_rows, 3)
+        self.assertEqual(job.processed_rows, 3)
+        self.assertEqual(job.skipped_rows, 1)
+        self.assertEqual(job.filename, "sample.csv")
+        self.assertEqual(len(job.skipped_records.splitlines()), 2)
 
+    @patch.object(Conf, "SYNC", True)
     @patch("api.authentication.auth.verify_id_token")
     def test_upload_csv_file_with_minimum_required_fields(self, mock_verify_id_token):
         mock_verify_id_token.return_value = {"email": self.admin_user.email}
@@ -61,7 +73,7 @@ class AssetsUploadTestCase(APIBaseTestCase):
             )
 
         self.assertGreater(Asset.objects.count(), count)
-        self.assertEqual(200, response.status_code)
+        self.assertEqual(202, response.status_code)
 
     @patch("api.authentication.auth.verify_id_token")
     def test_authenticated_user_cannot_upload_empty_csv_file_to_save_assets(
@@ -139,6 +151,7 @@ class AssetsUploadTestCase(APIBaseTestCase):
         self.assertEqual(Asset.objects.count(), count)
         self.assertEqual(400, response.status_code)
 
+    @patch.object(Conf, "SYNC", True)
     @patch("api.authentication.auth.verify_id_token")
     def test_uploading_assets_already_in_the_database_skips_saving_them(
         self, mock_verify_id_token
@@ -156,9 +169,94 @@ class AssetsUploadTestCase(APIBaseTestCase):
                 data=data,
                 HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
             )
-        self.assertIn("fail", response.data)
         self.assertEqual(Asset.objects.count(), count + 1)
 
+        job_url = reverse("asset-imports-detail", args=[response.data["job"]["id"]])
+        response = client.get(
+            job_url, HTTP_AUTHORIZATION="Token {}".format(self.token_admin)
+        )
+        self.assertEqual(response.data["status"], "completed")
+        self.assertEqual(response.data["remaining_rows"], 0)
+        self.assertGreater(response.data["skipped_rows"], 0)
+
+        response = client.get(
+            response.data["skipped_file"],
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        self.assertEqual(response.status_code, 200)
+        skipped_rows = response.content.decode().splitlines()
+        self.assertTrue(skipped_rows[0].startswith("Row,"))
+        self.assertEqual(
+            len(skipped_rows) - 1, AssetImportJob.objects.get().skipped_rows
+        )
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_upload_returns_import_job_without_waiting_for_the_import(
+        self, mock_verify_id_token
+    ):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        count = Asset.objects.count()
+        file_location = os.path.join(os.path.dirname(__file__), "sample.csv")
+        with patch("api.views.assets.async_task") as mock_async_task:
+            with open(file_location) as csv:
+                response = client.post(
+                    self.asset_uploads_url,
+                    data={"file": csv},
+                    HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+                )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Asset.objects.count(), count)
+        self.assertEqual(response.data["job"]["status"], "pending")
+        mock_async_task.assert_called_once_with(
+            "core.assets_import_helper.run_import_job",
+            response.data["job"]["id"],
+            timeout=settings.ASSET_IMPORT_TIMEOUT,
+        )
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_import_jobs_without_progress_for_too_long_fail(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        stale = AssetImportJob.objects.create(
+            created_by=self.admin_user, status="running"
+        )
+        running = AssetImportJob.objects.create(
+            created_by=self.admin_user, status="running"
+        )
+        AssetImportJob.objects.filter(id=stale.id).update(
+            last_modified=timezone.now() - timedelta(days=1)
+        )
+
+        response = client.get(
+            reverse("asset-imports-list"),
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+
+        statuses = {job["id"]: job["status"] for job in response.data["results"]}
+        self.assertEqual(statuses[stale.id], "failed")
+        self.assertEqual(statuses[running.id], "running")
+        # reads leave the job as it is, the command fails it
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, "running")
+        call_command("fail_stale_jobs")
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, "failed")
+        self.assertEqual(stale.error, AssetImportJob.STALE_ERROR)
+        running.refresh_from_db()
+        self.assertEqual(running.status, "running")
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_user_cannot_view_import_jobs_of_other_users(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        job = AssetImportJob.objects.create(filename="sample.csv")
+
+        response = client.get(
+            reverse("asset-imports-detail", args=[job.id]),
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+
+        self.assertEqual(response.status_code, 404)
+
     @patch("api.authentication.auth.verify_id_token")
     def test_download_non_existing_file_fails(self, mock_verify_id_token):
 
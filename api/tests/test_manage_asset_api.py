@@ -5,6 +5,8 @@ from unittest.mock import patch
 # Third-Party Imports
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
 # App Imports
@@ -619,3 +621,30 @@ class ManageAssetTestCase(APIBaseTestCase):
         )
 
         self.assertFalse(response.data.get("verified"))
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_query_count_of_assets_list_does_not_depend_on_page_size(
+        self, mock_verify_id_token
+    ):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        assets = list(Asset.objects.filter(current_status="Available"))
+        AllocationHistory.objects.create(
+            asset=assets[0], current_assignee=self.user.assetassignee
+        )
+        AllocationHistory.objects.create(
+            asset=assets[1], current_assignee=self.asset_assignee_department
+        )
+        AssetLog.objects.create(
+            checked_by=self.security_user, asset=assets[2], log_type="Checkin"
+        )
+
+        def count_queries(page_size):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(
+                    "{}?page_size={}".format(self.manage_asset_urls, page_size),
+                    HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+                )
+            self.assertEqual(len(response.data["results"]), page_size)
+            return len(context.captured_queries)
+
+        self.assertEqual(count_queries(1), count_queries(Asset.objects.count()))
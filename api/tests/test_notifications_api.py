@@ -0,0 +1,100 @@
+# Standard Library
+from unittest.mock import patch
+
+# Third-Party Imports
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+# App Imports
+from api.tests import APIBaseTestCase
+from core.models import Notifications
+
+client = APIClient()
+
+
+class NotificationsAPITest(APIBaseTestCase):
+    """Tests for the notifications endpoint"""
+
+    def setUp(self):
+        self.notifications = Notifications.objects.bulk_create(
+            [
+                Notifications(
+                    title="Incident report {}".format(index),
+                    body="An incident was reported",
+                    origin=self.admin_user,
+                    target=self.user,
+                )
+                for index in range(3)
+            ]
+            + [
+                Notifications(
+                    title="Somebody else's",
+                    body="An incident was reported",
+                    target=self.admin_user,
+                )
+            ]
+        )
+        self.notifications_url = reverse("notifications-list")
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_user_sees_only_their_notifications_newest_first(self, mock_verify_token):
+        mock_verify_token.return_value = {"email": self.user.email}
+        response = client.get(
+            self.notifications_url,
+            HTTP_AUTHORIZATION="Token {}".format(self.token_user),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [notification["title"] for notification in response.data["results"]],
+            ["Incident report 2", "Incident report 1", "Incident report 0"],
+        )
+        self.assertEqual(response.data["results"][0]["origin"], self.admin_user.email)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_mark_read_updates_the_given_notifications(self, mock_verify_token):
+        mock_verify_token.return_value = {"email": self.user.email}
+        first = Notifications.objects.filter(target=self.user).first()
+        response = client.post(
+            reverse("notifications-mark-read"),
+            data={"ids": [first.id]},
+            format="json",
+            HTTP_AUTHORIZATION="Token {}".format(self.token_user),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"updated": 1})
+        first.refresh_from_db()
+        self.assertTrue(first.read)
+        self.assertIsNotNone(first.read_at)
+
+        response = client.get(
+            reverse("notifications-unread-count"),
+            HTTP_AUTHORIZATION="Token {}".format(self.token_user),
+        )
+        self.assertEqual(response.data, {"unread": 2})
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_mark_read_without_ids_updates_every_unread(self, mock_verify_token):
+        mock_verify_token.return_value = {"email": self.user.email}
+        with self.assertNumQueries(2):
+            response = client.post(
+                reverse("notifications-mark-read"),
+                format="json",
+                HTTP_AUTHORIZATION="Token {}".format(self.token_user),
+            )
+        self.assertEqual(response.data, {"updated": 3})
+        self.assertFalse(
+            Notifications.objects.filter(target=self.user, read=False).exists()
+        )
+        self.assertTrue(
+            Notifications.objects.filter(target=self.admin_user, read=False).exists()
+        )
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_notifications_cannot_be_created(self, mock_verify_token):
+        mock_verify_token.return_value = {"email": self.user.email}
+        response = client.post(
+            self.notifications_url,
+            data={"title": "x", "body": "y"},
+            HTTP_AUTHORIZATION="Token {}".format(self.token_user),
+        )
+        self.assertEqual(response.status_code, 405)
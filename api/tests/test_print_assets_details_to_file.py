@@ -1,20 +1,31 @@
 # Standard Library
+import csv
+import io
+import zipfile
+from datetime import timedelta
 from unittest.mock import patch
 
 # Third-Party Imports
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.db.models import Q
+from django.utils import timezone
+from django_q.conf import Conf
+from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
 # App Imports
 from api.tests import APIBaseTestCase
-from core.models import AllocationHistory, Asset
+from core.assets_export_helper import export_key, run_export_job
+from core.models import AllocationHistory, Asset, AssetExportJob
 
 User = get_user_model()
 client = APIClient()
 
 
+@patch.object(Conf, "SYNC", True)
 class PrintAssetsDetailsTestCase(APIBaseTestCase):
     def test_non_authenticated_user_print_assets(self):
         response = client.get(self.print_asset_url)
@@ -168,3 +179,189 @@ class PrintAssetsDetailsTestCase(APIBaseTestCase):
             HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
         )
         self.assertEqual(response.status_code, 400)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_exported_workbook_has_a_worksheet_per_asset_type(
+        self, mock_verify_id_token
+    ):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        response = client.get(
+            self.print_asset_url, HTTP_AUTHORIZATION="Token {}".format(self.token_admin)
+        )
+        self.assertEqual(response.status_code, 200)
+
+        job = AssetExportJob.objects.get(id=response.data["job"])
+        with zipfile.ZipFile(io.BytesIO(job.data)) as workbook:
+            workbook_xml = workbook.read("xl/workbook.xml").decode()
+        asset_types = Asset.objects.filter(
+            asset_location=self.admin_user.location
+        ).values_list("model_number__asset_make__asset_type__name", flat=True)
+        for asset_type in set(asset_types):
+            self.assertIn('<sheet name="{}"'.format(asset_type), workbook_xml)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_authenticated_admin_can_stream_assets_as_csv(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        response = client.get(
+            "{}?current_status=Available".format(reverse("export-assets-csv")),
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        rows = list(
+            csv.reader(b"".join(response.streaming_content).decode().splitlines())
+        )
+        self.assertEqual(rows[0][:4], ["Type", "Make", "Location", "Asset Code"])
+        available_assets = Asset.objects.filter(
+            current_status="Available", asset_location=self.admin_user.location
+        )
+        self.assertEqual(
+            sorted(row[3] for row in rows[1:]),
+            sorted(asset.asset_code or "" for asset in available_assets),
+        )
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_csv_export_with_invalid_filters_fails(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        response = client.get(
+            "{}?test=test".format(reverse("export-assets-csv")),
+            HTTP_AUTHORIZATION="Token {}".format(self.token_admin),
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_unchanged_export_reuses_the_finished_job(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        url = "{}?current_status=Available".format(self.print_asset_url)
+        response = client.get(url, HTTP_AUTHORIZATION=f"Token {self.token_admin}")
+        self.assertEqual(response.status_code, 200)
+        job_id = response.data["job"]
+
+        with patch("api.views.assets.async_task") as mock_async_task:
+            response = client.get(url, HTTP_AUTHORIZATION=f"Token {self.token_admin}")
+        mock_async_task.assert_not_called()
+        self.assertEqual(response.data["job"], job_id)
+
+        Asset.objects.create(
+            asset_code="IC00145999",
+            serial_number="SN50123999S",
+            model_number=self.assetmodel,
+            asset_location=self.centre,
+        )
+        response = client.get(url, HTTP_AUTHORIZATION=f"Token {self.token_admin}")
+        self.assertNotEqual(response.data["job"], job_id)
+        self.assertEqual(AssetExportJob.objects.count(), 2)
+
+    def test_export_key_changes_when_an_exported_name_changes(self):
+        location = self.admin_user.location
+        key = export_key({}, location)
+        self.assertEqual(export_key({}, location), key)
+
+        asset = Asset.objects.filter(asset_location=location).first()
+        make = asset.model_number.asset_make
+        make.name = "Renamed Make"
+        make.save()
+
+        self.assertNotEqual(export_key({}, location), key)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_export_is_accepted_while_its_job_runs(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        with patch("api.views.assets.async_task") as mock_async_task:
+            response = client.get(
+                self.print_asset_url, HTTP_AUTHORIZATION=f"Token {self.token_admin}"
+            )
+        self.assertEqual(response.status_code, 202)
+        mock_async_task.assert_called_once_with(
+            "core.assets_export_helper.run_export_job",
+            response.data["job"],
+            timeout=settings.ASSET_EXPORT_TIMEOUT,
+        )
+
+        response = client.get(
+            f"{self.downloads_url}?job={response.data['job']}",
+            HTTP_AUTHORIZATION=f"Token {self.token_admin}",
+        )
+        self.assertEqual(response.status_code, 202)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_download_export_by_job_id(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        response = client.get(
+            self.print_asset_url, HTTP_AUTHORIZATION=f"Token {self.token_admin}"
+        )
+        job = AssetExportJob.objects.get(id=response.data["job"])
+
+        response = client.get(
+            f"{self.downloads_url}?job={job.id}",
+            HTTP_AUTHORIZATION=f"Token {self.token_admin}",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.filename, job.filename)
+        self.assertEqual(b"".join(response.streaming_content), bytes(job.data))
+
+        AssetExportJob.objects.filter(id=job.id).update(data=b"")
+        response = client.get(
+            f"{self.downloads_url}?job={job.id}",
+            HTTP_AUTHORIZATION=f"Token {self.token_admin}",
+        )
+        self.assertEqual(response.status_code, 404)
+
+        job.location = None
+        job.save()
+        response = client.get(
+            f"{self.downloads_url}?job={job.id}",
+            HTTP_AUTHORIZATION=f"Token {self.token_admin}",
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @patch("api.authentication.auth.verify_id_token")
+    def test_stale_export_job_is_started_again(self, mock_verify_id_token):
+        mock_verify_id_token.return_value = {"email": self.admin_user.email}
+        with patch("api.views.assets.async_task"):
+            response = client.get(
+                self.print_asset_url, HTTP_AUTHORIZATION=f"Token {self.token_admin}"
+            )
+            stale = AssetExportJob.objects.get(id=response.data["job"])
+            AssetExportJob.objects.filter(id=stale.id).update(
+                last_modified=timezone.now()
+                - timedelta(seconds=settings.ASSET_EXPORT_TIMEOUT + 1)
+            )
+            response = client.get(
+                self.print_asset_url, HTTP_AUTHORIZATION=f"Token {self.token_admin}"
+            )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertNotEqual(response.data["job"], stale.id)
+        response = client.get(
+            f"{self.downloads_url}?job={stale.id}",
+            HTTP_AUTHORIZATION=f"Token {self.token_admin}",
+        )
+        self.assertEqual(response.status_code, 400)
+        # reads leave the job as it is, the command fails it
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, "pending")
+        call_command("fail_stale_jobs")
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, "failed")
+
+        # the task of the stale job delivered again leaves it failed
+        run_export_job(stale.id)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, "failed")
+        self.assertFalse(stale.data)
+
+    def test_old_export_jobs_are_cleared(self):
+        old, new = [
+            AssetExportJob.objects.create(key=key, location=self.admin_user.location)
+            for key in ["old", "new"]
+        ]
+        AssetExportJob.objects.filter(id=old.id).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+
+        call_command("clear_asset_exports")
+
+        self.assertFalse(AssetExportJob.objects.filter(id=old.id).exists())
+        self.assertTrue(AssetExportJob.objects.filter(id=new.id).exists())
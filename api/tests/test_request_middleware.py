@@ -0,0 +1,51 @@
+# Standard Library
+import threading
+
+# Third-Party Imports
+from django.test import RequestFactory
+
+# App Imports
+from api import requestMiddleware
+from api.requestMiddleware import get_current_assignee, RequestMiddleware
+from api.tests import APIBaseTestCase
+
+
+class RequestMiddlewareTestCase(APIBaseTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+
+    def test_context_is_cleared_when_the_view_raises(self):
+        def view(request):
+            self.assertIs(RequestMiddleware.get_request(), request)
+            raise RuntimeError("view failed")
+
+        with self.assertRaises(RuntimeError):
+            RequestMiddleware(view)(self.request)
+
+        self.assertIsNone(RequestMiddleware.get_request())
+        self.assertEqual(requestMiddleware.request_context.cache, {})
+
+    def test_assignee_is_read_once_per_request(self):
+        def view(request):
+            with self.assertNumQueries(1):
+                for _ in range(3):
+                    assignee = get_current_assignee()
+            return assignee
+
+        self.assertEqual(RequestMiddleware(view)(self.request), self.asset_assignee)
+
+    def test_each_thread_sees_its_own_request(self):
+        seen = []
+
+        def other_thread():
+            seen.append(RequestMiddleware.get_request())
+
+        def view(request):
+            thread = threading.Thread(target=other_thread)
+            thread.start()
+            thread.join()
+            return RequestMiddleware.get_request()
+
+        self.assertIs(RequestMiddleware(view)(self.request), self.request)
+        self.assertEqual(seen, [None])
@@ -15,6 +15,7 @@ from api.views import (
     AssetCategoryViewSet,
     AssetConditionViewSet,
     AssetHealthCountViewSet,
+    AssetImportJobViewSet,
     AssetIncidentReportViewSet,
     AssetLogViewSet,
     AssetMakeViewSet,
@@ -29,10 +30,12 @@ from api.views import (
     AvailableFilterValues,
     CountryViewset,
     DepartmentViewSet,
+    ExportAssetsCSV,
     ExportAssetsDetails,
     FileDownloads,
     HistoryViewSet,
     ManageAssetViewSet,
+    NotificationViewSet,
     OfficeBlockViewSet,
     OfficeFloorSectionViewSet,
     OfficeFloorViewSet,
@@ -78,6 +81,7 @@ router.register("asset-logs", AssetLogViewSet, "asset-logs")
 router.register("asset-categories", AssetCategoryViewSet, "asset-categories")
 router.register("asset-condition", AssetConditionViewSet, "asset-condition")
 router.register("asset-health", AssetHealthCountViewSet, "asset-health")
+router.register("asset-imports", AssetImportJobViewSet, "asset-imports")
 router.register("asset-makes", AssetMakeViewSet, "asset-makes")
 router.register("asset-models", AssetModelNumberViewSet, "asset-models")
 router.register("asset-specs", AssetSpecsViewSet, "asset-specs")
@@ -106,6 +110,9 @@ router.register("office-workspaces", OfficeWorkspaceViewSet, "office-workspaces"
 # history
 router.register("history", HistoryViewSet, "history")
 
+# notifications
+router.register("notifications", NotificationViewSet, "notifications")
+
 
 urlpatterns = [
     path("api-auth/", include("rest_framework.urls")),
@@ -118,6 +125,7 @@ urlpatterns = [
         name="api-version-index",
     ),
     path("export-assets/", ExportAssetsDetails.as_view(), name="export-assets"),
+    path("export-assets/csv/", ExportAssetsCSV.as_view(), name="export-assets-csv"),
     path("upload/", AssetsImportViewSet.as_view(), name="import-assets"),
     path("filter-values/", AvailableFilterValues.as_view(), name="available-filters"),
     path("downloads/", FileDownloads.as_view(), name="download-files"),
@@ -13,6 +13,7 @@ from .assets import (  # noqa: F401
     AssetCategoryViewSet,
     AssetConditionViewSet,
     AssetHealthCountViewSet,
+    AssetImportJobViewSet,
     AssetIncidentReportViewSet,
     AssetLogViewSet,
     AssetMakeViewSet,
@@ -24,12 +25,14 @@ from .assets import (  # noqa: F401
     AssetSubCategoryViewSet,
     AssetTypeViewSet,
     AssetViewSet,
+    ExportAssetsCSV,
     ExportAssetsDetails,
     FileDownloads,
     ManageAssetViewSet,
     StateTransitionViewset,
 )
 from .history import HistoryViewSet  # noqa: F401
+from .notifications import NotificationViewSet  # noqa: F401
 from .users import (  # noqa: F401
     AvailableFilterValues,
     SecurityUserViewSet,
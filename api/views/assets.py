@@ -1,20 +1,21 @@
 # Standard Library
 import codecs
-import functools
+import io
+import json
 import logging
-import operator
 import os
-from itertools import chain
+from collections import OrderedDict
 
 # Third-Party Imports
-import xlsxwriter
 from django.conf import settings
 from django.core.files.storage import FileSystemStorage
 from django.core.validators import ValidationError
-from django.db.models import Q
+from django.db.models import Count
 from django.db.utils import IntegrityError
-from django.http import FileResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django_q.tasks import async_task
 from rest_framework import serializers, status
+from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.filters import OrderingFilter
 from rest_framework.generics import get_object_or_404
@@ -29,12 +30,14 @@ from rest_framework.viewsets import ModelViewSet
 from api.authentication import FirebaseTokenAuthentication
 from api.filters import AllocationsHistoryFilter, AssetFilter, AssetLogFilter
 from api.permissions import IsSecurityUser
+from api.requestMiddleware import get_current_assignee
 from api.serializers import (
     AllocationsSerializer,
     AssetAssigneeSerializer,
     AssetCategorySerializer,
     AssetConditionSerializer,
     AssetHealthSerializer,
+    AssetImportJobSerializer,
     AssetIncidentReportSerializer,
     AssetLogSerializer,
     AssetMakeSerializer,
@@ -44,29 +47,34 @@ from api.serializers import (
     AssetStatusSerializer,
     AssetSubCategorySerializer,
     AssetTypeSerializer,
+    BulkAllocationSerializer,
+    BulkAssetLogSerializer,
     StateTransitionSerializer,
 )
-from core import models
-from core.assets_import_helper import DictReaderStrip, process_file, SKIPPED_ROWS
-from core.constants import (
-    ASSET_CODE,
-    ASSIGNED_TO,
-    CSV_HEADERS,
-    CSV_REQUIRED_HEADING_ASSET_CODE,
-    CSV_REQUIRED_HEADING_SERIAL_NO,
-    MAKE,
-    MODEL_NUMBER,
-    NOTES,
-    SERIAL_NUMBER,
-    STATUS,
-    VERIFIED,
-)
+from core import constants, models
+from core.asset_logs_helper import record_scans
+from core.asset_transitions import bulk_allocate
+from core.assets_export_helper import export_key, filter_assets, stream_csv
+from core.assets_import_helper import DictReaderStrip
+from core.constants import ASSET_STATUSES
 from core.models.asset import user_abstract
 from core.slack_bot import SlackIntegration
 
 slack = SlackIntegration()
 logger = logging.getLogger(__name__)
 
+ASSET_TYPE_LOOKUP = "model_number__asset_make__asset_type__name"
+MODEL_NUMBER_LOOKUP = "model_number__name"
+# optional asset health grouping dimensions: query value -> (response key, lookup)
+ASSET_HEALTH_GROUPINGS = {
+    "make": ("asset_make", "model_number__asset_make__name"),
+    "sub_category": (
+        "asset_sub_category",
+        "model_number__asset_make__asset_type__asset_sub_category__name",
+    ),
+    "department": ("department", "department__name"),
+}
+
 
 class ManageAssetViewSet(ModelViewSet):
     serializer_class = AssetSerializer
@@ -76,7 +84,7 @@ class ManageAssetViewSet(ModelViewSet):
     filterset_class = AssetFilter
 
     def get_object(self):
-        queryset = models.Asset.objects.all()
+        queryset = self.serializer_class.setup_eager_loading(models.Asset.objects.all())
         obj = get_object_or_404(queryset, uuid=self.kwargs["pk"])
         return obj
 
@@ -116,7 +124,10 @@ class ManageAssetViewSet(ModelViewSet):
         location = self.request.user.location
         department = self.request.user.department
         if location and department:
-            return self.queryset.filter(asset_location=location, department=department)
+            queryset = self.queryset.filter(
+                asset_location=location, department=department
+            )
+            return self.serializer_class.setup_eager_loading(queryset)
         return self.queryset.none()
 
 
@@ -132,8 +143,7 @@ class AssetViewSet(ModelViewSet):
         user = self.request.user
         query_filter = {}
         if not user.is_securityuser:
-            asset_assignee = models.AssetAssignee.objects.filter(user=user).first()
-            query_filter["assigned_to"] = asset_assignee
+            query_filter["assigned_to"] = get_current_assignee()
         user_id = self.request.query_params.get("user_id")
         if user_id:
             if not user.is_staff:
@@ -147,12 +157,12 @@ class AssetViewSet(ModelViewSet):
             else:
                 return self.queryset.none()
         queryset = models.Asset.objects.filter(**query_filter)
-        return queryset
+        return self.serializer_class.setup_eager_loading(queryset)
 
     def get_object(self):
-        user = self.request.user
-        asset_assignee = models.AssetAssignee.objects.filter(user=user).first()
-        queryset = models.Asset.objects.filter(assigned_to=asset_assignee)
+        queryset = self.serializer_class.setup_eager_loading(
+            models.Asset.objects.filter(assigned_to=get_current_assignee())
+        )
         obj = get_object_or_404(queryset, uuid=self.kwargs["pk"])
         return obj
 
@@ -189,7 +199,7 @@ class AssetAssigneeViewSet(ModelViewSet):
 
 class AssetLogViewSet(ModelViewSet):
     serializer_class = AssetLogSerializer
-    queryset = models.AssetLog.objects.all()
+    queryset = models.AssetLog.objects.select_related("asset", "checked_by")
     permission_classes = [IsAdminUser | IsSecurityUser]
     authentication_classes = (FirebaseTokenAuthentication,)
     filterset_class = AssetLogFilter
@@ -204,6 +214,20 @@ class AssetLogViewSet(ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(checked_by=self.request.user)
 
+    @action(detail=False, methods=["post"], serializer_class=BulkAssetLogSerializer)
+    def bulk(self, request):
+        """Check in and out a batch of scanned assets
+
+        Every scan gets its own result, invalid scans do not stop the others.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        scans = [
+            (item["code"], item["log_type"])
+            for item in serializer.validated_data["logs"]
+        ]
+        return Response(record_scans(scans, request.user))
+
 
 class AssetStatusViewSet(ModelViewSet):
     serializer_class = AssetStatusSerializer
@@ -236,6 +260,25 @@ class AllocationsViewSet(ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(assigner=self.request.user)
 
+    @action(detail=False, methods=["post"], serializer_class=BulkAllocationSerializer)
+    def bulk(self, request):
+        """Allocate and de-allocate many assets at once
+
+        Either every change is made or, when any of them is invalid, none is.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pairs = [
+            (item["asset"], item.get("current_assignee"))
+            for item in serializer.validated_data["allocations"]
+        ]
+        try:
+            allocations = bulk_allocate(pairs, assigner=request.user)
+        except ValidationError as err:
+            raise serializers.ValidationError({"allocations": err.message_dict})
+        data = AllocationsSerializer(allocations, many=True).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
 
 class AssetCategoryViewSet(ModelViewSet):
     serializer_class = AssetCategorySerializer
@@ -352,7 +395,6 @@ class AssetHealthCountViewSet(ModelViewSet):
     authentication_classes = (FirebaseTokenAuthentication,)
     http_method_names = ["get"]
     queryset = models.Asset.objects.all()
-    data = None
 
     def get_queryset(self):
         user_location = self.request.user.location
@@ -360,52 +402,50 @@ class AssetHealthCountViewSet(ModelViewSet):
             return self.queryset.filter(asset_location=user_location)
         return self.queryset.none()
 
-    def _get_assets_status_condition(self, asset_models):
-        asset_name, model_numbers = asset_models.popitem()
-
-        def generate_asset_condition(model_number):
-            statuses = {"Allocated": 0, "Available": 0, "Damaged": 0, "Lost": 0}
-
-            def increment_asset_status(asset, model_number=model_number):
-                if (
-                    asset.get("asset_type") == asset_name
-                    and asset.get("model_number") == model_number
-                ):
-                    nonlocal statuses
-                    statuses[asset["count_by_status"]] += 1
-                return statuses
-
-            list(map(increment_asset_status, self.data))
-            return {
-                "asset_type": asset_name,
-                "model_number": model_number,
-                "count_by_status": statuses,
-            }
-
-        return list(map(generate_asset_condition, model_numbers))
-
-    def _get_asset_list(self, asset):
-        asset_with_status = list(map(self._get_assets_status_condition, asset))
-        return list(chain.from_iterable(asset_with_status))
-
-    def _get_asset_type(self, asset):
-        return asset["asset_type"]
-
-    def _get_model_numbers(self, asset_type):
-        asset_model_numbers = map(
-            lambda asset: asset.get("model_number"),
-            filter(lambda asset: asset.get("asset_type") == asset_type, self.data),
-        )
-        return {asset_type: set(list(asset_model_numbers))}
+    def _get_group_by_fields(self):
+        group_by = self.request.query_params.get("group_by")
+        if not group_by:
+            return []
+        options = [option.strip() for option in group_by.split(",") if option.strip()]
+        invalid_options = set(options) - set(ASSET_HEALTH_GROUPINGS)
+        if invalid_options:
+            raise serializers.ValidationError(
+                {
+                    "group_by": f"Unsupported grouping {', '.join(sorted(invalid_options))}"
+                }
+            )
+        return [ASSET_HEALTH_GROUPINGS[option] for option in options]
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        self.data = serializer.data
-        asset_types = set(map(self._get_asset_type, self.data))
-        asset = map(self._get_model_numbers, asset_types)
-        asset_list = self._get_asset_list(asset)
-        return Response(asset_list)
+        """Count assets per (asset type, model number[, grouping], status) in SQL
+        and pivot the statuses of every group into a single entry."""
+        group_by_fields = self._get_group_by_fields()
+        group_lookups = [ASSET_TYPE_LOOKUP, MODEL_NUMBER_LOOKUP] + [
+            lookup for _, lookup in group_by_fields
+        ]
+        status_counts = (
+            self.filter_queryset(self.get_queryset())
+            .order_by(*group_lookups)
+            .values(*group_lookups, "current_status")
+            .annotate(total=Count("id"))
+        )
+        asset_list = OrderedDict()
+        for status_count in status_counts:
+            group = tuple(status_count[lookup] for lookup in group_lookups)
+            if group not in asset_list:
+                asset_health = {
+                    "asset_type": status_count[ASSET_TYPE_LOOKUP],
+                    "model_number": status_count[MODEL_NUMBER_LOOKUP],
+                }
+                for name, lookup in group_by_fields:
+                    asset_health[name] = status_count[lookup]
+                asset_health["count_by_status"] = {
+                    asset_status: 0 for asset_status, _ in ASSET_STATUSES
+                }
+                asset_list[group] = asset_health
+            count_by_status = asset_list[group]["count_by_status"]
+            count_by_status[status_count["current_status"]] = status_count["total"]
+        return Response(list(asset_list.values()))
 
 
 class AssetSpecsViewSet(ModelViewSet):
@@ -435,46 +475,59 @@ class AssetsImportViewSet(APIView):
         if not (csv_reader.fieldnames and " ".join(csv_reader.fieldnames).strip()):
             return Response({"error": "CSV file is empty"}, status=400)
         field_names_set = set(csv_reader.fieldnames)
-        if not field_names_set.issubset(CSV_HEADERS):
+        if not field_names_set.issubset(constants.CSV_HEADERS):
             return Response({"error": "CSV file contains invalid headings"}, status=400)
         if not (
-            field_names_set >= CSV_REQUIRED_HEADING_ASSET_CODE
-            or field_names_set >= CSV_REQUIRED_HEADING_SERIAL_NO
+            field_names_set >= constants.CSV_REQUIRED_HEADING_ASSET_CODE
+            or field_names_set >= constants.CSV_REQUIRED_HEADING_SERIAL_NO
         ):
             return Response({"error": "File contains missing headings"}, status=400)
-        csv_values = []
-        for line in csv_reader.reader:
-            line = [val for val in line if val and val.strip()]
-            csv_values = csv_values + line
-        csv_values = list(set(csv_values))
-        if not csv_values:
+        if csv_reader.read_rows() is None:
             return Response({"error": "CSV file only contains headings"}, status=400)
-        user = self.request.user
-        response = {}
-        error = False
-        file_obj = codecs.iterdecode(file_object, "utf-8")
-        csv_reader = DictReaderStrip(file_obj, delimiter=",")
-        print("Processing uploaded file:")
-        if not process_file(csv_reader, user=user):
-            filename = user.email.split("@")[0]
-            path = request.build_absolute_uri(reverse("download-files"))
-            print("path in main end point", path)
+        file_object.seek(0)
+        job = models.AssetImportJob.objects.create(
+            filename=file_object.name, data=file_object.read(), created_by=request.user
+        )
+        async_task(
+            "core.assets_import_helper.run_import_job",
+            job.id,
+            timeout=settings.ASSET_IMPORT_TIMEOUT,
+        )
+        serializer = AssetImportJobSerializer(job, context={"request": request})
+        return Response(
+            data={
+                "success": "Asset import started. Follow its progress from {}".format(
+                    reverse("asset-imports-detail", args=[job.id], request=request)
+                ),
+                "job": serializer.data,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
 
-            response[
-                "fail"
-            ] = "Some assets were skipped. Download the skipped assets file from"
-            response["file"] = "{}".format(path)
-            response["filename"] = f"{filename}"
 
-            error = True
+class AssetImportJobViewSet(ModelViewSet):
+    serializer_class = AssetImportJobSerializer
+    queryset = models.AssetImportJob.objects.all()
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    authentication_classes = (FirebaseTokenAuthentication,)
+    http_method_names = ["get"]
+
+    def get_queryset(self):
+        return self.queryset.filter(created_by=self.request.user)
 
-        response["success"] = "Asset import completed successfully "
-        if error:
-            response[
-                "success"
-            ] += "Assets that have not been imported have been written to a file."
-        del SKIPPED_ROWS[:]
-        return Response(data=response, status=200)
+    @action(detail=True, methods=["get"])
+    def skipped(self, request, pk=None):
+        job = self.get_object()
+        if not job.skipped_rows:
+            return Response(
+                {"error": "This import has no skipped assets"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        response = HttpResponse(job.skipped_records, content_type="text/csv")
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{job.skipped_file_name}"'
+        return response
 
 
 class FileDownloads(APIView):
@@ -484,6 +537,8 @@ class FileDownloads(APIView):
         query_dict = request.query_params.dict()
         filename = ""
 
+        if query_dict.get("job"):
+            return self.get_export(request, query_dict.get("job"))
         try:
             filename = query_dict.get("filename")
             if filename:
@@ -498,85 +553,117 @@ class FileDownloads(APIView):
             response["Content-Disposition"] = f'attachment; filename="{filename}"'
             return response
 
+    def get_export(self, request, job_id):
+        """Serve the workbook of an export job of the user's location"""
+        job = get_object_or_404(
+            models.AssetExportJob, id=job_id, location=request.user.location
+        )
+        if job.is_stale:
+            return Response({"error": f"Export failed: {job.STALE_ERROR}"}, status=400)
+        if job.status == constants.JOB_FAILED:
+            return Response({"error": f"Export failed: {job.error}"}, status=400)
+        if job.status != constants.JOB_COMPLETED:
+            return Response(
+                {"response": f"Export is {job.status}, try again shortly"},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        if not job.data:
+            return Response(
+                {"error": f"No such file or directory as {job.filename}"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        response = FileResponse(
+            io.BytesIO(job.data),
+            content_type=(
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            ),
+            filename=job.filename,
+        )
+        response["Content-Disposition"] = f'attachment; filename="{job.filename}"'
+        return response
+
 
 class ExportAssetsDetails(APIView):
-    serializer_class = AssetSerializer
     queryset = models.Asset.objects.all()
     permission_classes = [IsAuthenticated, IsAdminUser]
     authentication_classes = (FirebaseTokenAuthentication,)
 
-    def get(self, request):
-        filters = Q(**{})
-        for key, val in dict(request.query_params).items():
-            lookup = functools.reduce(
-                operator.or_,
-                {Q(**{"__".join([key, "icontains"]): item}) for item in val},
-            )
-            filters |= lookup
+    def get_assets(self, request):
         try:
-            assets = self.queryset.filter(
-                filters, asset_location__name=request.user.location.name
-            )
+            return filter_assets(dict(request.query_params), request.user.location)
         except Exception as e:
             logger.warning(str(e))
+            return None
+
+    def get(self, request):
+        assets = self.get_assets(request)
+        if assets is None:
             return Response({"error": "Unsupported filters included."}, status=400)
-        serializer = self.serializer_class(assets, many=True)
-        asset_count = len(serializer.data)
-        if asset_count == 0:
+        if not assets.exists():
             return Response({"error": "You have no assets"}, status=400)
 
-        email = request.user.email
-        filename = "files/{}_exported_assets.xlsx".format(email.split("@")[0])
-        self.create_sheet(serializer.data, filename=filename)
-        path = request.build_absolute_uri(reverse("download-files"))
+        filters = dict(request.query_params)
+        location = request.user.location
+        key = export_key(filters, location)
+        job = (
+            models.AssetExportJob.objects.filter(key=key)
+            .exclude(status=constants.JOB_FAILED)
+            .exclude(
+                status__in=constants.UNFINISHED_JOB_STATUSES,
+                last_modified__lt=models.AssetExportJob.stale_cutoff(),
+            )
+            .defer("data")
+            .first()
+        )
+        if not job:
+            job = models.AssetExportJob.objects.create(
+                key=key,
+                location=location,
+                filters=json.dumps(filters),
+                created_by=request.user,
+            )
+            async_task(
+                "core.assets_export_helper.run_export_job",
+                job.id,
+                timeout=settings.ASSET_EXPORT_TIMEOUT,
+            )
+            job.refresh_from_db()
+
+        path = "{}?job={}".format(
+            request.build_absolute_uri(reverse("download-files")), job.id
+        )
+        if job.status == constants.JOB_COMPLETED:
+            return Response(
+                {
+                    "success": f"{job.asset_count} assets exported to {path} successfully",
+                    "file": path,
+                    "job": job.id,
+                },
+                status=200,
+            )
         return Response(
             {
-                "success": f"{asset_count} assets exported to {path} successfully",
+                "success": f"Asset export started, download it from {path} once it is ready",
                 "file": path,
+                "job": job.id,
             },
-            status=200,
+            status=status.HTTP_202_ACCEPTED,
         )
 
-    def create_sheet(self, assets_list, filename=None):
-        asset_types = []
-        filename = filename or "exported_assets.xlsx"
-        for asset in assets_list:
-            if asset.get("asset_type") not in asset_types:
-                asset_types.append(asset.get("asset_type"))
-
-        workbook = xlsxwriter.Workbook(filename)
-        bold = workbook.add_format({"bold": True, "bg_color": "silver"})
-        for asset_type in asset_types:
-            worksheet = workbook.add_worksheet(asset_type)
-            worksheet.write("A1", MAKE, bold)
-            worksheet.write("B1", "Location", bold)
-            worksheet.write("C1", ASSET_CODE, bold)
-            worksheet.write("D1", SERIAL_NUMBER, bold)
-            worksheet.write("E1", MODEL_NUMBER, bold)
-            worksheet.write("F1", ASSIGNED_TO, bold)
-            worksheet.write("G1", STATUS, bold)
-            worksheet.write("H1", VERIFIED, bold)
-            worksheet.write("I1", NOTES, bold)
-            grouped_assets = []
-            for asset in assets_list:
-                if asset.get("asset_type") == asset_type:
-                    grouped_assets.append(asset)
-            row = 1
-            column = 0
-            for asset in grouped_assets:
-                worksheet.write(row, column, asset.get("asset_make", ""))
-                worksheet.write(row, column + 1, asset.get("asset_location", ""))
-                worksheet.write(row, column + 2, asset.get("asset_code"))
-                worksheet.write(row, column + 3, asset.get("serial_number", ""))
-                worksheet.write(row, column + 4, asset.get("model_number", ""))
-                assigned = asset.get("assigned_to") or {}
-                assignee = assigned.get("email", "")
-                worksheet.write(row, column + 5, assignee)
-                worksheet.write(row, column + 6, asset.get("current_status", ""))
-                worksheet.write_boolean(row, column + 7, asset.get("verified", ""))
-                worksheet.write(row, column + 8, asset.get("notes", ""))
-                row += 1
-        workbook.close()
+
+class ExportAssetsCSV(ExportAssetsDetails):
+    """Streams the filtered assets as a csv file without storing it"""
+
+    def get(self, request):
+        assets = self.get_assets(request)
+        if assets is None:
+            return Response({"error": "Unsupported filters included."}, status=400)
+        if not assets.exists():
+            return Response({"error": "You have no assets"}, status=400)
+
+        response = StreamingHttpResponse(stream_csv(assets), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="exported_assets.csv"'
+        return response
 
 
 class StateTransitionViewset(ModelViewSet):
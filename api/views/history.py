@@ -4,6 +4,8 @@ from rest_framework.viewsets import ModelViewSet
 
 # App Imports
 from api.authentication import FirebaseTokenAuthentication
+from api.filters import HistoryFilter
+from api.pagination import HistoryCursorPagination
 from api.serializers import HistorySerializer
 from core import models
 
@@ -13,4 +15,6 @@ class HistoryViewSet(ModelViewSet):
     queryset = models.History.objects.all()
     permission_classes = [IsAuthenticated, IsAdminUser]
     authentication_classes = [FirebaseTokenAuthentication]
+    filterset_class = HistoryFilter
+    pagination_class = HistoryCursorPagination
     http_method_names = ["get"]
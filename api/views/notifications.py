@@ -0,0 +1,53 @@
+# Third-Party Imports
+from django.utils import timezone
+from django_filters import rest_framework as filters
+from rest_framework import mixins
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+# App Imports
+from api.authentication import FirebaseTokenAuthentication
+from api.pagination import NotificationCursorPagination
+from api.serializers import MarkNotificationsReadSerializer, NotificationSerializer
+from core import models
+
+
+class NotificationViewSet(
+    mixins.ListModelMixin, mixins.RetrieveModelMixin, GenericViewSet
+):
+    """The notifications received by the user making the request"""
+
+    serializer_class = NotificationSerializer
+    queryset = models.Notifications.objects.select_related("origin")
+    permission_classes = [IsAuthenticated]
+    authentication_classes = (FirebaseTokenAuthentication,)
+    filter_backends = (filters.DjangoFilterBackend,)
+    filterset_fields = ("read",)
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        return self.queryset.filter(target=self.request.user)
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        unread = models.Notifications.objects.filter(target=request.user, read=False)
+        return Response({"unread": unread.count()})
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="mark-read",
+        serializer_class=MarkNotificationsReadSerializer,
+    )
+    def mark_read(self, request):
+        """Mark notifications as read with one update"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        unread = models.Notifications.objects.filter(target=request.user, read=False)
+        ids = serializer.validated_data.get("ids")
+        if ids is not None:
+            unread = unread.filter(id__in=ids)
+        updated = unread.update(read=True, read_at=timezone.now().date())
+        return Response({"updated": updated})
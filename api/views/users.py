@@ -14,6 +14,7 @@ from rest_framework.viewsets import ModelViewSet
 from api.authentication import FirebaseTokenAuthentication
 from api.filters import UserFilter
 from core import models
+from core.filter_values import get_filter_values
 
 from api.serializers import (  # isort:skip
     UserFeedbackSerializer,
@@ -99,23 +100,9 @@ class AvailableFilterValues(APIView):
     authentication_classes = [FirebaseTokenAuthentication]
 
     def get(self, request):
-        cohorts = set()
-        asset_count = set()
-        location = self.request.user.location
-        for user in models.User.objects.filter(location=location):
-            cohorts.add(user.cohort)
-            try:
-                assignee_asset_count = user.assetassignee.asset_set.count()
-            except Exception as e:
-                logger.warning("Error: {}. User: {}".format(str(e), user.id))
-            else:
-                asset_count.add(assignee_asset_count)
-        cohort_res = [
-            {"id": cohort, "option": cohort} for cohort in cohorts if cohort is not None
-        ]
-        asset_num = [
-            {"id": count, "option": count} for count in asset_count if count is not None
-        ]
+        values = get_filter_values(self.request.user.location_id)
+        cohort_res = [{"id": cohort, "option": cohort} for cohort in values["cohorts"]]
+        asset_num = [{"id": count, "option": count} for count in values["asset_count"]]
         return Response(
             data={"cohorts": cohort_res, "asset_count": asset_num}, status=200
         )
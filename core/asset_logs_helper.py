@@ -0,0 +1,61 @@
+# Third-Party Imports
+from django.db import transaction
+from django.db.models import Q
+
+# App Imports
+from core.models.asset import Asset, AssetLog, point_to_last_logs
+from core.signals import bulk_saved
+
+
+def find_scanned_assets(codes):
+    """Return the assets matching asset codes or serial numbers by code
+
+    The assets are read with one query. An asset code wins over a serial
+    number that happens to be the same.
+    :params: codes -> iterable of upper case asset codes and serial numbers
+    """
+    assets = Asset.objects.filter(Q(asset_code__in=codes) | Q(serial_number__in=codes))
+    found = {}
+    for asset in assets:
+        found.setdefault(asset.serial_number, asset)
+    for asset in assets:
+        found[asset.asset_code] = asset
+    return found
+
+
+def record_scans(scans, checked_by):
+    """Check in and out the assets of a batch of scans
+
+    Scans are applied in order, so an asset can be checked out and back in
+    within a batch. The valid logs are written with one insert and the last
+    log of their assets with one update, then bulk_saved is sent for both.
+    :params: scans -> list of (code, log_type) pairs, code being the asset
+    code or serial number of the scanned asset
+    :params: checked_by -> User who scanned the assets
+    :returns: list of the result of every scan, in the order of the scans
+    """
+    assets = find_scanned_assets({code.upper() for code, _ in scans})
+    last_log_types = {asset.id: asset.last_log_type for asset in assets.values()}
+    logs = []
+    results = []
+    for code, log_type in scans:
+        result = {"code": code, "log_type": log_type, "created": False}
+        asset = assets.get(code.upper())
+        if not asset:
+            result["error"] = "No asset has this asset code or serial number"
+        elif last_log_types[asset.id] == log_type:
+            result["error"] = f"The asset log type is already {log_type}"
+        else:
+            last_log_types[asset.id] = log_type
+            logs.append(AssetLog(asset=asset, checked_by=checked_by, log_type=log_type))
+            result["created"] = True
+        if asset:
+            result["asset"] = f"{asset.serial_number} - {asset.asset_code}"
+        results.append(result)
+    with transaction.atomic():
+        AssetLog.objects.bulk_create(logs)
+        point_to_last_logs(logs)
+        bulk_saved.send(AssetLog, instances=logs, created=True)
+        logged_assets = {log.asset_id: log.asset for log in logs}
+        bulk_saved.send(Asset, instances=list(logged_assets.values()), created=False)
+    return results
@@ -0,0 +1,234 @@
+# Standard Library
+from collections import Counter, OrderedDict
+
+# Third-Party Imports
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+# App Imports
+from core import constants
+from core.filter_values import forget_filter_values
+from core.managers import bulk_update
+from core.models import AllocationHistory, Asset, AssetAssignee, AssetStatus
+from core.models.asset import stock_monitor
+from core.models.slack import SlackMessage
+from core.signals import bulk_saved
+from core.slack_outbox import queue_message, queue_messages
+
+ALLOCATION_FOREIGN_KEYS = ["asset", "current_assignee", "previous_assignee", "assigner"]
+
+
+def assets_for_update():
+    """Assets read with their rows locked until the transaction ends, so
+    transitions of the same asset run one at a time
+
+    The assignee and the asset type are read along, for the notifications.
+    """
+    return Asset.objects.select_for_update(of=("self",)).select_related(
+        "assigned_to__user", "model_number__asset_make__asset_type"
+    )
+
+
+def lock_asset(asset_id):
+    """Read the current state of an asset, locking its row"""
+    return assets_for_update().get(id=asset_id)
+
+
+def change_status(asset_status, *args, **kwargs):
+    """Save an AssetStatus and move its asset to the status
+
+    previous_status is read from the asset's current_status column and the
+    asset is updated with one targeted UPDATE. Making an asset available
+    also de-allocates it.
+    :params: asset_status -> unsaved AssetStatus
+    """
+    with transaction.atomic():
+        assets = _take_asset(asset_status)
+        asset = assets[0]
+        asset_status.previous_status = asset.current_status or None
+        asset_status.full_clean(exclude=["asset"])
+        super(AssetStatus, asset_status).save(*args, **kwargs)
+        if asset_status.current_status == constants.AVAILABLE and asset.assigned_to:
+            _deallocate(assets)
+        else:
+            _move_asset(assets, current_status=asset_status.current_status)
+
+
+def allocate(allocation, *args, **kwargs):
+    """Save an AllocationHistory and hand its asset to the current assignee
+
+    previous_assignee is read from the asset's assigned_to column. An
+    allocation to somebody also appends an Allocated AssetStatus.
+    :params: allocation -> unsaved AllocationHistory
+    """
+    with transaction.atomic():
+        assets = _take_asset(allocation)
+        asset = assets[0]
+        allocation.previous_assignee = asset.assigned_to
+        allocation.full_clean(exclude=ALLOCATION_FOREIGN_KEYS)
+        super(AllocationHistory, allocation).save(*args, **kwargs)
+        if not allocation.current_assignee_id:
+            _move_asset(assets, assigned_to=None)
+        else:
+            asset_status = AssetStatus(
+                asset=asset,
+                current_status=constants.ALLOCATED,
+                previous_status=asset.current_status or None,
+            )
+            super(AssetStatus, asset_status).save()
+            _move_asset(
+                assets,
+                current_status=constants.ALLOCATED,
+                assigned_to=allocation.current_assignee,
+            )
+        _notify(allocation)
+
+
+def bulk_allocate(allocations, assigner=None):
+    """Allocate and de-allocate many assets in one transaction
+
+    The pairs are validated against two set-based reads, the history and
+    status rows are bulk inserted and the assets are written with one
+    UPDATE per batch, then bulk_saved is sent for each model written.
+    Every recipient gets a single notification listing all their changes.
+    :params: allocations -> list of (asset id, assignee id) pairs, an
+    assignee id of None de-allocates the asset
+    :params: assigner -> User making the changes
+    :returns: list of the AllocationHistory created
+    :raises: ValidationError with the errors of the invalid pairs by position
+    """
+    with transaction.atomic():
+        assets = assets_for_update().in_bulk([asset_id for asset_id, _ in allocations])
+        assignees = AssetAssignee.objects.select_related("user").in_bulk(
+            {assignee_id for _, assignee_id in allocations if assignee_id}
+        )
+        errors = _check_allocations(allocations, assets, assignees)
+        if errors:
+            raise ValidationError(errors)
+        history = []
+        statuses = []
+        now = timezone.now()
+        forget_filter_values(
+            [assets[asset_id].assigned_to_id for asset_id, _ in allocations]
+            + [assignee_id for _, assignee_id in allocations]
+        )
+        for asset_id, assignee_id in allocations:
+            asset = assets[asset_id]
+            assignee = assignees.get(assignee_id)
+            status = constants.ALLOCATED if assignee else constants.AVAILABLE
+            history.append(
+                AllocationHistory(
+                    asset=asset,
+                    current_assignee=assignee,
+                    previous_assignee=asset.assigned_to,
+                    assigner=assigner,
+                )
+            )
+            statuses.append(
+                AssetStatus(
+                    asset=asset,
+                    current_status=status,
+                    previous_status=asset.current_status or None,
+                )
+            )
+            asset.current_status = status
+            asset.assigned_to = assignee
+            asset.last_modified = now
+            asset.forget_set_transition_fields()
+        AllocationHistory.objects.bulk_create(history)
+        AssetStatus.objects.bulk_create(statuses)
+        bulk_update(
+            list(assets.values()), ["current_status", "assigned_to", "last_modified"]
+        )
+        bulk_saved.send(AllocationHistory, instances=history, created=True)
+        bulk_saved.send(AssetStatus, instances=statuses, created=True)
+        bulk_saved.send(Asset, instances=list(assets.values()), created=False)
+        for asset in assets.values():
+            if asset.model_number_id:
+                stock_monitor.add(asset.model_number_id)
+        _notify_recipients(history)
+    return history
+
+
+def _check_allocations(allocations, assets, assignees):
+    """Return the errors of (asset id, assignee id) pairs by position"""
+    counts = Counter(asset_id for asset_id, _ in allocations)
+    errors = {}
+    for index, (asset_id, assignee_id) in enumerate(allocations):
+        asset = assets.get(asset_id)
+        if counts[asset_id] > 1:
+            error = "The asset can only be changed once per request"
+        elif not asset:
+            error = "The asset does not exist"
+        elif assignee_id and assignee_id not in assignees:
+            error = "The assignee does not exist"
+        elif assignee_id and asset.current_status != constants.AVAILABLE:
+            error = "You can only allocate available assets"
+        elif not assignee_id and not asset.assigned_to_id:
+            error = "You can only de-allocate allocated assets"
+        else:
+            continue
+        errors[index] = [error]
+    return errors
+
+
+def _notify_recipients(history):
+    """Queue one message per recipient joining the notifications of their
+    allocations"""
+    recipients = OrderedDict()
+    for allocation in history:
+        notification = allocation.get_notification()
+        if notification:
+            message, user = notification
+            recipients.setdefault(user, []).append(message)
+    queue_messages(
+        [
+            SlackMessage(text="\n".join(messages), user=user)
+            for user, messages in recipients.items()
+        ]
+    )
+
+
+def _take_asset(record):
+    """Swap the asset of a history record for its locked row
+
+    :returns: list of the locked row and the copy of the asset the caller
+    holds, if any, which are kept in sync with the transition
+    """
+    assets = [lock_asset(record.asset_id)]
+    if record._meta.get_field("asset").is_cached(record):
+        assets.append(record.asset)
+    record.asset = assets[0]
+    return assets
+
+
+def _move_asset(assets, **fields):
+    """Write the current-state columns of an asset with one UPDATE"""
+    asset = assets[0]
+    if "assigned_to" in fields:
+        assignee = fields["assigned_to"]
+        forget_filter_values([asset.assigned_to_id, assignee and assignee.id])
+    fields["last_modified"] = timezone.now()
+    Asset.objects.filter(id=asset.id).update(**fields)
+    for instance in assets:
+        for name, value in fields.items():
+            setattr(instance, name, value)
+        instance.forget_set_transition_fields(fields)
+    if asset.model_number_id and "current_status" in fields:
+        stock_monitor.add(asset.model_number_id)
+
+
+def _deallocate(assets):
+    allocation = AllocationHistory(
+        asset=assets[0], previous_assignee=assets[0].assigned_to, current_assignee=None
+    )
+    super(AllocationHistory, allocation).save()
+    _move_asset(assets, current_status=constants.AVAILABLE, assigned_to=None)
+    _notify(allocation)
+
+
+def _notify(allocation):
+    notification = allocation.get_notification()
+    if notification:
+        queue_message(*notification)
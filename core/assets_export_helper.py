@@ -0,0 +1,199 @@
+# Standard Library
+import csv
+import functools
+import hashlib
+import json
+import operator
+import os
+import tempfile
+from datetime import timedelta
+
+# Third-Party Imports
+import xlsxwriter
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+# App Imports
+from core import constants
+from core.models.asset import Asset
+from core.models.job import AssetExportJob
+
+ASSET_TYPE_LOOKUP = "model_number__asset_make__asset_type__name"
+
+# (heading, lookup) of the exported columns in the order they are written
+EXPORT_COLUMNS = (
+    (constants.MAKE, "model_number__asset_make__name"),
+    ("Location", "asset_location__name"),
+    (constants.ASSET_CODE, "asset_code"),
+    (constants.SERIAL_NUMBER, "serial_number"),
+    (constants.MODEL_NUMBER, "model_number__name"),
+    (constants.ASSIGNED_TO, "assigned_to__user__email"),
+    (constants.STATUS, "current_status"),
+    (constants.VERIFIED, "verified"),
+    (constants.NOTES, "notes"),
+)
+# last change of the rows the exported columns are read from
+EXPORT_WATERMARKS = {
+    "asset": Max("last_modified"),
+    "model_number": Max("model_number__last_modified"),
+    "asset_make": Max("model_number__asset_make__last_modified_at"),
+    "asset_type": Max("model_number__asset_make__asset_type__last_modified"),
+    "assignee": Max("assigned_to__user__last_modified"),
+}
+VERIFIED_COLUMN = [heading for heading, _ in EXPORT_COLUMNS].index(constants.VERIFIED)
+EXPORT_RETENTION = int(os.getenv("ASSET_EXPORT_RETENTION") or 86400)
+
+
+def filter_assets(filters, location):
+    """Return the assets of a location matching the export filters
+
+    Every value of a filter is matched with icontains and the filters are
+    OR-ed together.
+    :params: filters -> dict of field lookup -> list of values
+    :params: location -> AndelaCentre object
+    """
+    lookups = Q(**{})
+    for key, values in filters.items():
+        lookups |= functools.reduce(
+            operator.or_,
+            {Q(**{"__".join([key, "icontains"]): value}) for value in values},
+        )
+    return Asset.objects.filter(lookups, asset_location__name=location.name)
+
+
+def export_key(filters, location):
+    """Hash the location, filters and last change of the assets of an export
+
+    Any save to an asset of the location moves its last_modified watermark and
+    a deletion changes the count. The exported columns read from the model
+    numbers, makes, asset types, assignees and the location have their own
+    watermarks, so renaming any of them changes the key too.
+    """
+    watermark = Asset.objects.filter(asset_location=location).aggregate(
+        **EXPORT_WATERMARKS, count=Count("id")
+    )
+    content = json.dumps(
+        {
+            "location": location.id,
+            "location_modified": str(location.last_modified),
+            "filters": {key: sorted(values) for key, values in filters.items()},
+            "watermark": {key: str(value) for key, value in watermark.items()},
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def run_export_job(job_id):
+    """Write the workbook of an AssetExportJob
+
+    Runs on the django_q cluster. The workbook is built in a temporary file
+    and saved to the job with its completed status, so downloads never see a
+    partly written workbook.
+    :params: job_id -> int
+    """
+    job = AssetExportJob.objects.select_related("location").get(id=job_id)
+    if job.status in [constants.JOB_COMPLETED, constants.JOB_FAILED]:
+        # delivered again after it finished or was failed as stale
+        return
+    job.status = constants.JOB_RUNNING
+    job.save()
+    try:
+        assets = filter_assets(json.loads(job.filters), job.location)
+        with tempfile.NamedTemporaryFile(suffix=".xlsx") as workbook:
+            job.asset_count = write_workbook(assets, workbook.name)
+            job.data = workbook.read()
+    except Exception as e:
+        job.status = constants.JOB_FAILED
+        job.error = str(e)
+        job.save()
+        raise
+    job.status = constants.JOB_COMPLETED
+    job.save()
+
+
+def fail_stale_export_jobs():
+    """Fail the unfinished export jobs older than ASSET_EXPORT_TIMEOUT, as
+    the worker stops their task by then
+
+    Run by the fail_stale_jobs command, reads only report the jobs as failed.
+    :returns: int, the number of jobs failed
+    """
+    return AssetExportJob.objects.filter(
+        status__in=constants.UNFINISHED_JOB_STATUSES,
+        last_modified__lt=AssetExportJob.stale_cutoff(),
+    ).update(
+        status=constants.JOB_FAILED,
+        error=AssetExportJob.STALE_ERROR,
+        last_modified=timezone.now(),
+    )
+
+
+def clear_old_exports():
+    """Delete the export jobs, with their workbooks, older than
+    ASSET_EXPORT_RETENTION seconds
+
+    :returns: int, the number of jobs deleted
+    """
+    cutoff = timezone.now() - timedelta(seconds=EXPORT_RETENTION)
+    deleted, _ = AssetExportJob.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def export_rows(assets):
+    """Stream (asset type, column values) of the assets from the database
+
+    :params: assets -> Asset queryset
+    """
+    lookups = [ASSET_TYPE_LOOKUP] + [lookup for _, lookup in EXPORT_COLUMNS]
+    for values in assets.values_list(*lookups).iterator():
+        yield values[0], values[1:]
+
+
+def write_workbook(assets, filename):
+    """Write the assets to an xlsx workbook with a worksheet per asset type
+
+    The assets are read once and every row is flushed to disk as soon as it
+    is written, so memory use does not depend on the number of assets.
+    :params: assets -> Asset queryset
+    :params: filename -> path of the workbook
+    :returns: number of assets written
+    """
+    workbook = xlsxwriter.Workbook(filename, {"constant_memory": True})
+    bold = workbook.add_format({"bold": True, "bg_color": "silver"})
+    # asset type -> [worksheet, next row]
+    worksheets = {}
+    count = 0
+    for asset_type, values in export_rows(assets):
+        if asset_type not in worksheets:
+            worksheet = workbook.add_worksheet(asset_type)
+            worksheet.write_row(0, 0, [heading for heading, _ in EXPORT_COLUMNS], bold)
+            worksheets[asset_type] = [worksheet, 1]
+        worksheet, row = worksheets[asset_type]
+        for column, value in enumerate(values):
+            if column == VERIFIED_COLUMN:
+                worksheet.write_boolean(row, column, value)
+            else:
+                worksheet.write(row, column, value or "")
+        worksheets[asset_type][1] += 1
+        count += 1
+    workbook.close()
+    return count
+
+
+class Echo(object):
+    """File-like object that hands back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(assets):
+    """Yield the assets as csv lines, headed by the column headings
+
+    :params: assets -> Asset queryset
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow([constants.TYPE] + [heading for heading, _ in EXPORT_COLUMNS])
+    for asset_type, values in export_rows(assets):
+        yield writer.writerow([asset_type] + list(values))
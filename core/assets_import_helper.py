@@ -1,23 +1,34 @@
 # Standard Library
+import codecs
 import csv
-import functools
+import io
+import itertools
 import logging
-import operator
 import os
-from collections import defaultdict
 
 # Third-Party Imports
 from django.apps import apps
 from django.conf import settings
-from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Lower
+from django.utils import timezone
 
 # App Imports
 from core.constants import (
+    ALLOCATED,
     ASSET_CODE,
     ASSET_MEMORY,
     ASSET_PROCESSOR_TYPE,
+    ASSET_STATUSES,
     ASSIGNED_TO,
+    AVAILABLE,
     CATEGORY,
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_PENDING,
+    JOB_RUNNING,
     MAKE,
     MODEL_NUMBER,
     NOTES,
@@ -29,212 +40,137 @@ from core.constants import (
     VERIFIED,
     YOM,
 )
-from core.models.asset import Asset
+from core.filter_values import forget_filter_values
+from core.models.asset import (
+    AllocationHistory,
+    Asset,
+    AssetAssignee,
+    AssetCondition,
+    AssetSpecs,
+    AssetStatus,
+    check_stock_levels,
+)
+from core.models.job import AssetImportJob
+from core.models.slack import SlackMessage
+from core.signals import bulk_saved
+from core.slack_outbox import queue_messages
+
+# number of csv rows written to the database in a single transaction
+IMPORT_CHUNK_SIZE = 500
+
+# (model, csv heading, parent field) from the top of the asset taxonomy down
+TAXONOMY = (
+    ("AssetCategory", CATEGORY, None),
+    ("AssetSubCategory", SUB_CATEGORY, "asset_category"),
+    ("AssetType", TYPE, "asset_sub_category"),
+    ("AssetMake", MAKE, "asset_type"),
+    ("AssetModelNumber", MODEL_NUMBER, "asset_make"),
+)
 
-SKIPPED_ROWS = []
+ASSET_RELATED_FIELDS = [
+    field.name for field in Asset._meta.get_fields() if field.is_relation
+]
 
 logger = logging.getLogger(__name__)
 
 
-def process_file(data, progress=None, user=None):
-    global SKIPPED_ROWS
-    SKIPPED_ROWS = []
+def process_file(data, progress=None, user=None, filename=None, context=None, start=0):
     location = None
-    skipped_file_name = None
-    file_data = defaultdict(list)
+    skipped_file_name = filename
     if user:
         email = user.email
         location = user.location
-        skipped_file_name = email.split("@")[0]
-
-    for row_id, row in enumerate(data):
-        row_data = {"row": row, "row_count": row_id}
-        try:
-            progress.update()
-        except Exception:
-            pass
-        process_model_number(row_data)
-        model_number = read_csv_row_value(MODEL_NUMBER, row)
-        row_data[ASSET_CODE] = read_csv_row_value(ASSET_CODE, row)
-        row_data[SERIAL_NUMBER] = read_csv_row_value(SERIAL_NUMBER, row)
-        row_data[SERIAL_NUMBER] = read_csv_row_value(SERIAL_NUMBER, row)
-        row_data[VERIFIED] = read_csv_row_value(VERIFIED, row)
-        row_data[ASSIGNED_TO] = read_csv_row_value(ASSIGNED_TO, row)
-        row_data[STATUS] = read_csv_row_value(STATUS, row)
-        row_data[NOTES] = read_csv_row_value(NOTES, row)
-        row_data[ASSET_MEMORY] = read_csv_row_value(ASSET_MEMORY, row)
-        row_data[STORAGE] = read_csv_row_value(STORAGE, row)
-        row_data[ASSET_PROCESSOR_TYPE] = read_csv_row_value(ASSET_PROCESSOR_TYPE, row)
-        row_data[YOM] = read_csv_row_value(YOM, row)
-        file_data[model_number].append(row_data)
-    process_asset_data(file_data, location=location)
-    write_skipped_records(SKIPPED_ROWS, filename=skipped_file_name)
-    if len(SKIPPED_ROWS) > 0:
+        skipped_file_name = filename or email.split("@")[0]
+
+    context = context or ImportContext(filename=skipped_file_name)
+    importer = AssetImporter(context, location=location, assigner=user)
+    with context:
+        rows = []
+        for row_id, row in enumerate(data, start):
+            rows.append((row_id, row))
+            if len(rows) == IMPORT_CHUNK_SIZE:
+                import_chunk(importer, rows, progress)
+                rows = []
+        if rows:
+            import_chunk(importer, rows, progress)
+    importer.check_asset_limits()
+    if context.skipped_rows > 0:
         return False
     else:
         return True
 
 
-def process_model_number(row_data):
-    logger.info("Checking model numbers.")
-    row = row_data.get("row")
-
-    category_value = read_csv_row_value(CATEGORY, row)
-    category = create_object("AssetCategory", name=category_value, **row_data)
-
-    subcategory_value = read_csv_row_value(SUB_CATEGORY, row)
-    subcategory = create_object(
-        "AssetSubCategory",
-        parent={"asset_category": category},
-        name=subcategory_value,
-        **row_data,
-    )
-
-    type_value = read_csv_row_value(TYPE, row)
-    asset_type = create_object(
-        "AssetType",
-        parent={"asset_sub_category": subcategory},
-        name=type_value,
-        **row_data,
-    )
-
-    make_value = read_csv_row_value(MAKE, row)
-    asset_make = create_object(
-        "AssetMake", parent={"asset_type": asset_type}, name=make_value, **row_data
-    )
-    model_number_value = read_csv_row_value(MODEL_NUMBER, row)
-    create_object(
-        "AssetModelNumber",
-        parent={"asset_make": asset_make},
-        name=model_number_value,
-        **row_data,
+def import_chunk(importer, rows, progress=None):
+    # the rows and the progress recorded by the flush commit together, so an
+    # import job run again resumes after the last chunk it wrote
+    with transaction.atomic():
+        importer.import_rows(rows)
+        importer.context.flush(len(rows))
+    try:
+        progress.update(len(rows))
+    except Exception:
+        pass
+
+
+def run_import_job(job_id):
+    """Import the csv file of an AssetImportJob, recording its progress on the job
+
+    Runs on the django_q cluster. A job delivered again after its worker was
+    stopped resumes from the rows it has not processed yet.
+    :params: job_id -> int
+    """
+    job = AssetImportJob.objects.select_related("created_by").get(id=job_id)
+    if job.status in (JOB_COMPLETED, JOB_FAILED):
+        return
+    job.status = JOB_RUNNING
+    context = ImportJobContext(job)
+    try:
+        csv_file = io.BytesIO(bytes(job.data))
+        job.total_rows = sum(1 for _ in _read_job_file(csv_file))
+        AssetImportJob.objects.filter(id=job.id).update(
+            status=job.status, total_rows=job.total_rows, last_modified=timezone.now()
+        )
+        csv_file.seek(0)
+        rows = itertools.islice(_read_job_file(csv_file), job.processed_rows, None)
+        process_file(
+            rows, user=job.created_by, context=context, start=job.processed_rows
+        )
+    except Exception as e:
+        AssetImportJob.objects.filter(id=job.id).update(status=JOB_FAILED, error=str(e))
+        raise
+    AssetImportJob.objects.filter(id=job.id).update(status=JOB_COMPLETED)
+
+
+def fail_stale_import_jobs():
+    """Fail the unfinished import jobs that no worker has written to for
+    longer than a task runs before the broker delivers it again
+
+    Run by the fail_stale_jobs command, reads only report the jobs as failed.
+    :returns: int, the number of jobs failed
+    """
+    return AssetImportJob.objects.filter(
+        status__in=[JOB_PENDING, JOB_RUNNING],
+        last_modified__lt=AssetImportJob.stale_cutoff(),
+    ).update(
+        status=JOB_FAILED,
+        error=AssetImportJob.STALE_ERROR,
+        last_modified=timezone.now(),
     )
 
 
-def process_asset_data(processed_file_data, location=None):  # noqa: C901
-    for model_number_value, row_datas in processed_file_data.items():
-        collection = apps.get_model("core", "AssetModelNumber")
-        logger.info(f"Processing asset data for {model_number_value}.")
-        try:
-            asset_model_obj = collection.objects.get(name__iexact=model_number_value)
-        except Exception:
-            asset_model_obj = model_number_value
-        for row_data in row_datas:
-            assetcode_value = row_data.pop(ASSET_CODE)
-            serialnumber_value = row_data.pop(SERIAL_NUMBER)
-            asset_verified_value = row_data.pop(VERIFIED)
-            assigned_to_email_value = row_data.pop(ASSIGNED_TO)
-            asset_status_value = row_data.pop(STATUS)
-            asset_condition_notes_value = row_data.pop(NOTES)
-            spec_memory_value = row_data.pop(ASSET_MEMORY)
-            spec_storage_value = row_data.pop(STORAGE)
-            spec_processor_type_value = row_data.pop(ASSET_PROCESSOR_TYPE)
-            spec_year_of_manufacture_value = row_data.pop(YOM)
-
-            asset_fields = {
-                "asset_code": assetcode_value,
-                "serial_number": serialnumber_value,
-            }
-            if location:
-                asset_fields.update({"asset_location": location})
-            asset = create_object(
-                "Asset",
-                parent={"model_number": asset_model_obj},
-                required_for_import=True,
-                **row_data,
-                **asset_fields,
-            )
-            if asset:
-                asset_verified_value = (True, False)[asset_verified_value == "No"]
-                asset.verified = asset_verified_value
-                asset.save()
-
-                if assigned_to_email_value:
-                    asset_user = create_object(
-                        "User", email=assigned_to_email_value, **row_data
-                    )
-
-                    create_object(
-                        "AllocationHistory",
-                        parent={"asset": asset},
-                        current_assignee=asset_user.assetassignee,
-                        **row_data,
-                    )
-
-                if asset_status_value:
-                    create_object(
-                        "AssetStatus",
-                        parent={"asset": asset},
-                        current_status=asset_status_value,
-                        **row_data,
-                    )
-
-                if asset_condition_notes_value:
-                    create_object(
-                        "AssetCondition",
-                        parent={"asset": asset},
-                        notes=asset_condition_notes_value,
-                        **row_data,
-                    )
-
-                spec_data = (
-                    spec_memory_value
-                    or spec_storage_value
-                    or spec_processor_type_value
-                    or spec_year_of_manufacture_value
-                )
-
-                if spec_data:
-                    asset_spec = create_object(
-                        "AssetSpecs",
-                        memory=spec_memory_value,
-                        storage=spec_storage_value,
-                        processor_type=spec_processor_type_value,
-                        year_of_manufacture=spec_year_of_manufacture_value,
-                        **row_data,
-                    )
-                    if asset_spec:
-                        asset.specs = asset_spec
-                        asset.save()
+def _read_job_file(csv_file):
+    return DictReaderStrip(codecs.iterdecode(csv_file, "utf-8"), delimiter=",")
 
 
-def read_csv_row_value(header_name, row):
-    value = row.get(header_name)
-    if value:
-        return value.strip()
-    return None
-
-
-def create_object(
-    collection,
-    parent=None,
-    row=None,
-    row_count=None,
-    required_for_import=False,
-    **values,
-):
-    obj, success = collection_bootstrap(collection, parent, **values)
-    if success:
-        return obj
-    if required_for_import:
-        record_errors(row, row_count, obj)
-    return success
-
-
-def record_errors(row, row_count, object_error):
-    global SKIPPED_ROWS
-    for line in SKIPPED_ROWS:
-        if line.get("Row") == row_count:
-            error_as_list = list(line["Error"])
-            error_as_list += object_error
-            line["Error"] = error_as_list
-            return
-    row["Error"] = object_error
-    row["Row"] = row_count
-    SKIPPED_ROWS.append(row)
+class ImportContext(object):
+    """Collects the rows skipped by a single import run.
 
+    Errors are kept per row number until the chunk being imported is flushed,
+    then the skipped rows are appended to the run's skipped records file, so
+    concurrent imports never share state and memory does not grow with the
+    number of bad rows.
+    """
 
-def write_skipped_records(records, filename=None):
     fieldnames = (
         "Row",
         "Category",
@@ -254,64 +190,523 @@ def write_skipped_records(records, filename=None):
         "Notes",
         "Error",
     )
-    skipped_assets_file = os.path.join(settings.BASE_DIR, "skipped.csv")
-    if filename:
-        skipped_assets_file = os.path.join(
-            settings.BASE_DIR, "skippedassets/{}.csv".format(filename)
+
+    def __init__(self, filename=None):
+        self.path = skipped_records_path(filename)
+        self.errors = {}
+        self.processed_rows = 0
+        self.skipped_rows = 0
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        self._file = self.open_file()
+        self._writer = csv.DictWriter(
+            self._file, delimiter=",", fieldnames=self.fieldnames, extrasaction="ignore"
         )
-    with open(skipped_assets_file, "w") as skipped_file:
-        writer = csv.DictWriter(skipped_file, delimiter=",", fieldnames=fieldnames)
-        writer.writeheader()
-        for row in records:
+        # a resumed import has written the heading already
+        if not self.processed_rows:
+            self._writer.writeheader()
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+        self._file.close()
+
+    def open_file(self):
+        return open(self.path, "w")
+
+    @property
+    def imported_rows(self):
+        return self.processed_rows - self.skipped_rows
+
+    def record_errors(self, row, row_count, object_error):
+        skipped_row = self.errors.get(row_count)
+        if skipped_row:
+            skipped_row["Error"] += object_error
+            return
+        row["Error"] = list(object_error)
+        row["Row"] = row_count
+        self.errors[row_count] = row
+
+    def flush(self, processed_rows=0):
+        """Write the rows skipped so far to disk
+
+        :params: processed_rows -> int, rows imported or skipped since the
+            last flush
+        """
+        self.processed_rows += processed_rows
+        for row in self.errors.values():
             row["Error"] = set(row["Error"])
-            if "" in row.keys():
-                del (row[""])
-            writer.writerow(row)
-
-
-def collection_bootstrap(collection, parent=None, **fields):
-    collection = apps.get_model("core", collection)
-    query = set()
-    for key, val in fields.items():
-        if hasattr(val, "pk"):
-            query.update({Q(**{key: val})})
-        else:
-            query.update({Q(**{"__".join([key, "iexact"]): val})})
-    lookup = functools.reduce(operator.and_, query)
-    try:
-        obj = collection.objects.get(lookup)
-    except Exception as e:
-        logger.info(str(e))
-    else:
-        if collection is Asset:
-            return (
-                ["Asset with similar asset code or serial number already imported"],
-                False,
+            self._writer.writerow(row)
+        self._file.flush()
+        self.skipped_rows += len(self.errors)
+        self.errors = {}
+
+
+class ImportJobContext(ImportContext):
+    """Collects the rows skipped by an AssetImportJob in the job's row.
+
+    Every flush writes the progress of the job and appends the rows skipped
+    since the last flush with one update, so the web dynos can report both.
+    """
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+        self.processed_rows = job.processed_rows
+        self.skipped_rows = job.skipped_rows
+
+    def open_file(self):
+        return io.StringIO()
+
+    def flush(self, processed_rows=0):
+        super().flush(processed_rows)
+        skipped_records = self._file.getvalue()
+        self._file.seek(0)
+        self._file.truncate()
+        self.job.processed_rows = self.processed_rows
+        self.job.skipped_rows = self.skipped_rows
+        AssetImportJob.objects.filter(id=self.job.id).update(
+            processed_rows=self.processed_rows,
+            skipped_rows=self.skipped_rows,
+            skipped_records=Concat("skipped_records", Value(skipped_records)),
+            last_modified=timezone.now(),
+        )
+
+
+class AssetImporter(object):
+    """Imports csv asset rows in bulk.
+
+    The taxonomy, assignees and specs a file refers to are resolved once and
+    cached for the whole file. Every chunk of rows then costs one ``IN`` query
+    per table to find existing records and one ``bulk_create`` per table for
+    the new ones, all inside a single transaction.
+    """
+
+    def __init__(self, context, location=None, assigner=None):
+        self.context = context
+        self.location = location
+        self.assigner = assigner
+        self.taxonomy = {model_name: {} for model_name, _, _ in TAXONOMY}
+        self.assignees = {}
+        self.specs = {}
+        # asset codes, serial numbers and (code, serial, location) already
+        # imported from this file
+        self.asset_codes = set()
+        self.serial_numbers = set()
+        self.imported_assets = set()
+        # the (asset code, serial number) pairs of imported_assets, checked
+        # when there is no location to match
+        self.imported_pairs = set()
+        self.model_numbers = {}
+
+    def import_rows(self, rows):
+        """Import a chunk of (row number, csv row) pairs"""
+        with transaction.atomic():
+            self._resolve_taxonomy(rows)
+            self._resolve_assignees(rows)
+            self._resolve_specs(rows)
+            allocations = self._create_assets(rows)
+        forget_filter_values(
+            [allocation.current_assignee_id for allocation in allocations]
+        )
+        notifications = []
+        for allocation in allocations:
+            notification = allocation.get_notification()
+            if notification:
+                message, user = notification
+                notifications.append(SlackMessage(text=message, user=user))
+        queue_messages(notifications)
+
+    def check_asset_limits(self):
+        """Check the stock of every imported model number with one query"""
+        if self.model_numbers:
+            check_stock_levels(self.model_numbers)
+
+    def _resolve_taxonomy(self, rows):
+        for level, (model_name, heading, _) in enumerate(TAXONOMY):
+            cache = self.taxonomy[model_name]
+            names = {}
+            for _, row in rows:
+                name = read_csv_row_value(heading, row)
+                if name and name.lower() not in cache:
+                    names.setdefault(name.lower(), []).append(row)
+            if not names:
+                continue
+            cache.update(self._fetch_taxonomy(model_name, names))
+            new_objects = []
+            for key, name_rows in names.items():
+                if key not in cache:
+                    obj = self._build_taxonomy_object(level, name_rows)
+                    if obj:
+                        new_objects.append(obj)
+            if new_objects:
+                created = _bulk_create(new_objects, self.assigner)
+                if created[0].pk is None:
+                    cache.update(self._fetch_taxonomy(model_name, names))
+                else:
+                    cache.update({obj.name.lower(): obj for obj in created})
+
+    def _build_taxonomy_object(self, level, rows):
+        """Build a new taxonomy object for the rows naming it, or None when it
+        has no known parent or is invalid"""
+        model_name, heading, parent_field = TAXONOMY[level]
+        obj = apps.get_model("core", model_name)(
+            name=read_csv_row_value(heading, rows[0])
+        )
+        if parent_field:
+            # the first row with a known parent decides where a new name goes
+            parent_model_name, parent_heading, _ = TAXONOMY[level - 1]
+            parents = self.taxonomy[parent_model_name]
+            for row in rows:
+                parent = parents.get(
+                    (read_csv_row_value(parent_heading, row) or "").lower()
+                )
+                if parent:
+                    setattr(obj, parent_field, parent)
+                    break
+            else:
+                return None
+        try:
+            obj.full_clean(exclude=[parent_field], validate_unique=False)
+        except ValidationError as e:
+            logger.info(str(e))
+            return None
+        return obj
+
+    def _fetch_taxonomy(self, model_name, names):
+        queryset = apps.get_model("core", model_name).objects.annotate(
+            lower_name=Lower("name")
+        )
+        if model_name == "AssetModelNumber":
+            queryset = queryset.select_related("asset_make__asset_type")
+        return {obj.lower_name: obj for obj in queryset.filter(lower_name__in=names)}
+
+    def _resolve_assignees(self, rows):
+        emails = {}
+        for _, row in rows:
+            email = read_csv_row_value(ASSIGNED_TO, row)
+            if email and email.lower() not in self.assignees:
+                emails[email.lower()] = email
+        if not emails:
+            return
+        User = apps.get_model("core", "User")
+        users = {
+            user.lower_email: user
+            for user in User.objects.annotate(lower_email=Lower("email")).filter(
+                lower_email__in=emails
+            )
+        }
+        assignees = {
+            assignee.user_id: assignee
+            for assignee in AssetAssignee.objects.select_related("user").filter(
+                user__in=users.values()
+            )
+        }
+        for key, email in emails.items():
+            user = users.get(key)
+            if not user:
+                # new users go through save() so they get their assignee
+                # record; a file rarely introduces many of them
+                try:
+                    user = User.objects.create(email=email)
+                except Exception as e:
+                    logger.warning("Unable to create user {}: {}".format(email, e))
+                    self.assignees[key] = None
+                    continue
+            assignee = assignees.get(user.id)
+            if not assignee:
+                assignee, _ = AssetAssignee.objects.get_or_create(user=user)
+            self.assignees[key] = assignee
+
+    def _resolve_specs(self, rows):
+        spec_values = {}
+        for _, row in rows:
+            key = _read_specs_key(row)
+            if key and key not in self.specs:
+                spec_values[key] = row
+        if not spec_values:
+            return
+        self.specs.update(self._fetch_specs(spec_values))
+        new_specs = []
+        for key, row in spec_values.items():
+            if key in self.specs:
+                continue
+            spec = AssetSpecs(
+                memory=read_csv_row_value(ASSET_MEMORY, row),
+                storage=read_csv_row_value(STORAGE, row),
+                processor_type=read_csv_row_value(ASSET_PROCESSOR_TYPE, row),
+                year_of_manufacture=read_csv_row_value(YOM, row),
+            )
+            try:
+                spec.full_clean(validate_unique=False)
+            except ValidationError as e:
+                logger.info(str(e))
+                self.specs[key] = None
+            else:
+                new_specs.append(spec)
+        if new_specs:
+            created = _bulk_create(new_specs, self.assigner)
+            if created[0].pk is None:
+                self.specs.update(self._fetch_specs(spec_values))
+            else:
+                self.specs.update({_specs_key(spec): spec for spec in created})
+
+    def _fetch_specs(self, spec_values):
+        memory, storage, _, year_of_manufacture = zip(*spec_values)
+        specs = {}
+        for spec in AssetSpecs.objects.filter(
+            memory__in=memory,
+            storage__in=storage,
+            year_of_manufacture__in=year_of_manufacture,
+        ):
+            key = _specs_key(spec)
+            if key in spec_values:
+                specs.setdefault(key, spec)
+        return specs
+
+    def _get_existing_assets(self, rows):
+        asset_codes = set()
+        serial_numbers = set()
+        for _, row in rows:
+            asset_code = read_csv_row_value(ASSET_CODE, row)
+            serial_number = read_csv_row_value(SERIAL_NUMBER, row)
+            if asset_code:
+                asset_codes.add(asset_code.upper())
+            if serial_number:
+                serial_numbers.add(serial_number.upper())
+        return Asset.objects.filter(
+            Q(asset_code__in=asset_codes) | Q(serial_number__in=serial_numbers)
+        ).values_list("asset_code", "serial_number", "asset_location")
+
+    def _is_imported(self, asset_code, serial_number):
+        if self.location:
+            return (asset_code, serial_number, self.location.id) in self.imported_assets
+        return (asset_code, serial_number) in self.imported_pairs
+
+    def _add_imported(self, asset_code, serial_number, location_id):
+        self.asset_codes.add(asset_code)
+        self.serial_numbers.add(serial_number)
+        self.imported_assets.add((asset_code, serial_number, location_id))
+        self.imported_pairs.add((asset_code, serial_number))
+
+    def _create_assets(self, rows):  # noqa: C901
+        for asset_code, serial_number, location in self._get_existing_assets(rows):
+            self._add_imported(asset_code, serial_number, location)
+
+        assets = []
+        for row_count, row in rows:
+            asset_code = read_csv_row_value(ASSET_CODE, row)
+            serial_number = read_csv_row_value(SERIAL_NUMBER, row)
+            asset_code = asset_code.upper() if asset_code else None
+            serial_number = serial_number.upper() if serial_number else None
+            model_number_value = read_csv_row_value(MODEL_NUMBER, row) or ""
+            model_number = self.taxonomy["AssetModelNumber"].get(
+                model_number_value.lower()
             )
-        return obj, True
-    if parent is not None:
-        missing_parent = [a for a, b in parent.items() if not b]
-        if len(missing_parent) > 0:
-            return missing_parent, False
-    missing_fields = [a for a, b in fields.items() if not b]
 
-    if missing_fields and collection is not Asset:
-        return missing_fields, False
+            if self._is_imported(asset_code, serial_number):
+                self.context.record_errors(
+                    row,
+                    row_count,
+                    ["Asset with similar asset code or serial number already imported"],
+                )
+                continue
+            if not model_number:
+                self.context.record_errors(row, row_count, ["model_number"])
+                continue
+            if not (asset_code or serial_number):
+                self.context.record_errors(
+                    row, row_count, ["asset_code", "serial_number"]
+                )
+                continue
+
+            asset = Asset(
+                asset_code=asset_code,
+                serial_number=serial_number,
+                model_number=model_number,
+                asset_location=self.location,
+                verified=read_csv_row_value(VERIFIED, row) != "No",
+            )
+            errors = {}
+            try:
+                asset.full_clean(exclude=ASSET_RELATED_FIELDS, validate_unique=False)
+            except ValidationError as e:
+                errors = e.update_error_dict(errors)
+            for field, existing_values in (
+                ("asset_code", self.asset_codes),
+                ("serial_number", self.serial_numbers),
+            ):
+                value = getattr(asset, field)
+                if value and value in existing_values:
+                    errors.setdefault(field, []).append(
+                        asset.unique_error_message(Asset, (field,))
+                    )
+            if errors:
+                self.context.record_errors(
+                    row, row_count, [str(ValidationError(errors))]
+                )
+                continue
+
+            self._add_imported(
+                asset.asset_code,
+                asset.serial_number,
+                self.location.id if self.location else None,
+            )
+            self.model_numbers[model_number.id] = model_number
+            assets.append((asset, self._set_asset_state(asset, row)))
+
+        if not assets:
+            return []
+        _bulk_create([asset for asset, _ in assets], self.assigner)
+        return self._create_asset_history(assets)
+
+    def _set_asset_state(self, asset, row):
+        """Set the final status, assignee, notes and specs of a new asset and
+        return the history rows that lead to that state as (model, fields)"""
+        history = [(AssetStatus, {"current_status": AVAILABLE})]
+        asset.current_status = AVAILABLE
+        assignee = self.assignees.get(
+            (read_csv_row_value(ASSIGNED_TO, row) or "").lower()
+        )
+        if assignee:
+            history.append(
+                (
+                    AllocationHistory,
+                    {"current_assignee": assignee, "assigner": self.assigner},
+                )
+            )
+            history.append(
+                (
+                    AssetStatus,
+                    {"current_status": ALLOCATED, "previous_status": AVAILABLE},
+                )
+            )
+            asset.assigned_to = assignee
+            asset.current_status = ALLOCATED
+
+        asset_status = _read_asset_status(row)
+        if asset_status and asset_status != asset.current_status:
+            history.append(
+                (
+                    AssetStatus,
+                    {
+                        "current_status": asset_status,
+                        "previous_status": asset.current_status,
+                    },
+                )
+            )
+            if asset_status == AVAILABLE and asset.assigned_to:
+                history.append(
+                    (AllocationHistory, {"previous_assignee": asset.assigned_to})
+                )
+                asset.assigned_to = None
+            asset.current_status = asset_status
+
+        notes = read_csv_row_value(NOTES, row)
+        if notes:
+            history.append((AssetCondition, {"notes": notes}))
+            asset.notes = notes
+        spec = self.specs.get(_read_specs_key(row))
+        if spec:
+            asset.specs = spec
+        return history
+
+    def _create_asset_history(self, assets):
+        """Write the status, allocation and condition rows of new assets and
+        return the allocations whose assignees should be notified"""
+        history = {AssetStatus: [], AllocationHistory: [], AssetCondition: []}
+        allocations = []
+        for asset, asset_history in assets:
+            for model, fields in asset_history:
+                obj = model(asset=asset, **fields)
+                history[model].append(obj)
+                if fields.get("current_assignee"):
+                    allocations.append(obj)
+        for objs in history.values():
+            _bulk_create(objs, self.assigner)
+        return allocations
+
+
+def _bulk_create(objs, user=None):
+    """bulk_create objects of a model, setting the primary keys of new assets
+    on database backends that cannot return them from a bulk insert, and send
+    bulk_saved for them
+
+    :params: user -> User the import runs for
+    """
+    if not objs:
+        return objs
+    model = type(objs[0])
+    created = model.objects.bulk_create(objs)
+    if model is Asset and created[0].pk is None:
+        ids = dict(
+            Asset.objects.filter(
+                uuid__in=[asset.uuid for asset in created]
+            ).values_list("uuid", "id")
+        )
+        for asset in created:
+            asset.pk = ids[asset.uuid]
+    bulk_saved.send(model, instances=created, created=True, user=user)
+    return created
 
-    if collection is Asset and len(missing_fields) > 1:
-        return missing_fields, False
-    return load_to_db(collection, parent, **fields)
 
+def _read_asset_status(row):
+    value = read_csv_row_value(STATUS, row)
+    if value in dict(ASSET_STATUSES):
+        return value
+    return None
 
-def load_to_db(collection, parent=None, **fields):
-    if parent:
-        fields.update(parent)
 
+def _read_specs_key(row):
+    values = [
+        read_csv_row_value(ASSET_MEMORY, row),
+        read_csv_row_value(STORAGE, row),
+        read_csv_row_value(ASSET_PROCESSOR_TYPE, row),
+        read_csv_row_value(YOM, row),
+    ]
+    if not all(values):
+        return None
+    memory, storage, processor_type, year_of_manufacture = values
     try:
-        return collection.objects.create(**fields), True
-    except Exception as e:
-        return [str(e)], False
-    return "error creating {}".format(collection), False
+        return (
+            int(memory),
+            int(storage),
+            processor_type.lower(),
+            int(year_of_manufacture),
+        )
+    except ValueError:
+        return None
+
+
+def _specs_key(spec):
+    return (
+        spec.memory,
+        spec.storage,
+        (spec.processor_type or "").lower(),
+        spec.year_of_manufacture,
+    )
+
+
+def read_csv_row_value(header_name, row):
+    value = row.get(header_name)
+    if value:
+        return value.strip()
+    return None
+
+
+def skipped_records_path(filename=None):
+    if filename:
+        return os.path.join(settings.BASE_DIR, "skippedassets/{}.csv".format(filename))
+    return os.path.join(settings.BASE_DIR, "skipped.csv")
+
+
+def _has_value(value):
+    # values past the last heading are collected by csv.DictReader in a list
+    if isinstance(value, list):
+        return any(_has_value(val) for val in value)
+    return bool(value and value.strip())
 
 
 class DictReaderStrip(csv.DictReader):
@@ -324,3 +719,17 @@ class DictReaderStrip(csv.DictReader):
                     name.strip() for name in self._fieldnames if name and name.strip()
                 ]
         return self._fieldnames
+
+    def read_rows(self):
+        """Return an iterator over the rows of the file, or None when no row
+        has a value.
+
+        Only the blank rows before the first row with a value are held in
+        memory, the rest of the file is streamed to the caller.
+        """
+        leading_rows = []
+        for row in self:
+            leading_rows.append(row)
+            if any(_has_value(value) for value in row.values()):
+                return itertools.chain(leading_rows, self)
+        return None
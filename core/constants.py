@@ -93,6 +93,30 @@ CSV_REQUIRED_HEADING = {MODEL_NUMBER}
 CSV_REQUIRED_HEADING_ASSET_CODE = CSV_REQUIRED_HEADING.union({ASSET_CODE})
 CSV_REQUIRED_HEADING_SERIAL_NO = CSV_REQUIRED_HEADING.union({SERIAL_NUMBER})
 
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+UNFINISHED_JOB_STATUSES = [JOB_PENDING, JOB_RUNNING]
+
+JOB_STATUSES = (
+    (JOB_PENDING, "pending"),
+    (JOB_RUNNING, "running"),
+    (JOB_COMPLETED, "completed"),
+    (JOB_FAILED, "failed"),
+)
+
+OUTBOX_PENDING = "pending"
+OUTBOX_SENT = "sent"
+OUTBOX_FAILED = "failed"
+
+OUTBOX_STATUSES = (
+    (OUTBOX_PENDING, "pending"),
+    (OUTBOX_SENT, "sent"),
+    (OUTBOX_FAILED, "failed"),
+)
+
 NEWLY_REPORTED = "newly reported"
 INTERNAL_ASSESSMENT = "internal assessment"
 EXTERNAL_ASSESSMENT = "external assessment"
@@ -120,7 +144,38 @@ NONE = "none"
 
 SIMCARD_ASSET_OPTIONS = ((BASIC, "basic"), (BUSINESS, "business"), (NONE, "none"))
 
-TABLES = ["core_history", "django_admin_log"]
+# the most items a bulk endpoint accepts in one request
+BULK_MAX_ITEMS = 500
+
+# tables whose changes made through the API are recorded in the History,
+# unless the HISTORY_TABLES environment variable lists others
+HISTORY_TABLES = [
+    "core_allocationhistory",
+    "core_andelacentre",
+    "core_asset",
+    "core_assetassignee",
+    "core_assetcategory",
+    "core_assetcondition",
+    "core_assetincidentreport",
+    "core_assetlog",
+    "core_assetmake",
+    "core_assetmodelnumber",
+    "core_assetowner",
+    "core_assetspecs",
+    "core_assetstatus",
+    "core_assetsubcategory",
+    "core_assettype",
+    "core_country",
+    "core_department",
+    "core_departmentalteam",
+    "core_officeblock",
+    "core_officefloor",
+    "core_officefloorsection",
+    "core_officeworkspace",
+    "core_statetransition",
+    "core_user",
+    "core_userfeedback",
+]
 
 # Notification titles
 INCIDENT_REPORT_CREATED_NOTIFICATION_TITLE = "New Incident Report"
@@ -0,0 +1,72 @@
+# Standard Library
+import os
+
+# Third-Party Imports
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+# App Imports
+from core.models.user import User
+
+FILTER_VALUES_CACHE_TTL = int(os.getenv("FILTER_VALUES_CACHE_TTL") or 300)
+
+
+def filter_values_key(location_id):
+    return "user-filter-values-{}".format(location_id)
+
+
+def get_filter_values(location_id):
+    """Return the cohorts and asset counts of the users of a location
+
+    The values are read with one grouped query and cached until an
+    allocation of one of the users changes, or FILTER_VALUES_CACHE_TTL
+    seconds at most.
+    :params: location_id -> id of the AndelaCentre of the users
+    :returns: dict of the sorted "cohorts" and "asset_count" values
+    """
+    key = filter_values_key(location_id)
+    values = cache.get(key)
+    if values is None:
+        values = read_filter_values(location_id)
+        cache.set(key, values, FILTER_VALUES_CACHE_TTL)
+    return values
+
+
+def read_filter_values(location_id):
+    rows = (
+        User.objects.filter(location_id=location_id)
+        .annotate(asset_count=Count("assetassignee__asset"))
+        .values_list("cohort", "asset_count")
+        .distinct()
+    )
+    cohorts = set()
+    asset_counts = set()
+    for cohort, asset_count in rows:
+        if cohort is not None:
+            cohorts.add(cohort)
+        asset_counts.add(asset_count)
+    return {"cohorts": sorted(cohorts), "asset_count": sorted(asset_counts)}
+
+
+def forget_filter_values(assignee_ids):
+    """Drop the cached values of the locations of assignees once the
+    transaction commits, so a request racing the change cannot cache the
+    values it replaces
+
+    :params: assignee_ids -> ids of the AssetAssignees whose assets changed,
+    None ids are skipped
+    """
+    assignee_ids = {assignee_id for assignee_id in assignee_ids if assignee_id}
+    if not assignee_ids:
+        return
+
+    def forget():
+        location_ids = set(
+            User.objects.filter(assetassignee__in=assignee_ids).values_list(
+                "location_id", flat=True
+            )
+        )
+        cache.delete_many([filter_values_key(pk) for pk in location_ids])
+
+    transaction.on_commit(forget)
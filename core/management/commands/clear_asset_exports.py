@@ -0,0 +1,24 @@
+# Standard Library
+import logging
+
+# Third-Party Imports
+from django.core.management.base import BaseCommand
+
+# App Imports
+from core.assets_export_helper import clear_old_exports
+from core.management.commands import COMMAND_VERSION, DJANGO_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Delete the asset export jobs and workbooks past their retention"
+
+    def get_version(self):
+        """
+        Return version (semver) of clear_asset_exports command
+        """
+        return f"clear_asset_exports v{COMMAND_VERSION}, Django v{DJANGO_VERSION}"
+
+    def handle(self, *args, **options):
+        logger.info("{} asset export jobs deleted".format(clear_old_exports()))
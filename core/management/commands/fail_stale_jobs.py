@@ -0,0 +1,26 @@
+# Standard Library
+import logging
+
+# Third-Party Imports
+from django.core.management.base import BaseCommand
+
+# App Imports
+from core.assets_export_helper import fail_stale_export_jobs
+from core.assets_import_helper import fail_stale_import_jobs
+from core.management.commands import COMMAND_VERSION, DJANGO_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Fail the asset import and export jobs whose task has stopped"
+
+    def get_version(self):
+        """
+        Return version (semver) of fail_stale_jobs command
+        """
+        return f"fail_stale_jobs v{COMMAND_VERSION}, Django v{DJANGO_VERSION}"
+
+    def handle(self, *args, **options):
+        logger.info("{} asset import jobs failed".format(fail_stale_import_jobs()))
+        logger.info("{} asset export jobs failed".format(fail_stale_export_jobs()))
@@ -0,0 +1,29 @@
+# Standard Library
+import logging
+
+# Third-Party Imports
+from django.core.management.base import BaseCommand
+
+# App Imports
+from core.management.commands import COMMAND_VERSION, DJANGO_VERSION
+from core.slack_bot import slack_directory, SlackIntegration
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Refresh the email -> slack ID directory from slack's users.list"
+
+    def get_version(self):
+        """
+        Return version (semver) of refresh_slack_directory command
+        """
+        return f"refresh_slack_directory v{COMMAND_VERSION}, Django v{DJANGO_VERSION}"
+
+    def handle(self, *args, **options):
+        slack = SlackIntegration()
+        if not hasattr(slack, "slack_client"):
+            logger.error("Missing slack token.")
+            return
+        slack_directory.refresh(slack)
+        logger.info("{} slack members loaded".format(len(slack_directory.entries)))
@@ -1,9 +1,13 @@
 # Standard Library
+import itertools
 import logging
 import os
+import random
 import re
+import threading
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 # Third-Party Imports
@@ -12,220 +16,433 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 from django.core.validators import validate_email
+from django.db import DatabaseError, transaction
+from django.utils import timezone
 from django.utils.dateparse import parse_datetime
+from requests.adapters import HTTPAdapter
 
 # App Imports
 from core.management.commands import COMMAND_VERSION, DJANGO_VERSION
-from core.models import AISUserSync, AndelaCentre
-from core.slack_bot import SlackIntegration
+from core.managers import bulk_update
+from core.models import AISUserSync, AndelaCentre, AssetAssignee
+from core.slack_outbox import queue_message
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
-slack = SlackIntegration()
 
 SYNC_SUCCESS = True
 SYNC_ERRORS = defaultdict(set)
+# related objects and emails are looked up per page, not per user
+USER_CLEAN_EXCLUDE = ["location", "department", "team"]
 
+# changed user field -> key it is reported under in the sync record
+UPDATED_DATA_KEYS = {
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "picture": "picture",
+    "cohort": "cohort_no",
+    "location": "andela_center",
+    "is_active": "user_status",
+}
 
-def fetch_ais_user_data(base_ais_url, ais_token, params={}, sec_fetch=False):
-    global SYNC_SUCCESS
-    limit_per_page = os.getenv("AIS_LIMIT", 10000)
-    params["limit"] = limit_per_page
-    params["page"] = 1
-    headers = {"api-token": ais_token}
-    ais_url = base_ais_url + "users"
-    logger.info("Fetching data from AIS: {}".format(ais_url))
-    print("Fetching data from AIS: {}".format(ais_url))
-    fetching_users = True
-    ais_user_data = []
-    sec_url_used = False
-    page_num = params.get("page") or 1
-    retries = int(os.getenv("RETRIES") or 4)
-    retry_timeout = int(os.getenv("RETRY_TIMEOUT") or 10)
-    while fetching_users:
-        params["page"] = page_num
-        logger.info("Params: {}".format(params))
-        response = requests.get(ais_url, params=params, headers=headers)
-        if response.ok:
+
+class AISUserFetcher(object):
+    """Fetches pages of users from AIS over one pooled session
+
+    When the first page reports the total number of users, the remaining
+    pages are fetched by a bounded pool of threads and still yielded in page
+    order. Otherwise pages are fetched one after another until one is empty.
+    Failed requests are retried with exponential backoff and full jitter;
+    after two failures the users/basic endpoint is used instead, unless the
+    fetch is itself a secondary one.
+    """
+
+    def __init__(self, base_ais_url, ais_token, sec_fetch=False):
+        self.base_ais_url = base_ais_url
+        self.ais_url = base_ais_url + "users"
+        self.sec_fetch = sec_fetch
+        self.limit = int(os.getenv("AIS_LIMIT") or 10000)
+        self.retries = int(os.getenv("RETRIES") or 4)
+        self.retry_timeout = int(os.getenv("RETRY_TIMEOUT") or 10)
+        self.max_retry_timeout = int(os.getenv("RETRY_MAX_TIMEOUT") or 300)
+        self.workers = int(os.getenv("AIS_WORKERS") or 4)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["api-token"] = ais_token
+        self._lock = threading.Lock()
+
+    def pages(self, params=None):
+        """Yield (users, sec_url_used) of every page of users in order"""
+        params = dict(params or {})
+        logger.info("Fetching data from AIS: {}".format(self.ais_url))
+        print("Fetching data from AIS: {}".format(self.ais_url))
+        page = self.fetch_page(1, params)
+        if not page:
+            return
+        users, total, sec_url_used = page
+        yield users, sec_url_used
+        if total:
+            last_page = -(-int(total) // self.limit)
+            yield from self._fetch_concurrently(range(2, last_page + 1), params)
+            return
+        page_num = 2
+        while True:
+            page = self.fetch_page(page_num, params)
+            if not page:
+                return
+            users, _, sec_url_used = page
+            yield users, sec_url_used
+            page_num += 1
+
+    def _fetch_concurrently(self, page_nums, params):
+        page_nums = iter(page_nums)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # at most `workers` pages are fetched ahead of the one yielded
+            futures = deque(
+                executor.submit(self.fetch_page, page_num, params)
+                for page_num in itertools.islice(page_nums, self.workers)
+            )
+            while futures:
+                page = futures.popleft().result()
+                if not page:
+                    for future in futures:
+                        future.cancel()
+                    return
+                users, _, sec_url_used = page
+                yield users, sec_url_used
+                for page_num in itertools.islice(page_nums, 1):
+                    futures.append(executor.submit(self.fetch_page, page_num, params))
+
+    def fetch_page(self, page_num, params):
+        """Fetch a page of users, retrying failed requests and connection
+        errors
+
+        :returns: (users, total, sec_url_used) or None when the page is empty
+        or cannot be fetched
+        """
+        global SYNC_SUCCESS
+        params = dict(params, limit=self.limit, page=page_num)
+        for attempt in range(self.retries + 1):
+            ais_url = self.ais_url
+            logger.info("Params: {}".format(params))
             try:
-                fetched_users = response.json().get("values")
-            except Exception as e:
-                fetching_users = False
-                SYNC_SUCCESS = False
-                SYNC_ERRORS["failures"].add(str(e))
+                response = self.session.get(ais_url, params=params)
+            except requests.RequestException as e:
+                # connection errors and timeouts are retried like 5xx responses
+                error = str(e)
             else:
-                if fetched_users:
-                    ais_user_data += fetched_users
-                else:
-                    logger.info("No data on page {}".format(page_num))
-                    fetching_users = False
-            page_num += 1
-        elif response.status_code == 401:
-            fetching_users = False
-            SYNC_SUCCESS = False
-            SYNC_ERRORS["failures"].add(response.reason)
-        else:
+                if response.ok:
+                    return self._read_page(response, ais_url, page_num)
+                if response.status_code == 401:
+                    SYNC_SUCCESS = False
+                    SYNC_ERRORS["failures"].add(response.reason)
+                    return None
+                error = "{} : {} : {}".format(
+                    response.status_code, response.reason, response.text
+                )
+            if attempt == self.retries:
+                break
+            delay = self.get_retry_delay(attempt)
             logger.warning(
-                "Unable to connect to AIS: {} : {} : {}. Retrying in {} seconds".format(
-                    response.status_code, response.reason, response.text, retry_timeout
+                "Unable to connect to AIS: {}. Retrying in {:.1f} seconds".format(
+                    error, delay
                 )
             )
-            time.sleep(retry_timeout)
-            retries -= 1
-            if retries == 2 and not sec_fetch:
+            time.sleep(delay)
+            if attempt == 1 and not self.sec_fetch:
+                self._use_secondary_url()
+        SYNC_SUCCESS = False
+        SYNC_ERRORS["failures"].add("Unable to connect to AIS. Exiting.")
+        return None
+
+    def _read_page(self, response, ais_url, page_num):
+        global SYNC_SUCCESS
+        try:
+            data = response.json()
+            fetched_users = data.get("values")
+        except Exception as e:
+            SYNC_SUCCESS = False
+            SYNC_ERRORS["failures"].add(str(e))
+            return None
+        if not fetched_users:
+            logger.info("No data on page {}".format(page_num))
+            return None
+        sec_url_used = ais_url != self.base_ais_url + "users"
+        return fetched_users, data.get("total"), sec_url_used
+
+    def get_retry_delay(self, attempt):
+        """Full jitter: a random delay up to an exponentially growing cap"""
+        cap = min(self.max_retry_timeout, self.retry_timeout * 2 ** attempt)
+        return random.uniform(0, cap)
+
+    def _use_secondary_url(self):
+        with self._lock:
+            sec_url = self.base_ais_url + "users/basic"
+            if self.ais_url != sec_url:
                 err = "Unable to connect to AIS after 2 retries. Trying secondary url"
                 SYNC_ERRORS["failures"].add(err)
-                ais_url = base_ais_url + "users/basic"
-                sec_url_used = True
+                self.ais_url = sec_url
 
-            if retries < 0:
-                err = "Unable to connect to AIS. Exiting."
-                fetching_users = False
-                SYNC_SUCCESS = False
-                SYNC_ERRORS["failures"].add(err)
 
-    return ais_user_data, sec_url_used
-
-
-def load_users_to_art(  # noqa: C901
-    ais_user_data, current_sync_id=None, sec_url_used=False
-):
-    global SYNC_SUCCESS
-    global SYNC_ERRORS
-    last_successful_run = None
-    new_records_count = 0
-    updated_records_count = 0
-    updated_data = {}
-    ids = set()
-    logger.info("Loading data to ART")
-    print("Loading data to ART")
-    try:
-        last_successful_run = (
-            AISUserSync.objects.exclude(id=current_sync_id)
-            .filter(successful=True)
-            .latest("created_at")
-        )
-    except Exception as e:
-        logger.warning(str(e))
-    if last_successful_run:
-        logger.info("Last successful run: {}".format(str(last_successful_run)))
-    total_num = len(ais_user_data)
-    num = 0
-    for ais_user in ais_user_data:
-        num += 1
-        logger.info("Processing: **{}** of **{}**".format(num, total_num))
-        email = ais_user.get("email")
-        updated_at = ais_user.get("updated_at")
-        updated_user_data = []
-        if updated_at:
-            updated_at = parse_datetime(updated_at)
+def fetch_ais_user_data(base_ais_url, ais_token, params=None, sec_fetch=False):
+    """Yield (users, sec_url_used) for every page of users fetched from AIS
+
+    Pages are yielded as they arrive so they can be loaded before the next
+    one is requested.
+    """
+    fetcher = AISUserFetcher(base_ais_url, ais_token, sec_fetch=sec_fetch)
+    return fetcher.pages(params)
+
+
+def read_picture(picture):
+    if "?sz=50" in picture:
+        return picture.replace("?sz=50", "")
+    return picture.replace("/s50/", "/")
+
+
+def read_cohort(cohort):
+    if not cohort:
+        return None
+    cohort_name = cohort.get("name")
+    if cohort_name.lower() == "staff":
+        return 0
+    cohort_num_data = re.findall(r"(\d+)", cohort_name)
+    if len(cohort_num_data) == 1:
+        return int(cohort_num_data[0])
+    logger.warning("Unable to extract user cohort")
+    return None
+
+
+class UserSyncLoader(object):
+    """Loads pages of AIS users into ART
+
+    Each page costs a fixed number of queries: the users and centres it
+    mentions are read with one query each, new users are inserted with
+    bulk_create and changed users are written with an UPDATE per set of
+    changed fields.
+    """
+
+    def __init__(self, current_sync_id=None, delta=True):
+        self.last_successful_run = None
         try:
-            validate_email(email)
-        except Exception:
-            if not last_successful_run or (
-                last_successful_run
-                and updated_at
-                and updated_at > last_successful_run.created_at
-            ):
-                SYNC_ERRORS["other_errors"].add("Invalid Email - {}".format(email))
-            continue
-        else:
-            email_domain = email.split("@")[1]
-            if "andela" not in email_domain.lower():
+            self.last_successful_run = (
+                AISUserSync.objects.exclude(id=current_sync_id)
+                .filter(successful=True)
+                .latest("created_at")
+            )
+        except Exception as e:
+            logger.warning(str(e))
+        if self.last_successful_run:
+            logger.info("Last successful run: {}".format(self.last_successful_run))
+        # in delta mode records not updated since the last successful run are
+        # dropped before any query is made for them
+        self.since = None
+        if delta and self.last_successful_run:
+            self.since = self.last_successful_run.high_water_mark
+        self.high_water_mark = None
+        self.centres = {}
+        self.new_records_count = 0
+        self.updated_records_count = 0
+        self.updated_data = {}
+        self.ids = set()
+
+    def load_page(self, ais_users, sec_url_used=False):
+        """Create and update the ART users of a page of AIS users
+
+        When writing the page fails, its records are written one at a time
+        so a bad record only skips itself.
+        """
+        records = self._read_records(ais_users)
+        if not records:
+            return
+        try:
+            self._write_records(records, sec_url_used)
+        except DatabaseError as e:
+            logger.warning("Writing a page of users failed: {}".format(e))
+            for email, ais_user in records.items():
+                try:
+                    self._write_records({email: ais_user}, sec_url_used)
+                except DatabaseError as e:
+                    SYNC_ERRORS["other_errors"].add("{} - {}".format(email, e))
+
+    def _write_records(self, records, sec_url_used):
+        """Create and update the users of email -> AIS user records in one
+        transaction, counting them once it commits"""
+        updated_data = {}
+        ids = set()
+        with transaction.atomic():
+            users = {
+                user.email: user for user in User.objects.filter(email__in=records)
+            }
+            self._resolve_centres(records.values())
+            new_users = []
+            # changed fields -> users
+            changed_users = defaultdict(list)
+            for email, ais_user in records.items():
+                user = users.get(email)
+                if user is None:
+                    user = self._build_user(email, ais_user)
+                    if user:
+                        new_users.append(user)
+                        if sec_url_used:
+                            ids.add(ais_user.get("id"))
+                    continue
+                if self._is_unchanged(ais_user):
+                    # the record has not been updated on AIS
+                    continue
+                changed_fields = self._update_user(user, ais_user, updated_data)
+                if changed_fields:
+                    changed_users[changed_fields].append(user)
+            self._create_users(new_users)
+            for fields, changed in changed_users.items():
+                bulk_update(changed, fields + ("last_modified",))
+        self.new_records_count += len(new_users)
+        self.updated_records_count += sum(map(len, changed_users.values()))
+        self.updated_data.update(updated_data)
+        self.ids.update(ids)
+
+    def _read_records(self, ais_users):
+        """Return email -> AIS user of the records with valid andela emails"""
+        records = {}
+        for ais_user in ais_users:
+            updated_at = self._read_updated_at(ais_user)
+            if updated_at:
+                if self.since and updated_at < self.since:
+                    continue
+                if not self.high_water_mark or updated_at > self.high_water_mark:
+                    self.high_water_mark = updated_at
+            email = ais_user.get("email")
+            try:
+                validate_email(email)
+            except Exception:
+                if not self.last_successful_run or (
+                    updated_at and updated_at > self.last_successful_run.created_at
+                ):
+                    SYNC_ERRORS["other_errors"].add("Invalid Email - {}".format(email))
                 continue
+            email_domain = email.split("@")[1]
+            if "andela" in email_domain.lower():
+                records[email] = ais_user
+        return records
+
+    @staticmethod
+    def _read_updated_at(ais_user):
         try:
-            user, user_created = User.objects.get_or_create(email=email)
-        except Exception as e:
-            SYNC_ERRORS["other_errors"].add(str(e))
-            continue
+            updated_at = parse_datetime(ais_user.get("updated_at") or "")
+        except ValueError:
+            return None
+        if updated_at and timezone.is_naive(updated_at):
+            updated_at = timezone.make_aware(updated_at, timezone.utc)
+        return updated_at
 
-        if (
-            (not user_created)
-            and last_successful_run
+    def _is_unchanged(self, ais_user):
+        updated_at = self._read_updated_at(ais_user)
+        return bool(
+            self.last_successful_run
             and updated_at
-            and updated_at < last_successful_run.created_at
-        ):
-            # if record has not been updated on AIS
-            continue
-        cohort_no = None
-        andela_center = None
-        location = ais_user.get("location")
-        cohort = ais_user.get("cohort")
-        picture = ais_user.get("picture")
-        if "?sz=50" in picture:
-            picture = picture.replace("?sz=50", "")
-        elif "/s50/" in picture:
-            picture = picture.replace("/s50/", "/")
-        user_status = ais_user.get("status")
-        if user_created and sec_url_used:
-            ids.add(ais_user.get("id"))
-
-        if location:
-            location_name = location.get("name")
+            and updated_at < self.last_successful_run.created_at
+        )
+
+    def _resolve_centres(self, ais_users):
+        names = {
+            ais_user["location"].get("name")
+            for ais_user in ais_users
+            if ais_user.get("location")
+        } - set(self.centres)
+        if not names:
+            return
+        self.centres.update(
+            (centre.name, centre)
+            for centre in AndelaCentre.objects.filter(name__in=names)
+        )
+        for name in names - set(self.centres):
             try:
-                andela_center, location_created = AndelaCentre.objects.get_or_create(
-                    name=location_name
-                )
-                if location_created:
-                    logger.info("New location added: {}".format(location_name))
+                self.centres[name] = AndelaCentre.objects.create(name=name)
             except Exception as e:
                 logger.warning(str(e))
-        if cohort:
-            cohort_name = cohort.get("name")
-            if cohort_name.lower() == "staff":
-                cohort_no = 0
+                self.centres[name] = None
             else:
-                try:
-                    cohort_num_data = re.findall(r"(\d+)", cohort_name)
-                except Exception as e:
-                    logger.warning(str(e))
-                else:
-                    if len(cohort_num_data) == 1:
-                        cohort_no = int(cohort_num_data[0])
-                    else:
-                        logger.warning("Unable to extract user cohort")
-        if not user.first_name:
-            first_name = ais_user.get("first_name")
-            user.first_name = first_name or ""
-        if not user.last_name:
-            last_name = ais_user.get("last_name")
-            user.last_name = last_name or ""
-        if user_created:
-            logger.info("Additional data for new user.")
-            user.picture = picture
-            user.cohort = cohort_no
-            user.location = andela_center
-            if user_status == "suspended":
-                user.is_active = False
-
-            user.save()
-            new_records_count += 1
-        else:
-            # check if picture or cohort have changed
-            modified = False
-            if picture and user.picture != picture:
-                user.picture = picture
-                modified = True
-                updated_user_data.append("picture")
-            if cohort_no and user.cohort != cohort_no:
-                user.cohort = cohort_no
-                modified = True
-                updated_user_data.append("cohort_no")
-            if andela_center and user.location != andela_center:
-                user.location = andela_center
-                modified = True
-                updated_user_data.append("andela_center")
-            if user_status == "suspended" and user.is_active:
-                user.is_active = False
-                modified = True
-                updated_user_data.append("user_status")
-
-            if modified:
-                logger.info("Existing user modified. Updating")
-                user.save()
-                updated_records_count += 1
-                updated_data[email] = updated_user_data
-    return new_records_count, updated_records_count, updated_data, ids
+                logger.info("New location added: {}".format(name))
+
+    def _get_centre(self, ais_user):
+        location = ais_user.get("location")
+        return self.centres.get(location.get("name")) if location else None
+
+    def _build_user(self, email, ais_user):
+        user = User(
+            email=email,
+            first_name=ais_user.get("first_name") or "",
+            last_name=ais_user.get("last_name") or "",
+            picture=read_picture(ais_user.get("picture") or ""),
+            cohort=read_cohort(ais_user.get("cohort")),
+            location=self._get_centre(ais_user),
+            is_active=ais_user.get("status") != "suspended",
+        )
+        try:
+            user.full_clean(exclude=USER_CLEAN_EXCLUDE, validate_unique=False)
+        except Exception as e:
+            SYNC_ERRORS["other_errors"].add(str(e))
+            return None
+        return user
+
+    def _update_user(self, user, ais_user, updated_data):
+        """Apply the changes of an AIS record to an existing user
+
+        :params: updated_data -> dict the changed fields are reported in
+        :returns: tuple of the names of the changed fields
+        """
+        changes = self._read_changes(user, ais_user)
+        if not changes:
+            return ()
+        for field, value in changes.items():
+            setattr(user, field, value)
+        try:
+            user.full_clean(exclude=USER_CLEAN_EXCLUDE, validate_unique=False)
+        except Exception as e:
+            SYNC_ERRORS["other_errors"].add(str(e))
+            return ()
+        user.last_modified = timezone.now()
+        updated_data[user.email] = [UPDATED_DATA_KEYS[f] for f in changes]
+        return tuple(sorted(changes))
+
+    def _read_changes(self, user, ais_user):
+        """Return field -> new value of the fields an AIS record changes"""
+        changes = {}
+        if not user.first_name and ais_user.get("first_name"):
+            changes["first_name"] = ais_user["first_name"]
+        if not user.last_name and ais_user.get("last_name"):
+            changes["last_name"] = ais_user["last_name"]
+        picture = read_picture(ais_user.get("picture") or "")
+        if picture and user.picture != picture:
+            changes["picture"] = picture
+        cohort_no = read_cohort(ais_user.get("cohort"))
+        if cohort_no and user.cohort != cohort_no:
+            changes["cohort"] = cohort_no
+        andela_center = self._get_centre(ais_user)
+        if andela_center and user.location_id != andela_center.id:
+            changes["location"] = andela_center
+        if ais_user.get("status") == "suspended" and user.is_active:
+            changes["is_active"] = False
+        return changes
+
+    def _create_users(self, users):
+        if not users:
+            return
+        created = User.objects.bulk_create(users)
+        if created[0].pk is None:
+            ids = dict(
+                User.objects.filter(
+                    email__in=[user.email for user in created]
+                ).values_list("email", "id")
+            )
+            for user in created:
+                user.pk = ids[user.email]
+        # save() gives every user an assignee record, bulk_create does not
+        AssetAssignee.objects.bulk_create(
+            [AssetAssignee(user=user) for user in created]
+        )
 
 
 class Command(BaseCommand):
@@ -238,48 +455,77 @@ class Command(BaseCommand):
         """
         return f"sync_users v{COMMAND_VERSION}, Django v{DJANGO_VERSION}"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Process every AIS user, not only those updated since the "
+            "last successful sync",
+        )
+
     def handle(self, *args, **options):
         global SYNC_SUCCESS
-        global SYNC_ERRORS
-        new_records_count = 0
-        updated_records_count = 0
-        updated_data = None
-        sec_url_used = False
         start_time = time.time()
         sync_record = AISUserSync.objects.create(running=True)
+        updated_data = None
+        try:
+            updated_data = self.sync_users(sync_record, full=options["full"])
+        except Exception as e:
+            SYNC_SUCCESS = False
+            SYNC_ERRORS["failures"].add(str(e))
+            raise
+        finally:
+            # the sync record is closed however the sync ends
+            self.close_sync(sync_record, start_time, updated_data)
+
+    def sync_users(self, sync_record, full=False):
+        """Load the AIS users into ART, counting them on the sync record
+
+        :returns: dict of the fields updated by user email
+        """
+        global SYNC_SUCCESS
         ais_url = os.getenv("AIS_URL")
         if not ais_url.endswith("/"):
             ais_url += "/"
         ais_token = os.getenv("AIS_TOKEN")
-        if ais_url and ais_token:
-            ais_user_data, sec_url_used = fetch_ais_user_data(ais_url, ais_token)
-            logger.info("{} records fetched".format(len(ais_user_data)))
-            print("{} records fetched".format(len(ais_user_data)))
-            if ais_user_data:
-                new_records_count, updated_records_count, updated_data, ids = load_users_to_art(
-                    ais_user_data,
-                    current_sync_id=sync_record.id,
-                    sec_url_used=sec_url_used,
-                )
-                if ids:
-                    SYNC_SUCCESS = False
-                    params = {"ids": ids}
-                    sec_user_data, _ = fetch_ais_user_data(
-                        ais_url, ais_token, params=params, sec_fetch=True
-                    )
-                    if ais_user_data:
-                        load_users_to_art(sec_user_data, current_sync_id=sync_record.id)
-                sync_record.new_records = new_records_count
-                sync_record.updated_records = updated_records_count
-                logger.info(
-                    "Done. {} records added. {} records updated.".format(
-                        new_records_count, updated_records_count
-                    )
-                )
-        else:
+        if not (ais_url and ais_token):
             err = "Missing url or token."
             SYNC_SUCCESS = False
             SYNC_ERRORS["failures"].add(err)
+            return None
+        loader = UserSyncLoader(current_sync_id=sync_record.id, delta=not full)
+        params = {}
+        since_param = os.getenv("AIS_UPDATED_SINCE_PARAM")
+        if loader.since and since_param:
+            params[since_param] = loader.since.isoformat()
+        fetched_count = 0
+        for ais_users, sec_url_used in fetch_ais_user_data(
+            ais_url, ais_token, params=params
+        ):
+            fetched_count += len(ais_users)
+            loader.load_page(ais_users, sec_url_used=sec_url_used)
+        logger.info("{} records fetched".format(fetched_count))
+        print("{} records fetched".format(fetched_count))
+        if loader.ids:
+            # users only known from the basic endpoint are fetched in full
+            SYNC_SUCCESS = False
+            params = {"ids": list(loader.ids)}
+            for ais_users, _ in fetch_ais_user_data(
+                ais_url, ais_token, params=params, sec_fetch=True
+            ):
+                loader.load_page(ais_users)
+        sync_record.new_records = loader.new_records_count
+        sync_record.updated_records = loader.updated_records_count
+        sync_record.high_water_mark = loader.high_water_mark or loader.since
+        logger.info(
+            "Done. {} records added. {} records updated.".format(
+                loader.new_records_count, loader.updated_records_count
+            )
+        )
+        return loader.updated_data
+
+    def close_sync(self, sync_record, start_time, updated_data):
+        """Save the outcome of the sync and report it to the builds channel"""
         duration = time.time() - start_time
         running_time = timedelta(seconds=duration)
 
@@ -295,4 +541,4 @@ class Command(BaseCommand):
         _env = "dev" if settings.DEBUG else "prod"
         message = "User sync complete *_({})_* - {}".format(_env, str(sync_record))
         art_builds_channel = os.getenv("ART_BUILDS_CHANNEL") or "#art-builds"
-        slack.send_message(message, channel=art_builds_channel)
+        queue_message(message, channel=art_builds_channel)
@@ -1,5 +1,6 @@
 # Third-Party Imports
-from django.db.models import Manager
+from django.db import connection
+from django.db.models import Case, Manager, Value, When
 from django.db.models.query import QuerySet
 
 
@@ -26,3 +27,36 @@ class CaseInsensitiveQuerySet(QuerySet):
 class CaseInsensitiveManager(Manager):
     def get_queryset(self):
         return CaseInsensitiveQuerySet(self.model)
+
+
+def bulk_update(objs, fields, batch_size=None):
+    """Write `fields` of saved objects of a model with one UPDATE per batch
+
+    Django 2.1 has no QuerySet.bulk_update. Every field is set with a CASE on
+    the primary key, which is what it does from Django 2.2 on.
+    :params: objs -> list of model instances
+    :params: fields -> names of the fields to write
+    """
+    if not objs:
+        return
+    model = type(objs[0])
+    fields = [model._meta.get_field(name) for name in fields]
+    max_batch_size = connection.ops.bulk_batch_size(["pk", "pk"] + fields, objs)
+    batch_size = min(batch_size, max_batch_size) if batch_size else max_batch_size
+    for start in range(0, len(objs), batch_size):
+        end = start + batch_size
+        batch = objs[start:end]
+        updates = {
+            field.attname: Case(
+                *[
+                    When(
+                        pk=obj.pk,
+                        then=Value(getattr(obj, field.attname), output_field=field),
+                    )
+                    for obj in batch
+                ],
+                output_field=field,
+            )
+            for field in fields
+        }
+        model.objects.filter(pk__in=[obj.pk for obj in batch]).update(**updates)
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.11 on 2026-10-18 05:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0054_assetexportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aisusersync',
+            name='high_water_mark',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.1.11 on 2026-10-18 05:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0055_aisusersync_high_water_mark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlackDirectoryEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('slack_id', models.CharField(max_length=50)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Slack Directory',
+                'ordering': ['email'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.1.11 on 2026-10-18 05:28
+
+import os
+
+from django.db import migrations, models
+
+
+def set_low_stock_threshold(apps, schema_editor):
+    # the thresholds start at the global limit they replace
+    AssetModelNumber = apps.get_model('core', 'AssetModelNumber')
+    AssetModelNumber.objects.update(
+        low_stock_threshold=int(os.environ.get("ASSET_LIMIT", 0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0057_slackmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetmodelnumber',
+            name='low_stock',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='assetmodelnumber',
+            name='low_stock_alerted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='assetmodelnumber',
+            name='low_stock_threshold',
+            field=models.PositiveIntegerField(blank=True, default=0, help_text='ops are alerted when the available assets drop to this number, leave empty to never alert', null=True),
+        ),
+        migrations.RunPython(set_low_stock_threshold, migrations.RunPython.noop),
+    ]
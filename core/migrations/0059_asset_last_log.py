@@ -0,0 +1,35 @@
+# Generated by Django 2.1.11 on 2026-10-18 05:45
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def point_to_last_logs(apps, schema_editor):
+    Asset = apps.get_model('core', 'Asset')
+    AssetLog = apps.get_model('core', 'AssetLog')
+    last_logs = AssetLog.objects.filter(asset=OuterRef('pk')).order_by('-id')
+    Asset.objects.filter(assetlog__isnull=False).update(
+        last_log_type=Subquery(last_logs.values('log_type')[:1]),
+        last_log_at=Subquery(last_logs.values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0058_assetmodelnumber_low_stock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='last_log_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='last_log_type',
+            field=models.CharField(blank=True, choices=[('Checkin', 'Checkin'), ('Checkout', 'Checkout')], editable=False, max_length=10),
+        ),
+        migrations.RunPython(point_to_last_logs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.1.11 on 2026-10-18 05:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0059_asset_last_log'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='history',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['table_name', 'item_id', 'created_at'], name='core_histor_table_n_88a68c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['user', 'created_at'], name='core_histor_user_id_adbe67_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.1.11 on 2026-10-18 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0060_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notifications',
+            index=models.Index(fields=['target', 'read'], name='core_notifi_target__476c9f_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.1.11 on 2026-10-18 06:20
+
+import os
+
+from django.db import migrations, models
+
+
+def copy_uploads(apps, schema_editor):
+    AssetImportJob = apps.get_model('core', 'AssetImportJob')
+    for job in AssetImportJob.objects.exclude(file=''):
+        job.filename = os.path.basename(job.file.name)
+        try:
+            with job.file.open('rb') as upload:
+                job.data = upload.read()
+        except OSError:
+            # the upload is on the disk of another dyno
+            pass
+        job.save(update_fields=['filename', 'data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0061_notification_target_read_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetimportjob',
+            name='data',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='assetimportjob',
+            name='filename',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='assetimportjob',
+            name='skipped_records',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(copy_uploads, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='assetimportjob',
+            name='file',
+        ),
+    ]
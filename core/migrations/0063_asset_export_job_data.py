@@ -0,0 +1,25 @@
+# Generated by Django 2.1.11 on 2026-10-18 07:03
+
+from django.db import migrations, models
+
+
+def delete_export_jobs(apps, schema_editor):
+    # their workbooks are on the disk of the worker dyno, the next export
+    # of the same filters builds them again
+    apps.get_model('core', 'AssetExportJob').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0062_asset_import_job_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetexportjob',
+            name='data',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(delete_export_jobs, migrations.RunPython.noop),
+    ]
@@ -25,5 +25,7 @@ from .centre import (  # noqa: F401
     OfficeWorkspace,
 )
 from .history import History  # noqa: F401
+from .job import AssetExportJob, AssetImportJob  # noqa: F401
 from .notification import Notifications  # noqa: F401
+from .slack import SlackDirectoryEntry, SlackMessage  # noqa: F401
 from .user import AISUserSync, APIUser, User, UserFeedback  # noqa: F401
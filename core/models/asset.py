@@ -1,25 +1,125 @@
 # Standard Library
 import logging
 import os
+import threading
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Third-Party Imports
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count
+from django.utils import timezone
 
 # App Imports
 from core import constants
-from core.managers import CaseInsensitiveManager
-from core.slack_bot import SlackIntegration
+from core.managers import bulk_update, CaseInsensitiveManager
+from core.models.slack import SlackMessage
+from core.slack_outbox import queue_messages
 from core.validator import validate_date
 
-slack = SlackIntegration()
-
 logger = logging.getLogger(__name__)
 
 
+def check_stock_levels(model_number_ids):
+    """Alert the ops channel about model numbers whose stock ran low
+
+    The available assets of all the model numbers are counted with one
+    grouped query. An alert is only sent when a model number drops to its
+    low_stock_threshold, not while it stays there, and at most once every
+    LOW_STOCK_ALERT_COOLDOWN seconds.
+    :params: model_number_ids -> iterable of AssetModelNumber ids
+    """
+    model_numbers = AssetModelNumber.objects.filter(
+        id__in=model_number_ids, low_stock_threshold__isnull=False
+    )
+    available_assets = dict(
+        Asset.objects.filter(
+            current_status=constants.AVAILABLE, model_number__in=model_numbers
+        )
+        .order_by()
+        .values_list("model_number")
+        .annotate(count=Count("id"))
+    )
+    now = timezone.now()
+    cooldown = timedelta(seconds=int(os.getenv("LOW_STOCK_ALERT_COOLDOWN") or 86400))
+    low, restocked, alerted, alerts = [], [], [], []
+    for model_number in model_numbers:
+        available = available_assets.get(model_number.id, 0)
+        if available > model_number.low_stock_threshold:
+            if model_number.low_stock:
+                restocked.append(model_number.id)
+            continue
+        if model_number.low_stock:
+            continue
+        low.append(model_number.id)
+        last_alert = model_number.low_stock_alerted_at
+        if last_alert is None or now - last_alert >= cooldown:
+            alerted.append(model_number.id)
+            message = "Warning!! The number of available {} ".format(
+                model_number
+            ) + " is {}".format(available)
+            alerts.append(SlackMessage(text=message))
+    if restocked:
+        AssetModelNumber.objects.filter(id__in=restocked).update(low_stock=False)
+    if low:
+        AssetModelNumber.objects.filter(id__in=low).update(low_stock=True)
+    if alerted:
+        AssetModelNumber.objects.filter(id__in=alerted).update(low_stock_alerted_at=now)
+    queue_messages(alerts)
+
+
+class StockMonitor(threading.local):
+    """Model numbers whose available assets changed in this thread. Their
+    stock is checked with one grouped count when the transaction commits."""
+
+    def __init__(self):
+        self.model_number_ids = set()
+
+    def add(self, model_number_id):
+        self.model_number_ids.add(model_number_id)
+        # every change registers a check but only the first one finds ids
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        if not self.model_number_ids:
+            return
+        model_number_ids, self.model_number_ids = self.model_number_ids, set()
+        check_stock_levels(model_number_ids)
+
+    def clear(self):
+        self.model_number_ids.clear()
+
+
+stock_monitor = StockMonitor()
+
+# written by AssetLog only, never by saving a possibly stale copy of an asset
+LAST_LOG_FIELDS = ["last_log_type", "last_log_at"]
+# written by the asset transitions with targeted updates. Saving an asset
+# writes them only when they were set on it, never the values a possibly
+# stale copy was loaded with
+TRANSITION_FIELDS = ["current_status", "assigned_to"]
+TRANSITION_ATTNAMES = {
+    "current_status": "current_status",
+    "assigned_to": "assigned_to",
+    "assigned_to_id": "assigned_to",
+}
+
+
+def point_to_last_logs(logs):
+    """Move the last log of the assets of saved AssetLog objects
+
+    :params: logs -> AssetLog objects in the order they were written
+    """
+    assets = {}
+    for log in logs:
+        log.asset.last_log_type = log.log_type
+        log.asset.last_log_at = log.created_at
+        assets[log.asset_id] = log.asset
+    bulk_update(list(assets.values()), LAST_LOG_FIELDS)
+
+
 def user_abstract(user, filename):
     """Return user abstract name.
 
@@ -148,6 +248,15 @@ class AssetModelNumber(models.Model):
     asset_make = models.ForeignKey(
         "AssetMake", null=True, on_delete=models.PROTECT, verbose_name="Asset Make"
     )
+    low_stock_threshold = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        default=0,
+        help_text="ops are alerted when the available assets drop to this number, "
+        "leave empty to never alert",
+    )
+    low_stock = models.BooleanField(default=False, editable=False)
+    low_stock_alerted_at = models.DateTimeField(null=True, blank=True, editable=False)
     objects = CaseInsensitiveManager()
 
     def clean(self):
@@ -252,6 +361,10 @@ class Asset(models.Model):
         blank=True, null=True, max_length=8, choices=constants.SIMCARD_ASSET_OPTIONS
     )
     expiry_date = models.DateTimeField(null=True, blank=True)
+    last_log_type = models.CharField(
+        max_length=10, choices=constants.ASSET_LOG_CHOICES, blank=True, editable=False
+    )
+    last_log_at = models.DateTimeField(null=True, blank=True, editable=False)
     objects = CaseInsensitiveManager()
 
     def __str__(self):
@@ -281,25 +394,59 @@ class Asset(models.Model):
             self.asset_code = self.asset_code.upper()
             self.serial_number = self.serial_number.upper()
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._set_transition_fields = set()
+
+    def __setattr__(self, name, value):
+        if name in TRANSITION_ATTNAMES and "_set_transition_fields" in self.__dict__:
+            self._set_transition_fields.add(TRANSITION_ATTNAMES[name])
+        super().__setattr__(name, value)
+
+    def forget_set_transition_fields(self, fields=None):
+        """Stop writing transition fields the row already holds on save"""
+        if fields is None:
+            self._set_transition_fields.clear()
+        else:
+            self._set_transition_fields.difference_update(fields)
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self.forget_set_transition_fields(
+            None if fields is None else [TRANSITION_ATTNAMES.get(f, f) for f in fields]
+        )
+
     def save(self, *args, **kwargs):
         """
         Validate either asset code, serial number
         are provided and an existing status is given
         """
+        set_transition_fields = set(self._set_transition_fields)
         self.full_clean()
+        # full_clean sets every field again, only the caller's sets count
+        self._set_transition_fields = set_transition_fields
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in LAST_LOG_FIELDS
+                and (
+                    field.name not in TRANSITION_FIELDS
+                    or field.name in self._set_transition_fields
+                )
+            ]
         try:
             super().save(*args, **kwargs)
         except Exception:
             raise
         else:
+            self.forget_set_transition_fields()
             self._save_initial_asset_status()
 
     def _save_initial_asset_status(self):
-        existing_status = AssetStatus.objects.filter(asset=self)
-        if not existing_status:
-            AssetStatus.objects.create(asset=self, current_status=constants.AVAILABLE)
-            self.current_status = constants.AVAILABLE
-            self.save()
+        if not self.current_status:
+            AssetStatus(asset=self, current_status=constants.AVAILABLE).save()
 
     def _get_asset_category(self):
         return self._get_asset_sub_category().asset_category
@@ -411,10 +558,11 @@ class AssetLog(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        log = AssetLog.objects.filter(asset=self.asset).first()
-        if log and log.log_type == self.log_type:
+        if self.asset.last_log_type == self.log_type:
             return None
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            point_to_last_logs([self])
 
     class Meta:
         verbose_name = "Asset Log"
@@ -442,56 +590,9 @@ class AssetStatus(models.Model):
         ordering = ["-id"]
 
     def save(self, *args, **kwargs):
-        try:
-            latest_record = AssetStatus.objects.filter(asset=self.asset).latest(
-                "created_at"
-            )
-            self.previous_status = latest_record.current_status
-        except Exception:
-            self.previous_status = None
-        self.full_clean()
-        try:
-            super().save(*args, **kwargs)
-        except Exception:
-            raise
-        else:
-            self._set_current_status_for_asset()
-            self._check_asset_limit()
-            self._new_allocation_history_when_asset_is_made_available()
-
-    def _set_current_status_for_asset(self):
-        current_asset = self.asset
-        current_asset.current_status = self.current_status
-        if self.current_status == constants.AVAILABLE:
-            current_asset.assigned_to = None
-        current_asset.save()
-
-    def _check_asset_limit(self):
-        """Check the assets have not exceeded the limit"""
-        model_number = self.asset.model_number
-        available_assets = Asset.objects.filter(
-            current_status="Available", model_number=model_number
-        ).count()
-        if available_assets <= int(os.environ.get("ASSET_LIMIT", 0)):
-            message = "Warning!! The number of available {} ".format(
-                model_number
-            ) + " is {}".format(available_assets)
-            slack.send_message(message)
+        from core.asset_transitions import change_status
 
-    def _new_allocation_history_when_asset_is_made_available(self):
-        try:
-            last_allocation_record = AllocationHistory.objects.filter(
-                asset=self.asset
-            ).latest("created_at")
-        except Exception as e:
-            logger.warning(str(e))
-        else:
-            if self.current_status == constants.AVAILABLE and last_allocation_record:
-                AllocationHistory.objects.create(
-                    asset=self.asset,
-                    previous_assignee=last_allocation_record.current_assignee,
-                    current_assignee=None,
-                )
+        change_status(self, *args, **kwargs)
 
 
 class AllocationHistory(models.Model):
@@ -532,35 +633,13 @@ class AllocationHistory(models.Model):
             raise ValidationError("You can only allocate available assets")
 
     def save(self, *args, **kwargs):
-        self.full_clean()
-        try:
-            latest_record = AllocationHistory.objects.filter(asset=self.asset).latest(
-                "created_at"
-            )
-            self.previous_assignee = latest_record.current_assignee
-        except Exception:
-            self.previous_assignee = None
-        try:
-            super().save(*args, **kwargs)
-        except Exception:
-            raise
-        else:
-            asset = self.asset
-            asset.assigned_to = self.current_assignee
-            asset.save()
-            self._create_asset_status_when_asset_is_allocated()
-            self._send_notification()
-
-    def _create_asset_status_when_asset_is_allocated(self):
-        last_status = AssetStatus.objects.filter(asset=self.asset).latest("created_at")
-        if self.current_assignee:
-            AssetStatus.objects.create(
-                asset=self.asset,
-                current_status=constants.ALLOCATED,
-                previous_status=last_status.current_status,
-            )
+        from core.asset_transitions import allocate
+
+        allocate(self, *args, **kwargs)
 
-    def _send_notification(self):
+    def get_notification(self):
+        """Return the (message, user) telling the assignee about this
+        allocation, or None when there is nobody to tell"""
         asset = self.asset
         assignee = None
         serial_no = asset.serial_number
@@ -583,7 +662,8 @@ class AllocationHistory(models.Model):
             assignee = self.previous_assignee
 
         if assignee and hasattr(assignee, "email"):
-            slack.send_message(message, user=assignee.user)
+            return message, assignee.user
+        return None
 
 
 class AssetCondition(models.Model):
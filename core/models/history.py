@@ -8,15 +8,21 @@ from core import constants
 class History(models.Model):
     table_name = models.CharField(max_length=255, blank=False, editable=False)
     user = models.ForeignKey("User", on_delete=models.PROTECT)
-    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True, editable=False, db_index=True)
     item_id = models.CharField(max_length=255, null=False, blank=False, editable=False)
     action = models.CharField(
         max_length=7, null=False, blank=False, choices=constants.ACTIONS, editable=False
     )
+    # JSON of {field: [old value, new value]} of the fields that changed, kept
+    # as text because rows recorded before the diffs hold plain text bodies
     body = models.TextField(default="", editable=False)
 
     class Meta:
         verbose_name_plural = "History model"
+        indexes = [
+            models.Index(fields=["table_name", "item_id", "created_at"]),
+            models.Index(fields=["user", "created_at"]),
+        ]
 
     def __str__(self):
         return self.action
@@ -0,0 +1,127 @@
+# Standard Library
+from datetime import timedelta
+
+# Third-Party Imports
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django_q.conf import Conf
+
+# App Imports
+from core import constants
+
+
+class AssetImportJob(models.Model):
+    """Tracks a csv file of assets imported by a django_q worker.
+
+    The upload and the rows skipped so far are kept in the row itself, as
+    the worker and web dynos do not share a filesystem.
+    """
+
+    filename = models.CharField(max_length=255, blank=True, default="")
+    data = models.BinaryField(default=b"")
+    skipped_records = models.TextField(blank=True, default="")
+    created_by = models.ForeignKey(
+        "User",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="asset_import_jobs",
+    )
+    status = models.CharField(
+        max_length=20, choices=constants.JOB_STATUSES, default=constants.JOB_PENDING
+    )
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    skipped_rows = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+    last_modified = models.DateTimeField(auto_now=True, editable=False)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.filename}: {self.status}"
+
+    STALE_ERROR = "The import stopped before it finished"
+
+    @staticmethod
+    def stale_cutoff():
+        """Unfinished jobs no worker has written to since have stopped: their
+        task ran out of time and the broker has delivered it again"""
+        return timezone.now() - timedelta(
+            seconds=settings.ASSET_IMPORT_TIMEOUT + Conf.RETRY
+        )
+
+    @property
+    def is_stale(self):
+        return (
+            self.status in constants.UNFINISHED_JOB_STATUSES
+            and self.last_modified < self.stale_cutoff()
+        )
+
+    @property
+    def remaining_rows(self):
+        return max(self.total_rows - self.processed_rows, 0)
+
+    @property
+    def skipped_file_name(self):
+        """Name of the csv file the rows skipped by this job are downloaded as"""
+        return f"asset-import-{self.id}.csv"
+
+
+class AssetExportJob(models.Model):
+    """Tracks an xlsx export of assets built by a django_q worker.
+
+    Jobs are keyed by a hash of the location, filters and state of the
+    exported assets, so a finished export is reused until the assets change.
+    The workbook is kept in the row itself, as the worker and web dynos do
+    not share a filesystem.
+    """
+
+    key = models.CharField(max_length=64, db_index=True)
+    location = models.ForeignKey(
+        "AndelaCentre", null=True, blank=True, on_delete=models.SET_NULL
+    )
+    filters = models.TextField(default="{}")
+    data = models.BinaryField(default=b"")
+    created_by = models.ForeignKey(
+        "User",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="asset_export_jobs",
+    )
+    status = models.CharField(
+        max_length=20, choices=constants.JOB_STATUSES, default=constants.JOB_PENDING
+    )
+    asset_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+    last_modified = models.DateTimeField(auto_now=True, editable=False)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.key}: {self.status}"
+
+    STALE_ERROR = "The export stopped before it finished"
+
+    @staticmethod
+    def stale_cutoff():
+        """Unfinished jobs not written to since have stopped, as the worker
+        stops their task after ASSET_EXPORT_TIMEOUT"""
+        return timezone.now() - timedelta(seconds=settings.ASSET_EXPORT_TIMEOUT)
+
+    @property
+    def is_stale(self):
+        return (
+            self.status in constants.UNFINISHED_JOB_STATUSES
+            and self.last_modified < self.stale_cutoff()
+        )
+
+    @property
+    def filename(self):
+        return f"asset-export-{self.key}.xlsx"
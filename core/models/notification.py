@@ -65,6 +65,10 @@ class Notifications(models.Model):
     )
     emailed_at = models.DateField(blank=True, null=True)
 
+    class Meta:
+        # serves the unread count and the unread listing of a user
+        indexes = [models.Index(fields=["target", "read"])]
+
     def timesince(self, now=datetime.datetime.now()):
         """
         get the time since the notification was created to the time specified
@@ -0,0 +1,52 @@
+# Third-Party Imports
+from django.db import models
+from django.utils import timezone
+
+# App Imports
+from core import constants
+
+
+class SlackDirectoryEntry(models.Model):
+    """ Slack ID of a member of the slack workspace, refreshed in bulk """
+
+    email = models.EmailField(unique=True)
+    slack_id = models.CharField(max_length=50)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Slack Directory"
+        ordering = ["email"]
+
+    def __str__(self):
+        return "{} - {}".format(self.email, self.slack_id)
+
+
+class SlackMessage(models.Model):
+    """ A slack message in the outbox drained by the django_q worker """
+
+    text = models.TextField()
+    user = models.ForeignKey(
+        "User",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="slack_messages",
+    )
+    channel = models.CharField(max_length=80, blank=True, default="")
+    status = models.CharField(
+        max_length=20,
+        choices=constants.OUTBOX_STATUSES,
+        default=constants.OUTBOX_PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return "{} - {}".format(self.user or self.channel or "ops", self.status)
@@ -136,6 +136,8 @@ class AISUserSync(models.Model):
     running_time = models.DurationField(blank=True, null=True)
     successful = models.BooleanField(blank=True, null=True)
     updated_records = models.IntegerField(blank=True, null=True)
+    # latest AIS updated_at seen by the sync, the next one starts from it
+    high_water_mark = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         verbose_name = "AIS User Sync"
@@ -0,0 +1,7 @@
+# Third-Party Imports
+from django.dispatch import Signal
+
+# sent by the bulk writes, which skip the post_save of every row, with the
+# model of the rows, the saved instances, whether they were created and, for
+# writes made outside of a request, the user they were made for
+bulk_saved = Signal(providing_args=["instances", "created", "user"])
@@ -2,9 +2,13 @@
 import json
 import logging
 import os
+import threading
+from datetime import timedelta
 
 # Third-Party Imports
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
 from slackclient import SlackClient
 
 # App Imports
@@ -13,6 +17,103 @@ from core.constants import DAMAGE, LOSS
 logger = logging.getLogger(__name__)
 
 
+def get_slack_directory_ttl():
+    return timedelta(seconds=int(os.getenv("SLACK_DIRECTORY_TTL") or 3600))
+
+
+class SlackDirectory(object):
+    """Email -> slack ID of the members of the slack workspace
+
+    The directory is refreshed in bulk from users.list and persisted in
+    SlackDirectoryEntry, so every process reads it from the database once per
+    refresh and looks emails up in memory. It is trusted for
+    SLACK_DIRECTORY_TTL seconds after a refresh.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+
+    def is_fresh(self):
+        return bool(
+            self.refreshed_at
+            and timezone.now() - self.refreshed_at < get_slack_directory_ttl()
+        )
+
+    def get(self, email, slack):
+        """Return the slack ID of an email, refreshing a stale directory
+
+        :params: slack -> SlackIntegration used for the refresh
+        :returns: slack ID or None when the email is not on slack
+        """
+        with self._lock:
+            if not self.is_fresh():
+                self.load()
+            if not self.is_fresh():
+                self.refresh(slack)
+        return self.entries.get(email.lower())
+
+    def load(self):
+        """Read the directory persisted by the last refresh of any process"""
+        from core.models import SlackDirectoryEntry
+
+        entries = SlackDirectoryEntry.objects.values_list(
+            "email", "slack_id", "refreshed_at"
+        )
+        self.entries = {}
+        self.refreshed_at = None
+        for email, slack_id, refreshed_at in entries:
+            self.entries[email] = slack_id
+            self.refreshed_at = refreshed_at
+
+    def refresh(self, slack):
+        """Replace the directory with the members listed by slack"""
+        from core.models import SlackDirectoryEntry
+
+        entries = slack.list_member_ids()
+        if entries is None:
+            return
+        refreshed_at = timezone.now()
+        with transaction.atomic():
+            SlackDirectoryEntry.objects.all().delete()
+            SlackDirectoryEntry.objects.bulk_create(
+                SlackDirectoryEntry(
+                    email=email, slack_id=slack_id, refreshed_at=refreshed_at
+                )
+                for email, slack_id in entries.items()
+            )
+        self.entries = entries
+        self.refreshed_at = refreshed_at
+
+    def clear(self):
+        with self._lock:
+            self.entries = {}
+            self.refreshed_at = None
+
+
+slack_directory = SlackDirectory()
+
+
+class StubSlackClient(object):
+    """Answers slack API calls locally, treating every ART user as a member of
+    the workspace. Every call is recorded in `calls` so it can be counted."""
+
+    def __init__(self):
+        self.calls = []
+
+    def api_call(self, method, **kwargs):
+        self.calls.append((method, kwargs))
+        if method == "users.list":
+            users = get_user_model().objects.values_list("id", "email")
+            members = [
+                {"id": "U{}".format(user_id), "profile": {"email": email}}
+                for user_id, email in users
+            ]
+            return {"ok": True, "members": members, "response_metadata": {}}
+        return {"ok": True}
+
+
 class SlackIntegration(object):
     """Slack Integration class"""
 
@@ -20,30 +121,16 @@ class SlackIntegration(object):
         """set the slack token"""
         slack_token = os.getenv("SLACK_TOKEN")
         self.incidence_ts = {}
-        if slack_token:
+        if os.getenv("SLACK_BACKEND") == "stub":
+            self.slack_client = StubSlackClient()
+        elif slack_token:
             self.slack_client = SlackClient(slack_token)
 
-    def process_user_data(self, users, email):
-        found = False
-        user_id = None
-        for member in users:
-            profile = member.get("profile")
-            if profile and profile.get("email") == email:
-                user_id = member.get("id")
-                found = True
-        return user_id, found
+    def list_member_ids(self):
+        """Page through users.list and map the member emails to their IDs
 
-    def get_user_slack_id(self, user):
-        """Get the slack user ID using the user email"""
-        saved_user_id = user.slack_id
-        user_email = user.email
-        user_id = None
-        if saved_user_id:
-            email = self.get_user_slack_email(saved_user_id)
-            if email == user_email:
-                logger.info(f"Existing Slack ID valid.")
-                return saved_user_id
-        next_cursor = None
+        :returns: dict of email -> slack ID or None when slack cannot be reached
+        """
         slack_limit = os.getenv("SLACK_LIMIT", "1000")
 
         # slack_calls: To safeguard against too many calls to slack
@@ -53,32 +140,38 @@ class SlackIntegration(object):
             slack_calls = int(slack_calls)
         except Exception:
             slack_calls = 10
-        user_id = None
-        cycles = 1
-        response = self.slack_client.api_call("users.list", limit=slack_limit)
-        if not response.get("ok"):
-            logger.error("Unable to connect to slack")
-            return None
-        users = response.get("members")
-        user_id, found = self.process_user_data(users, user_email)
-
-        while not found:
-            metadata = response.get("response_metadata")
-            next_cursor = metadata.get("next_cursor")
-            if not next_cursor or cycles >= slack_calls:
+        members = {}
+        cursor = None
+        for cycles in range(1, slack_calls + 1):
+            params = {"limit": slack_limit}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.slack_client.api_call("users.list", **params)
+            if not response.get("ok"):
+                logger.error("Unable to connect to slack")
+                return None
+            for member in response.get("members") or []:
+                email = (member.get("profile") or {}).get("email")
+                if email and member.get("id"):
+                    members[email.lower()] = member["id"]
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
                 break
-            cycles += 1
-            response = self.slack_client.api_call(
-                "users.list", limit=slack_limit, cursor=next_cursor
-            )
-            users = response.get("members")
-            user_id, found = self.process_user_data(users, user_email)
-        if user_id:
+        logger.info(f"No of Slack requests: {cycles}")
+        return members
+
+    def get_user_slack_id(self, user):
+        """Get the slack user ID of a user from the slack directory"""
+        user_id = slack_directory.get(user.email, self)
+        if not slack_directory.is_fresh():
+            # slack could not be reached, the saved ID is the best guess
+            return user.slack_id
+        if not user_id:
+            logger.error(f"User not found on slack for {user.email}")
+            return None
+        if user.slack_id != user_id:
             user.slack_id = user_id
-            user.save()
-            logger.info(f"No of Slack requests: {cycles}")
-            return user_id
-        logger.error(f"User not found for {user_email} after {cycles} requests")
+            get_user_model().objects.filter(pk=user.pk).update(slack_id=user_id)
         return user_id
 
     def send_message(self, message, user=None, channel=None):
@@ -0,0 +1,216 @@
+# Standard Library
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+# Third-Party Imports
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+from django_q.conf import Conf
+from django_q.models import Schedule
+from django_q.tasks import async_task
+
+# App Imports
+from core import constants
+from core.models.slack import SlackMessage
+from core.slack_bot import SlackIntegration
+
+logger = logging.getLogger(__name__)
+
+DRAIN_TASK = "core.slack_outbox.drain_outbox"
+DRAIN_SCHEDULE = "drain-slack-outbox"
+
+
+class OutboxDrain(threading.local):
+    """Sends one drain task to the django_q cluster per transaction that put
+    messages in the outbox, once the transaction commits"""
+
+    def __init__(self):
+        self.pending = False
+
+    def add(self):
+        self.pending = True
+        # every message registers a flush but only the first one drains
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.pending = False
+        async_task(DRAIN_TASK)
+
+
+outbox_drain = OutboxDrain()
+
+
+def queue_message(message, user=None, channel=None):
+    """Put a slack message in the outbox
+
+    :params: user -> User the message is sent to
+    :params: channel -> channel the message is posted to when there is no
+    user, the ops channel when neither is set
+    """
+    queue_messages([SlackMessage(text=message, user=user, channel=channel or "")])
+
+
+def queue_messages(messages):
+    """Put unsaved SlackMessage objects in the outbox with one insert"""
+    if not messages:
+        return
+    SlackMessage.objects.bulk_create(messages)
+    outbox_drain.add()
+
+
+def get_retry_delay(attempts):
+    """Full jitter: a random delay up to an exponentially growing cap"""
+    base = int(os.getenv("SLACK_RETRY_TIMEOUT") or 30)
+    cap = min(int(os.getenv("SLACK_RETRY_MAX_TIMEOUT") or 3600), base * 2 ** attempts)
+    return timedelta(seconds=random.uniform(0, cap))
+
+
+def coalesce(messages):
+    """Join the texts of messages to one recipient into as few posts as fit
+    the slack message limit
+
+    :returns: list of (text, messages) posts
+    """
+    limit = int(os.getenv("SLACK_MESSAGE_LIMIT") or 4000)
+    posts = []
+    for message in messages:
+        if posts and len(posts[-1][0]) + len(message.text) + 2 <= limit:
+            text, grouped = posts[-1]
+            posts[-1] = ("\n\n".join([text, message.text]), grouped + [message])
+        else:
+            posts.append((message.text, [message]))
+    return posts
+
+
+def drain_outbox():
+    """Send the pending messages of the outbox
+
+    Runs on the django_q cluster. Messages to the same user or channel are
+    coalesced, posts are spaced SLACK_POST_INTERVAL seconds apart and failed
+    posts are retried with exponential backoff until SLACK_MAX_ATTEMPTS.
+    A rate limited post defers every message left in the batch. The batch
+    is claimed first so concurrent drains never send the same message, and
+    posting stops in time to finish within the task timeout.
+    """
+    slack = SlackIntegration()
+    interval = float(os.getenv("SLACK_POST_INTERVAL") or 1)
+    max_attempts = int(os.getenv("SLACK_MAX_ATTEMPTS") or 5)
+    budget = get_drain_budget()
+    deadline = time.monotonic() + budget
+    batch_size = int(os.getenv("SLACK_OUTBOX_BATCH_SIZE") or 100)
+    if interval:
+        batch_size = min(batch_size, max(1, int(budget / interval)))
+    messages = claim_messages(batch_size)
+    # (user, channel) -> messages, in the order they were queued
+    recipients = OrderedDict()
+    for message in messages:
+        recipients.setdefault((message.user_id, message.channel), []).append(message)
+    posts = [post for queued in recipients.values() for post in coalesce(queued)]
+    for index, (text, grouped) in enumerate(posts):
+        if index:
+            if time.monotonic() + interval >= deadline:
+                _release([queued for _, rest in posts[index:] for queued in rest])
+                break
+            time.sleep(interval)
+        message = grouped[0]
+        resp = slack.send_message(text, user=message.user, channel=message.channel)
+        if resp.get("ok"):
+            _mark_sent(grouped)
+            continue
+        error = resp.get("error") or "Message not delivered"
+        if error == "ratelimited":
+            deferred = [queued for _, rest in posts[index:] for queued in rest]
+            _retry(deferred, error, max_attempts, count_attempt=False)
+            break
+        _retry(grouped, error, max_attempts)
+    schedule_drain()
+
+
+def get_drain_budget():
+    """Seconds a drain may spend posting, half the task timeout so the posts
+    in flight and the bookkeeping finish before the worker is stopped"""
+    return (Conf.TIMEOUT or 60) / 2
+
+
+def claim_messages(batch_size):
+    """Lease the next batch of due messages to the calling drain
+
+    The rows are locked while their next attempt is moved past the task
+    timeout, so another drain skips them, and a drain that is killed leaves
+    them to be sent again once the lease runs out.
+    """
+    lease = timedelta(seconds=Conf.TIMEOUT or 60)
+    with transaction.atomic():
+        messages = list(
+            SlackMessage.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("user")
+            .filter(
+                status=constants.OUTBOX_PENDING, next_attempt_at__lte=timezone.now()
+            )[:batch_size]
+        )
+        SlackMessage.objects.filter(id__in=[message.id for message in messages]).update(
+            next_attempt_at=timezone.now() + lease
+        )
+    return messages
+
+
+def schedule_drain():
+    """Drain the outbox again when messages are due now or later
+
+    A later drain reuses the one outbox schedule, moving it to the next
+    attempt, rather than adding a schedule per drain.
+    """
+    next_attempt_at = SlackMessage.objects.filter(
+        status=constants.OUTBOX_PENDING
+    ).aggregate(next_attempt_at=Min("next_attempt_at"))["next_attempt_at"]
+    if not next_attempt_at:
+        return
+    if next_attempt_at <= timezone.now():
+        async_task(DRAIN_TASK)
+    else:
+        Schedule.objects.update_or_create(
+            name=DRAIN_SCHEDULE,
+            defaults={
+                "func": DRAIN_TASK,
+                "schedule_type": Schedule.ONCE,
+                "repeats": -1,
+                "next_run": next_attempt_at,
+            },
+        )
+
+
+def _release(messages):
+    """Hand claimed messages that were not posted back to the next drain"""
+    SlackMessage.objects.filter(id__in=[message.id for message in messages]).update(
+        next_attempt_at=timezone.now()
+    )
+
+
+def _mark_sent(messages):
+    SlackMessage.objects.filter(id__in=[message.id for message in messages]).update(
+        status=constants.OUTBOX_SENT,
+        sent_at=timezone.now(),
+        attempts=F("attempts") + 1,
+        error="",
+    )
+
+
+def _retry(messages, error, max_attempts, count_attempt=True):
+    logger.warning("Unable to send slack message: {}".format(error))
+    for message in messages:
+        if count_attempt:
+            message.attempts += 1
+        message.error = error
+        if message.attempts >= max_attempts:
+            message.status = constants.OUTBOX_FAILED
+        else:
+            message.next_attempt_at = timezone.now() + get_retry_delay(message.attempts)
+        message.save(update_fields=["attempts", "error", "status", "next_attempt_at"])
@@ -5,7 +5,7 @@ from django.core.exceptions import ValidationError
 # App Imports
 from core.tests import CoreBaseTestCase
 
-from ..models import AllocationHistory, AssetStatus
+from ..models import AllocationHistory, Asset, AssetStatus
 
 User = get_user_model()
 
@@ -41,3 +41,47 @@ class AllocationHistoryModelTest(CoreBaseTestCase):
             )
 
         self.assertEqual(AllocationHistory.objects.count(), initial_count)
+
+    def test_allocation_writes_a_fixed_number_of_queries(self):
+        """Lock the asset, insert the history and status rows, update the
+        asset, read the assignee's user and queue the notification, inside
+        one savepoint"""
+        with self.assertNumQueries(8):
+            AllocationHistory.objects.create(
+                asset=self.test_asset_2, current_assignee=self.asset_assignee2
+            )
+
+        asset = Asset.objects.get(id=self.test_asset_2.id)
+        self.assertEqual(asset.current_status, "Allocated")
+        self.assertEqual(asset.assigned_to, self.asset_assignee2)
+        self.assertEqual(self.test_asset_2.assigned_to, self.asset_assignee2)
+
+    def test_allocation_checks_the_stored_status_of_the_asset(self):
+        Asset.objects.filter(id=self.test_asset_2.id).update(current_status="Damaged")
+
+        with self.assertRaises(ValidationError):
+            AllocationHistory.objects.create(
+                asset=self.test_asset_2, current_assignee=self.asset_assignee2
+            )
+
+    def test_saving_a_stale_copy_keeps_the_allocation(self):
+        stale = Asset.objects.get(id=self.test_asset_2.id)
+        AllocationHistory.objects.create(
+            asset=self.test_asset_2, current_assignee=self.asset_assignee2
+        )
+
+        stale.notes = "edited"
+        stale.save()
+
+        asset = Asset.objects.get(id=self.test_asset_2.id)
+        self.assertEqual(asset.notes, "edited")
+        self.assertEqual(asset.current_status, "Allocated")
+        self.assertEqual(asset.assigned_to, self.asset_assignee2)
+
+    def test_saving_a_set_status_writes_it(self):
+        asset = Asset.objects.get(id=self.test_asset_2.id)
+        asset.current_status = "Damaged"
+        asset.save()
+
+        asset = Asset.objects.get(id=self.test_asset_2.id)
+        self.assertEqual(asset.current_status, "Damaged")
@@ -1,5 +1,9 @@
+# Standard Library
+from unittest.mock import patch
+
 # Third-Party Imports
 from django.apps import apps
+from django_q.conf import Conf
 from rest_framework.reverse import reverse
 
 # App Imports
@@ -30,6 +34,8 @@ class AssetIncidentReportModelTest(CoreBaseTestCase):
         )
 
 
+@patch.object(Conf, "SYNC", True)
+@patch("api.signals.transaction.on_commit", lambda func: func())
 class TestAssetIncidentReportNotifications(CoreBaseTestCase):
     """
     Test that notifications are created when asset incident reports are created
@@ -1,8 +1,13 @@
+# Standard Library
+from unittest.mock import patch
+
 # Third-Party Imports
 from django.core.exceptions import ValidationError
 from django.db.models.deletion import ProtectedError
 
 # App Imports
+from core.models import Asset, AssetStatus, SlackMessage
+from core.models.asset import check_stock_levels, stock_monitor
 from core.tests import CoreBaseTestCase
 
 from ..models import AssetCategory, AssetMake, AssetModelNumber
@@ -36,3 +41,71 @@ class AssetModelNumberTestCase(CoreBaseTestCase):
     def test_cannot_add_asset_model_with_non_existing_make(self):
         with self.assertRaises(ValueError):
             AssetModelNumber.objects.create(name="Test Model Number", asset_make=39090)
+
+
+class StockLevelTestCase(CoreBaseTestCase):
+    def setUp(self):
+        self.model_number = AssetModelNumber.objects.create(
+            name="LOWSTOCK1", asset_make=self.asset_make, low_stock_threshold=1
+        )
+        self.assets = [
+            Asset.objects.create(
+                asset_code="LS00{}".format(number),
+                serial_number="LSSN00{}".format(number),
+                model_number=self.model_number,
+                purchase_date="2018-07-10",
+            )
+            for number in range(2)
+        ]
+
+    def set_status(self, asset, status):
+        AssetStatus.objects.create(asset=asset, current_status=status)
+
+    def alerts(self):
+        return SlackMessage.objects.filter(text__contains=self.model_number.name)
+
+    def test_alert_is_sent_once_when_the_stock_drops_to_the_threshold(self):
+        check_stock_levels([self.model_number.id])
+        self.assertFalse(self.alerts().exists())
+
+        self.set_status(self.assets[0], "Damaged")
+        check_stock_levels([self.model_number.id])
+        check_stock_levels([self.model_number.id])
+
+        self.assertEqual(self.alerts().count(), 1)
+        self.model_number.refresh_from_db()
+        self.assertTrue(self.model_number.low_stock)
+
+    def test_alerts_are_not_repeated_within_the_cooldown(self):
+        self.set_status(self.assets[0], "Damaged")
+        check_stock_levels([self.model_number.id])
+        self.set_status(self.assets[0], "Available")
+        check_stock_levels([self.model_number.id])
+        self.model_number.refresh_from_db()
+        self.assertFalse(self.model_number.low_stock)
+
+        self.set_status(self.assets[0], "Damaged")
+        check_stock_levels([self.model_number.id])
+        self.assertEqual(self.alerts().count(), 1)
+
+        self.set_status(self.assets[0], "Available")
+        check_stock_levels([self.model_number.id])
+        self.set_status(self.assets[0], "Damaged")
+        with patch.dict("os.environ", {"LOW_STOCK_ALERT_COOLDOWN": "0"}):
+            check_stock_levels([self.model_number.id])
+        self.assertEqual(self.alerts().count(), 2)
+
+    def test_status_changes_are_checked_once_per_transaction(self):
+        stock_monitor.clear()
+        on_commit = []
+        with patch("core.models.asset.transaction.on_commit", on_commit.append):
+            for asset in self.assets + [self.test_asset]:
+                self.set_status(asset, "Damaged")
+
+        with patch("core.models.asset.check_stock_levels") as mock_check:
+            for func in on_commit:
+                func()
+
+        mock_check.assert_called_once_with(
+            {self.model_number.id, self.test_assetmodel.id}
+        )
@@ -75,3 +75,18 @@ class AssetStatusModelTest(CoreBaseTestCase):
         self.assertIsNone(self.test_asset.assigned_to)
         self.assertIsNone(new_history.current_assignee)
         self.assertIn(str(new_history.previous_assignee), "test@andela.com")
+
+    def test_status_change_writes_a_fixed_number_of_queries(self):
+        """Lock the asset, insert the status and update the asset, inside
+        one savepoint"""
+        with self.assertNumQueries(5):
+            AssetStatus.objects.create(
+                asset=self.test_asset_2, current_status="Damaged"
+            )
+
+        asset = Asset.objects.get(id=self.test_asset_2.id)
+        self.assertEqual(asset.current_status, "Damaged")
+        self.assertEqual(
+            AssetStatus.objects.filter(asset=asset).latest("id").previous_status,
+            "Available",
+        )
@@ -0,0 +1,210 @@
+# Standard Library
+import ast
+import csv
+import io
+import json
+from unittest.mock import patch
+
+# Third-Party Imports
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# App Imports
+from core import assets_import_helper
+from core.assets_import_helper import DictReaderStrip, ImportContext, process_file
+from core.models import AllocationHistory, Asset, AssetModelNumber, AssetStatus
+from core.models.history import History
+from core.models.job import AssetImportJob
+from core.tests import CoreBaseTestCase
+
+
+def read_skipped_records(path):
+    with open(path) as skipped_file:
+        return {
+            int(row["Row"]): ast.literal_eval(row["Error"])
+            for row in csv.DictReader(skipped_file)
+        }
+
+
+def asset_row(**values):
+    row = {
+        "Category": "Computer",
+        "Sub-Category": "Computer Accessories",
+        "Type": "Accessory",
+        "Make": "Sades",
+        "Model Number": "12345",
+        "Asset Code": "",
+        "Serial No.": "",
+        "Assigned To": "",
+        "Status": "",
+        "Memory": "",
+        "Verified": "",
+        "Notes": "",
+        "Storage": "",
+        "Processor Type": "",
+        "YOM": "",
+    }
+    row.update(values)
+    return row
+
+
+class AssetsImportHelperTestCase(CoreBaseTestCase):
+    def test_import_creates_taxonomy_assets_and_history(self):
+        rows = [
+            asset_row(
+                **{
+                    "Category": "Furniture",
+                    "Sub-Category": "Seats",
+                    "Type": "Chair",
+                    "Make": "Ikea",
+                    "Model Number": "Markus",
+                    "Asset Code": "imp/001",
+                    "Assigned To": "new.importee@andela.com",
+                    "Notes": "scratched",
+                    "Verified": "No",
+                }
+            ),
+            asset_row(**{"Serial No.": "impsn002", "Status": "Damaged"}),
+        ]
+
+        self.assertTrue(process_file(rows, user=self.user))
+
+        model_number = AssetModelNumber.objects.get(name="MARKUS")
+        self.assertEqual(
+            model_number.asset_make.asset_type.asset_sub_category.asset_category.name,
+            "Furniture",
+        )
+        allocated = Asset.objects.get(asset_code="IMP/001")
+        self.assertEqual(allocated.model_number, model_number)
+        self.assertEqual(allocated.current_status, "Allocated")
+        self.assertEqual(allocated.assigned_to.user.email, "new.importee@andela.com")
+        self.assertEqual(allocated.notes, "scratched")
+        self.assertFalse(allocated.verified)
+        self.assertEqual(
+            AllocationHistory.objects.get(asset=allocated).assigner, self.user
+        )
+        damaged = Asset.objects.get(serial_number="IMPSN002")
+        self.assertEqual(damaged.current_status, "Damaged")
+        self.assertEqual(
+            list(
+                AssetStatus.objects.filter(asset=damaged)
+                .order_by("id")
+                .values_list("previous_status", "current_status")
+            ),
+            [(None, "Available"), ("Available", "Damaged")],
+        )
+
+    @patch("api.history.transaction.on_commit", lambda func: func())
+    def test_import_records_the_history_of_the_rows_it_writes(self):
+        rows = [asset_row(**{"Asset Code": "imp/201"})]
+
+        self.assertTrue(process_file(rows, user=self.user))
+
+        asset = Asset.objects.get(asset_code="IMP/201")
+        row = History.objects.get(table_name="core_asset", item_id=str(asset.id))
+        self.assertEqual(row.user, self.user)
+        self.assertEqual(row.action, "POST")
+        self.assertEqual(json.loads(row.body)["asset_code"], [None, "IMP/201"])
+
+    def test_import_skips_invalid_and_duplicate_rows(self):
+        count = Asset.objects.count()
+        rows = [
+            asset_row(**{"Asset Code": "IC001"}),
+            asset_row(**{"Asset Code": "imp/101", "Model Number": ""}),
+            asset_row(),
+            asset_row(**{"Asset Code": "imp/102"}),
+            asset_row(**{"Asset Code": "imp/102"}),
+        ]
+
+        context = ImportContext(filename="test-import-skips")
+        self.assertFalse(process_file(rows, user=self.user, context=context))
+
+        self.assertEqual(Asset.objects.count(), count + 1)
+        self.assertEqual(context.processed_rows, 5)
+        self.assertEqual(context.skipped_rows, 4)
+        self.assertEqual(context.imported_rows, 1)
+        errors = read_skipped_records(context.path)
+        self.assertEqual(sorted(errors), [0, 1, 2, 4])
+        self.assertIn("Asset with this Asset code already exists.", errors[0].pop())
+        self.assertEqual(errors[1], {"model_number"})
+        self.assertEqual(errors[2], {"asset_code", "serial_number"})
+
+    def test_import_context_merges_errors_of_a_row_and_writes_them_on_flush(self):
+        context = ImportContext(filename="test-import-context")
+        with context:
+            context.record_errors(asset_row(), 3, ["asset_code"])
+            context.record_errors(asset_row(), 3, ["serial_number"])
+            context.flush(4)
+
+            self.assertEqual(context.errors, {})
+            self.assertEqual(
+                read_skipped_records(context.path), {3: {"asset_code", "serial_number"}}
+            )
+            context.record_errors(asset_row(), 5, ["model_number"])
+
+        self.assertEqual(context.skipped_rows, 2)
+        self.assertEqual(context.processed_rows, 4)
+        self.assertEqual(sorted(read_skipped_records(context.path)), [3, 5])
+
+    def test_import_queries_do_not_grow_with_the_number_of_rows(self):
+        def import_rows(prefix, number_of_rows):
+            rows = [
+                asset_row(
+                    **{
+                        "Asset Code": "{}/{}".format(prefix, row_id),
+                        "Assigned To": self.user.email,
+                        "Notes": "new",
+                    }
+                )
+                for row_id in range(number_of_rows)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                process_file(rows, user=self.user)
+            return len(context.captured_queries)
+
+        self.assertEqual(import_rows("few", 2), import_rows("many", 20))
+
+    def test_import_job_delivered_again_resumes_after_its_last_chunk(self):
+        rows = [asset_row(**{"Asset Code": "res/{}".format(i)}) for i in range(3)]
+        csv_file = io.StringIO()
+        writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        job = AssetImportJob.objects.create(
+            filename="resumed.csv",
+            data=csv_file.getvalue().encode(),
+            created_by=self.user,
+            status="running",
+            processed_rows=1,
+        )
+
+        assets_import_helper.run_import_job(job.id)
+        assets_import_helper.run_import_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "completed")
+        self.assertEqual((job.total_rows, job.processed_rows), (3, 3))
+        self.assertEqual(
+            sorted(
+                Asset.objects.filter(asset_code__startswith="RES/").values_list(
+                    "asset_code", flat=True
+                )
+            ),
+            ["RES/1", "RES/2"],
+        )
+
+    def test_read_rows_returns_none_when_rows_have_no_values(self):
+        csv_reader = DictReaderStrip(
+            io.StringIO("Asset Code,Model Number,\n , ,\n,,\n"), delimiter=","
+        )
+
+        self.assertIsNone(csv_reader.read_rows())
+
+    def test_read_rows_streams_rows_after_the_first_value(self):
+        lines = iter(["Asset Code,Model Number\n", ",\n", "imp/201,\n", "imp/202,\n"])
+        csv_reader = DictReaderStrip(lines, delimiter=",")
+
+        csv_rows = csv_reader.read_rows()
+
+        self.assertEqual(next(lines), "imp/202,\n")
+        self.assertEqual([row["Asset Code"] for row in csv_rows], ["", "imp/201"])
@@ -3,10 +3,12 @@ from unittest.mock import patch
 
 # Third-Party Imports
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
 # App Imports
-from core.slack_bot import SlackIntegration
+from core.models import SlackDirectoryEntry
+from core.slack_bot import slack_directory, SlackIntegration
 
 User = get_user_model()
 
@@ -109,6 +111,7 @@ class SlackIntegrationTestCase(TestCase):
         cls.patch_firebase.start()
 
     def setUp(self):
+        slack_directory.clear()
         self.slack = SlackIntegration()
         self.user, _ = User.objects.get_or_create(
             email="slacktest@andela.com",
@@ -168,9 +171,9 @@ class SlackIntegrationTestCase(TestCase):
         fake_slack.side_effect = side_effect_success
         self.slack.send_message("existing_slack_id", user=self.user)
 
-        # 2 calls for existing id - info and send message
+        # 2 calls for existing id - directory refresh and send message
         self.assertEqual(fake_slack.call_count, 2)
-        fake_slack.assert_any_call("users.info", user=self.user.slack_id)
+        fake_slack.assert_any_call("users.list", limit=self.env_vars.get("SLACK_LIMIT"))
         fake_slack.assert_any_call(
             "chat.postMessage",
             channel=self.user.slack_id,
@@ -220,6 +223,35 @@ class SlackIntegrationTestCase(TestCase):
         resp = self.slack.send_message("should error", user=self.user2)
         self.assertFalse(resp.get("ok"))
 
+    @patch("core.slack_bot.SlackClient.api_call")
+    def test_directory_is_reused_until_it_expires(self, fake_slack):
+        fake_slack.side_effect = side_effect_success
+        self.slack.send_message("first", user=self.user)
+        self.slack.send_message("second", user=self.user1)
+        # another process reads the directory persisted by the first refresh
+        slack_directory.clear()
+        self.slack.send_message("third", user=self.user)
+
+        self.assertEqual(
+            [call[0][0] for call in fake_slack.call_args_list].count("users.list"), 1
+        )
+        with patch.dict("os.environ", {"SLACK_DIRECTORY_TTL": "0"}):
+            self.slack.send_message("fourth", user=self.user)
+        self.assertEqual(
+            [call[0][0] for call in fake_slack.call_args_list].count("users.list"), 2
+        )
+
+    @patch("core.slack_bot.SlackClient.api_call")
+    def test_refresh_slack_directory_command(self, fake_slack):
+        fake_slack.side_effect = side_effect_success
+
+        call_command("refresh_slack_directory")
+
+        self.assertEqual(
+            dict(SlackDirectoryEntry.objects.values_list("email", "slack_id")),
+            {"slacktest@andela.com": "someid", "slacktest1@andela.com": "anotherid"},
+        )
+
     @classmethod
     def tearDownClass(cls):
         super().tearDownClass()
@@ -0,0 +1,135 @@
+# Standard Library
+import os
+from datetime import timedelta
+from unittest.mock import patch
+
+# Third-Party Imports
+from django.utils import timezone
+from django_q.models import Schedule
+
+# App Imports
+from core import constants, slack_outbox
+from core.models import AllocationHistory, SlackMessage
+from core.slack_bot import SlackIntegration, StubSlackClient
+from core.slack_outbox import drain_outbox, queue_message
+from core.tests import CoreBaseTestCase
+
+
+@patch.dict("os.environ", {"SLACK_POST_INTERVAL": "0"})
+@patch("core.slack_outbox.schedule_drain")
+class SlackOutboxTestCase(CoreBaseTestCase):
+    def setUp(self):
+        # drop the notifications of the allocations made by the fixtures
+        SlackMessage.objects.all().delete()
+
+    def test_allocating_an_asset_queues_the_notification(self, mock_schedule_drain):
+        with patch.object(SlackIntegration, "send_message") as mock_send_message:
+            AllocationHistory.objects.create(
+                asset=self.test_asset, current_assignee=self.asset_assignee2
+            )
+
+        mock_send_message.assert_not_called()
+        message = SlackMessage.objects.get(user=self.user2)
+        self.assertIn("has been allocated to you", message.text)
+        self.assertEqual(message.status, constants.OUTBOX_PENDING)
+
+    def test_drain_coalesces_the_messages_of_a_recipient(self, mock_schedule_drain):
+        for text in ["first", "second"]:
+            queue_message(text, user=self.user)
+        queue_message("ops")
+
+        with patch.object(SlackIntegration, "send_message") as mock_send_message:
+            mock_send_message.return_value = {"ok": True}
+            drain_outbox()
+
+        self.assertEqual(mock_send_message.call_count, 2)
+        mock_send_message.assert_any_call("first\n\nsecond", user=self.user, channel="")
+        self.assertFalse(
+            SlackMessage.objects.exclude(status=constants.OUTBOX_SENT).exists()
+        )
+        mock_schedule_drain.assert_called_once_with()
+
+    def test_failed_posts_are_retried_with_backoff(self, mock_schedule_drain):
+        queue_message("retried", channel="#ops")
+
+        with patch.object(SlackIntegration, "send_message") as mock_send_message:
+            mock_send_message.return_value = {"ok": False, "error": "fatal_error"}
+            drain_outbox()
+            message = SlackMessage.objects.get(text="retried")
+            self.assertEqual(message.status, constants.OUTBOX_PENDING)
+            self.assertEqual(message.attempts, 1)
+            self.assertGreaterEqual(message.next_attempt_at, message.created_at)
+
+            SlackMessage.objects.update(next_attempt_at=timezone.now())
+            with patch.dict("os.environ", {"SLACK_MAX_ATTEMPTS": "2"}):
+                drain_outbox()
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, constants.OUTBOX_FAILED)
+        self.assertEqual(message.error, "fatal_error")
+
+    def test_rate_limited_posts_defer_the_rest_of_the_batch(self, mock_schedule_drain):
+        queue_message("first", channel="#one")
+        queue_message("second", channel="#two")
+
+        with patch.object(SlackIntegration, "send_message") as mock_send_message:
+            mock_send_message.return_value = {"ok": False, "error": "ratelimited"}
+            drain_outbox()
+
+        self.assertEqual(mock_send_message.call_count, 1)
+        self.assertEqual(
+            list(SlackMessage.objects.values_list("status", "attempts")),
+            [(constants.OUTBOX_PENDING, 0), (constants.OUTBOX_PENDING, 0)],
+        )
+
+    def test_claimed_messages_are_not_sent_by_another_drain(self, mock_schedule_drain):
+        queue_message("claimed", channel="#ops")
+        claimed = slack_outbox.claim_messages(10)
+
+        with patch.object(SlackIntegration, "send_message") as mock_send_message:
+            drain_outbox()
+
+        self.assertEqual([message.text for message in claimed], ["claimed"])
+        mock_send_message.assert_not_called()
+
+    @patch("core.slack_outbox.get_drain_budget", lambda: 0)
+    def test_drain_stops_posting_at_the_deadline(self, mock_schedule_drain):
+        queue_message("first", channel="#one")
+        queue_message("second", channel="#two")
+
+        with patch.object(SlackIntegration, "send_message") as mock_send_message:
+            mock_send_message.return_value = {"ok": True}
+            drain_outbox()
+
+        self.assertEqual(mock_send_message.call_count, 1)
+        second = SlackMessage.objects.get(text="second")
+        self.assertEqual(second.status, constants.OUTBOX_PENDING)
+        self.assertLessEqual(second.next_attempt_at, timezone.now())
+
+    def test_stub_client_answers_slack_calls_locally(self, mock_schedule_drain):
+        with patch.dict(os.environ, {"SLACK_BACKEND": "stub"}):
+            slack_client = SlackIntegration().slack_client
+
+        response = slack_client.api_call("users.list", limit=100)
+
+        self.assertIsInstance(slack_client, StubSlackClient)
+        self.assertIn(
+            {"id": "U{}".format(self.user.id), "profile": {"email": self.user.email}},
+            response["members"],
+        )
+        self.assertEqual(slack_client.calls, [("users.list", {"limit": 100})])
+
+
+class ScheduleDrainTestCase(CoreBaseTestCase):
+    def test_later_drains_reuse_one_schedule(self):
+        SlackMessage.objects.all().delete()
+        queue_message("later", channel="#ops")
+        next_attempt_at = timezone.now() + timedelta(minutes=5)
+        SlackMessage.objects.update(next_attempt_at=next_attempt_at)
+
+        slack_outbox.schedule_drain()
+        slack_outbox.schedule_drain()
+
+        schedule = Schedule.objects.get(func=slack_outbox.DRAIN_TASK)
+        self.assertEqual(schedule.name, slack_outbox.DRAIN_SCHEDULE)
+        self.assertEqual(schedule.next_run, next_attempt_at)
@@ -1,14 +1,25 @@
 # Standard Library
+import json
 import random
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
 from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
 
 # Third-Party Imports
+import requests
 import responses
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.db import connection, IntegrityError
+from django.test.utils import CaptureQueriesContext
+from django.utils.dateparse import parse_datetime
 
 # App Imports
-from core.models import AISUserSync
+from core.management.commands import sync_users
+from core.management.commands.sync_users import AISUserFetcher, UserSyncLoader
+from core.models import AISUserSync, AssetAssignee
 from core.tests import CoreBaseTestCase
 
 User = get_user_model()
@@ -267,3 +278,222 @@ class UserSyncCommandsTestCase(CoreBaseTestCase):
         self._confirm_call_count(1)
         # no change in user count
         self.assertEqual(user_count, User.objects.count())
+
+    def test_loading_a_page_takes_the_same_queries_for_any_number_of_users(self):
+        def load_page(prefix, number_of_users):
+            ais_users = [
+                dict(
+                    self.sample_user_data["values"][0],
+                    email="{}.{}@andela.com".format(prefix, number),
+                    location={"name": "{} {}".format(prefix, number % 2)},
+                )
+                for number in range(number_of_users)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                UserSyncLoader().load_page(ais_users)
+            return len(context.captured_queries)
+
+        self.assertEqual(load_page("few", 2), load_page("many", 20))
+
+    def test_loading_a_page_creates_users_and_updates_changed_fields(self):
+        ais_user = self.sample_user_data["values"][0]
+        existing = dict(ais_user, email=self.user.email, status="suspended")
+        new = dict(ais_user, email="loaded.user@andela.com")
+        loader = UserSyncLoader()
+
+        loader.load_page([existing, new])
+
+        user = User.objects.get(email=new["email"])
+        self.assertEqual(user.picture, "https://test.example.com/pic/photo.jpg")
+        self.assertEqual(user.cohort, 1)
+        self.assertEqual(user.location.name, "Nairobi")
+        self.assertTrue(AssetAssignee.objects.filter(user=user).exists())
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.location.name, "Nairobi")
+        self.assertEqual(loader.new_records_count, 1)
+        self.assertEqual(loader.updated_records_count, 1)
+        self.assertIn("user_status", loader.updated_data[self.user.email])
+
+    @patch.dict(sync_users.SYNC_ERRORS, clear=True)
+    def test_a_record_that_cannot_be_written_only_skips_itself(self):
+        ais_user = self.sample_user_data["values"][0]
+        good = dict(ais_user, email="good.user@andela.com")
+        bad = dict(ais_user, email="bad.user@andela.com")
+        bulk_create = User.objects.bulk_create
+
+        def fail_on_bad_user(users):
+            if any(user.email == bad["email"] for user in users):
+                raise IntegrityError("duplicate key value")
+            return bulk_create(users)
+
+        loader = UserSyncLoader()
+        with patch.object(User.objects, "bulk_create", side_effect=fail_on_bad_user):
+            loader.load_page([good, bad])
+
+        self.assertTrue(User.objects.filter(email=good["email"]).exists())
+        self.assertFalse(User.objects.filter(email=bad["email"]).exists())
+        self.assertEqual(loader.new_records_count, 1)
+        self.assertIn(
+            "bad.user@andela.com - duplicate key value",
+            sync_users.SYNC_ERRORS["other_errors"],
+        )
+
+    @patch.dict("os.environ", {"AIS_URL": "http://ais.example.com/"})
+    @patch.object(UserSyncLoader, "load_page", side_effect=RuntimeError("boom"))
+    @patch.object(sync_users, "fetch_ais_user_data", return_value=[([{}], False)])
+    def test_failed_sync_closes_its_record(self, mock_fetch, mock_load_page):
+        with self.assertRaises(RuntimeError):
+            call_command("sync_users")
+
+        sync_record = AISUserSync.objects.latest("created_at")
+        self.assertFalse(sync_record.running)
+        self.assertFalse(sync_record.successful)
+
+    def test_delta_sync_drops_records_not_updated_since_the_high_water_mark(self):
+        AISUserSync.objects.create(
+            successful=True, high_water_mark=parse_datetime("2019-01-01T00:00:00Z")
+        )
+        ais_user = self.sample_user_data["values"][0]
+        old = dict(ais_user, email="old.user@andela.com")
+        old["updated_at"] = "2018-12-31T00:00:00Z"
+        loader = UserSyncLoader()
+
+        with CaptureQueriesContext(connection) as context:
+            loader.load_page([old])
+
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertFalse(User.objects.filter(email=old["email"]).exists())
+
+    @responses.activate
+    def test_user_sync_stores_and_requests_from_the_high_water_mark(self):
+        AISUserSync.objects.create(
+            successful=True, high_water_mark=parse_datetime("2019-01-01T00:00:00Z")
+        )
+        ais_user = dict(
+            self.sample_user_data["values"][0],
+            email="delta.user@andela.com",
+            updated_at="2019-02-01T00:00:00Z",
+        )
+        responses.add(
+            responses.GET, self.ais_users_endpoint, json={"values": [ais_user]}
+        )
+        responses.add(responses.GET, self.ais_users_endpoint, json={})
+
+        with patch.dict("os.environ", {"AIS_UPDATED_SINCE_PARAM": "updated_since"}):
+            call_command("sync_users")
+
+        self.assertIn(
+            "updated_since=2019-01-01T00%3A00%3A00%2B00%3A00",
+            responses.calls[0].request.url,
+        )
+        self.assertTrue(User.objects.filter(email=ais_user["email"]).exists())
+        self.assertEqual(
+            AISUserSync.objects.latest("id").high_water_mark,
+            parse_datetime(ais_user["updated_at"]),
+        )
+
+
+class FakeAISServer(ThreadingMixIn, HTTPServer):
+    """Serves `total` users from /users, failing the first `failures` calls"""
+
+    daemon_threads = True
+
+    def __init__(self, total, failures=0):
+        super().__init__(("127.0.0.1", 0), FakeAISHandler)
+        self.total = total
+        self.failures = failures
+        self.requests = []
+        self.url = "http://127.0.0.1:{}/".format(self.server_port)
+
+
+class FakeAISHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.requests.append((url.path, query))
+        if self.server.failures:
+            self.server.failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        limit, page = int(query["limit"][0]), int(query["page"][0])
+        first = (page - 1) * limit
+        users = [
+            {"id": str(number), "email": "fake.{}@andela.com".format(number)}
+            for number in range(first, min(first + limit, self.server.total))
+        ]
+        body = json.dumps({"total": self.server.total, "values": users}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@patch.dict("os.environ", {"AIS_LIMIT": "2", "AIS_WORKERS": "3"})
+class AISUserFetcherTestCase(CoreBaseTestCase):
+    def start_server(self, total, failures=0):
+        server = FakeAISServer(total, failures=failures)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_pages_are_fetched_concurrently_and_yielded_in_order(self):
+        server = self.start_server(total=9)
+
+        pages = list(AISUserFetcher(server.url, "token").pages())
+
+        emails = [user["email"] for users, _ in pages for user in users]
+        self.assertEqual(emails, ["fake.{}@andela.com".format(n) for n in range(9)])
+        self.assertTrue(all(not sec_url_used for _, sec_url_used in pages))
+        self.assertEqual(
+            sorted(int(query["page"][0]) for _, query in server.requests),
+            [1, 2, 3, 4, 5],
+        )
+
+    @patch("core.management.commands.sync_users.time.sleep")
+    def test_failed_requests_are_retried_on_the_secondary_url(self, mock_sleep):
+        server = self.start_server(total=1, failures=2)
+
+        pages = list(AISUserFetcher(server.url, "token").pages())
+
+        self.assertEqual(len(pages), 1)
+        self.assertTrue(pages[0][1])
+        self.assertEqual(
+            [path for path, _ in server.requests], ["/users", "/users", "/users/basic"]
+        )
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    @responses.activate
+    @patch("core.management.commands.sync_users.time.sleep")
+    def test_connection_errors_are_retried(self, mock_sleep):
+        url = "http://ais.example.com/users"
+        responses.add(
+            responses.GET, url, body=requests.ConnectionError("Connection reset")
+        )
+        responses.add(
+            responses.GET,
+            url,
+            json={"total": 1, "values": [{"id": "1", "email": "fake.1@andela.com"}]},
+        )
+
+        pages = list(AISUserFetcher("http://ais.example.com/", "token").pages())
+
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0][0][0]["email"], "fake.1@andela.com")
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    def test_retry_delays_grow_exponentially_up_to_the_cap(self):
+        fetcher = AISUserFetcher("http://ais.example.com/", "token")
+        fetcher.retry_timeout, fetcher.max_retry_timeout = 1, 4
+
+        with patch("core.management.commands.sync_users.random.uniform") as uniform:
+            uniform.side_effect = lambda low, high: high
+            delays = [fetcher.get_retry_delay(attempt) for attempt in range(4)]
+
+        self.assertEqual(delays, [1, 2, 4, 4])
@@ -189,9 +189,15 @@ EMAIL_HOST_USER = config("EMAIL_HOST_USER", None)
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", None)
 EMAIL_USE_TLS = config("EMAIL_USE_TLS", True)
 
+# asset imports and exports run as a single task with a timeout of their own
+ASSET_IMPORT_TIMEOUT = config("ASSET_IMPORT_TIMEOUT", 900, cast=int)
+ASSET_EXPORT_TIMEOUT = config("ASSET_EXPORT_TIMEOUT", 600, cast=int)
 Q_CLUSTER = {
     'name': 'art-backend',
     'timeout': 60,  # The number of seconds a worker is allowed to spend on a task before it’s terminated.
+    # seconds before the broker delivers an unfinished task again, longer
+    # than any task may run
+    'retry': max(ASSET_IMPORT_TIMEOUT, ASSET_EXPORT_TIMEOUT) + 60,
     'queue_limit': 500,
     'cpu_affinity': 1,  # Sets the number of processor each worker can use
     'label': 'ART',